@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+GUI responsiveness benchmark under simulated FFmpeg load.
+
+Replays recorded FFmpeg output from a background thread into the real
+MKVConverterGUI slots (log_ffmpeg_output / update_job_progress /
+update_progress) through queued signals, the same path ConversionWorker
+uses, and measures:
+
+- event-loop latency: delay of a ping signal queued behind the flood
+- dropped frames: 60 Hz timer ticks that could not run on time
+- memory growth: RSS and log document size before/after
+- per-slot cost: CPU time spent in each GUI slot
+
+Runs offscreen, so it works on headless CI boxes:
+
+    python benchmarks/gui_responsiveness.py --rate 2000 --seconds 10 --jobs 4
+    python benchmarks/gui_responsiveness.py --json result.json
+    python benchmarks/gui_responsiveness.py --baseline result.json  # exit 1 on regression
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PyQt6.QtCore import QEventLoop, QObject, QSettings, QThread, QTimer, pyqtSignal, qInstallMessageHandler
+from PyQt6.QtWidgets import QApplication
+
+from mkv2mp4ui.main import MKVConverterGUI
+from mkv2mp4ui.engine import JobProgress, parse_duration, parse_progress, parse_stats
+
+
+DEFAULT_LOG = Path(__file__).parent / "data" / "ffmpeg_libx264_stderr.log"
+FRAME_INTERVAL_MS = 16  # one 60 Hz frame
+PING_INTERVAL = 0.01  # seconds between latency probes
+
+# Metrics compared against a baseline; all are "lower is better"
+REGRESSION_METRICS = ("latency_p99_ms", "dropped_frames_per_s", "rss_growth_mb", "slot_cpu_us_per_call")
+
+
+def quiet_offscreen_warnings(mode, context, message):
+    # The offscreen platform warns on every window resize
+    if "propagateSizeHints" not in message:
+        print(message, file=sys.stderr)
+
+
+def rss_bytes():
+    """Resident set size of this process"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        import resource
+        # Peak rather than current RSS, but still shows growth
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class BenchmarkGUI(MKVConverterGUI):
+    """The real window, minus the FFmpeg lookup/download prompt and the user's settings"""
+
+    def __init__(self):
+        # An INI file in a temporary folder, so nothing is read from or written to the
+        # user's settings (the registry on Windows), including the last source folder scan
+        self.settings_dir = tempfile.TemporaryDirectory(prefix="mkv2mp4ui-bench-")
+        super().__init__(QSettings(os.path.join(self.settings_dir.name, "settings.ini"),
+                                   QSettings.Format.IniFormat))
+
+    def check_and_setup_ffmpeg(self):
+        self.ffmpeg_path = "ffmpeg"
+
+
+class Replayer(QThread):
+    """Emits recorded FFmpeg output at a fixed rate, like ConversionWorker's job threads"""
+    ffmpeg_output = pyqtSignal(int, str)
+    job_progress = pyqtSignal(int, object)
+    progress_updated = pyqtSignal(int, str)
+    ping = pyqtSignal(float)
+
+    def __init__(self, lines, rate, seconds, jobs):
+        super().__init__()
+        self.lines = lines
+        self.rate = rate
+        self.seconds = seconds
+        self.jobs = jobs  # Job objects
+        self.durations = {}
+        self.emitted = 0
+
+    def emit_line(self, job, line):
+        # The engine parses stats lines into JobProgress events next to the raw output
+        self.ffmpeg_output.emit(job.id, line)
+        if "Duration:" in line:
+            self.durations[job.id] = parse_duration(line)
+        progress = parse_progress(line)
+        if progress is not None:
+            self.job_progress.emit(job.id, JobProgress(job, progress[0], self.durations.get(job.id), progress[1],
+                                                       *parse_stats(line)))
+        self.emitted += 1
+
+    def run(self):
+        # Each simulated job starts with the banner so its Duration is known
+        header = [line for line in self.lines if "frame=" not in line]
+        progress = [line for line in self.lines if "frame=" in line] or self.lines
+        for job in self.jobs:
+            self.progress_updated.emit(job.id, f"Converting: {job.input_file}")
+            for line in header:
+                self.emit_line(job, line)
+
+        interval = 1.0 / self.rate
+        start = time.perf_counter()
+        next_ping = start
+        index = 0
+        while True:
+            now = time.perf_counter()
+            if now - start >= self.seconds:
+                break
+            if now >= next_ping:
+                self.ping.emit(now)
+                next_ping = now + PING_INTERVAL
+            # Catch up in bursts, as readline() delivers buffered output
+            due = int((now - start) / interval) - index
+            for _ in range(due):
+                job = self.jobs[index % len(self.jobs)]
+                self.emit_line(job, progress[(index // len(self.jobs)) % len(progress)])
+                index += 1
+                if index % 200 == 0:
+                    self.progress_updated.emit(job.id, f"Converting: {job.input_file}")
+            time.sleep(min(interval, 0.001))
+
+
+class Probe(QObject):
+    """Collects frame-tick and ping latencies on the GUI thread"""
+
+    def __init__(self):
+        super().__init__()
+        self.ping_latencies = []
+        self.frame_gaps = []
+        self.last_tick = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(FRAME_INTERVAL_MS)
+        self.timer.timeout.connect(self.tick)
+
+    def tick(self):
+        now = time.perf_counter()
+        if self.last_tick is not None:
+            self.frame_gaps.append((now - self.last_tick) * 1000)
+        self.last_tick = now
+
+    def on_ping(self, sent):
+        self.ping_latencies.append((time.perf_counter() - sent) * 1000)
+
+    def dropped_frames(self):
+        return sum(max(0, int(gap // FRAME_INTERVAL_MS) - 1) for gap in self.frame_gaps)
+
+
+class SlotTimer:
+    """Wraps a GUI slot to account the CPU time it spends"""
+
+    def __init__(self, slot):
+        self.slot = slot
+        self.calls = 0
+        self.cpu = 0.0
+        self.wall = []
+
+    def __call__(self, *args):
+        cpu_start = time.thread_time()
+        wall_start = time.perf_counter()
+        self.slot(*args)
+        self.cpu += time.thread_time() - cpu_start
+        self.wall.append((time.perf_counter() - wall_start) * 1000)
+        self.calls += 1
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "cpu_us_per_call": self.cpu / self.calls * 1e6 if self.calls else 0.0,
+            "wall_p99_ms": percentile(self.wall, 0.99),
+            "cpu_total_s": self.cpu,
+        }
+
+
+def run_benchmark(lines, rate, seconds, jobs):
+    qInstallMessageHandler(quiet_offscreen_warnings)
+    app = QApplication.instance() or QApplication(sys.argv)
+    gui = BenchmarkGUI()
+    gui.show()
+    # Real queue entries so update_progress rebuilds a realistic queue view
+    queued = [gui.job_queue.add(f"job{n}.mkv", f"job{n}.mp4", gui.get_codec_settings()) for n in range(jobs)]
+    app.processEvents()
+
+    slots = {
+        "log_ffmpeg_output": SlotTimer(gui.log_ffmpeg_output),
+        "update_job_progress": SlotTimer(gui.update_job_progress),
+        "update_progress": SlotTimer(gui.update_progress),
+    }
+    probe = Probe()
+    replayer = Replayer(lines, rate, seconds, queued)
+    replayer.ffmpeg_output.connect(slots["log_ffmpeg_output"])
+    replayer.job_progress.connect(slots["update_job_progress"])
+    replayer.progress_updated.connect(slots["update_progress"])
+    replayer.ping.connect(probe.on_ping)
+
+    rss_before = rss_bytes()
+    blocks_before = gui.log_text.document().blockCount()
+    cpu_before = time.process_time()
+    started = time.perf_counter()
+
+    # finished is queued behind every line the replayer emitted, so the loop
+    # exits once the GUI has caught up with the whole flood
+    loop = QEventLoop()
+    replayer.finished.connect(loop.quit)
+    probe.timer.start()
+    replayer.start()
+    loop.exec()
+    drain_s = time.perf_counter() - started - seconds
+    elapsed = time.perf_counter() - started
+    probe.timer.stop()
+
+    slot_stats = {name: timer.stats() for name, timer in slots.items()}
+    total_calls = sum(s["calls"] for s in slot_stats.values())
+    total_cpu = sum(s["cpu_total_s"] for s in slot_stats.values())
+    result = {
+        "rate": rate,
+        "seconds": seconds,
+        "jobs": jobs,
+        "lines_emitted": replayer.emitted,
+        "lines_delivered": slots["log_ffmpeg_output"].calls,
+        "elapsed_s": elapsed,
+        "drain_s": drain_s,
+        "latency_p50_ms": percentile(probe.ping_latencies, 0.5),
+        "latency_p99_ms": percentile(probe.ping_latencies, 0.99),
+        "latency_max_ms": max(probe.ping_latencies, default=0.0),
+        "frame_gap_p99_ms": percentile(probe.frame_gaps, 0.99),
+        "dropped_frames": probe.dropped_frames(),
+        "dropped_frames_per_s": probe.dropped_frames() / elapsed if elapsed else 0.0,
+        "rss_growth_mb": (rss_bytes() - rss_before) / (1024 * 1024),
+        "log_blocks_added": gui.log_text.document().blockCount() - blocks_before,
+        "process_cpu_s": time.process_time() - cpu_before,
+        "slot_cpu_us_per_call": total_cpu / total_calls * 1e6 if total_calls else 0.0,
+        "slots": slot_stats,
+    }
+    gui.close()
+    return result
+
+
+def print_result(result):
+    print(f"Replayed {result['lines_emitted']} lines at {result['rate']}/s from {result['jobs']} jobs "
+          f"over {result['elapsed_s']:.1f}s (GUI caught up {result['drain_s']:.2f}s after the last line)")
+    print(f"  Event-loop latency: p50 {result['latency_p50_ms']:.1f} ms, "
+          f"p99 {result['latency_p99_ms']:.1f} ms, max {result['latency_max_ms']:.1f} ms")
+    print(f"  Frames: p99 gap {result['frame_gap_p99_ms']:.1f} ms, "
+          f"{result['dropped_frames']} dropped ({result['dropped_frames_per_s']:.1f}/s)")
+    print(f"  Memory: RSS +{result['rss_growth_mb']:.1f} MB, {result['log_blocks_added']} log blocks added")
+    print(f"  CPU: {result['process_cpu_s']:.2f}s process total")
+    for name, stats in result["slots"].items():
+        print(f"    {name}: {stats['calls']} calls, {stats['cpu_us_per_call']:.0f} us CPU/call, "
+              f"p99 {stats['wall_p99_ms']:.2f} ms")
+
+
+def compare(result, baseline, tolerance):
+    """Return regression messages for metrics worse than baseline * (1 + tolerance)"""
+    regressions = []
+    for metric in REGRESSION_METRICS:
+        old, new = baseline.get(metric), result.get(metric)
+        if old is None or new is None:
+            continue
+        # Small absolute slack keeps near-zero baselines from flagging noise
+        if new > old * (1 + tolerance) + 1.0:
+            regressions.append(f"{metric}: {old:.2f} -> {new:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--log", type=Path, default=DEFAULT_LOG, help="recorded FFmpeg output to replay")
+    parser.add_argument("--rate", type=int, default=1000, help="output lines per second, all jobs combined")
+    parser.add_argument("--seconds", type=float, default=5.0, help="how long to replay")
+    parser.add_argument("--jobs", type=int, default=1, help="simulated parallel jobs")
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    parser.add_argument("--baseline", type=Path, help="compare against a previous --json result")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    lines = [line.rstrip("\n") for line in args.log.read_text(encoding="utf-8").splitlines() if line.strip()]
+    result = run_benchmark(lines, args.rate, args.seconds, max(1, args.jobs))
+    print_result(result)
+
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    if args.baseline:
+        regressions = compare(result, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Storage-budget mode: fit a batch into a fixed disk allowance.
+
+CRF gives predictable quality but unpredictable sizes. In budget mode the
+probed durations turn a total allowance (or an allowance per hour of video)
+into a video bitrate per job. Jobs are then encoded in a single pass with
+average-bitrate rate control. Each job's share is weighted by its duration
+and by how much bitrate its resolution needs.
+
+Single-pass encodes miss their target a little, so the tracker compares
+actual with planned bytes as jobs finish. It hands the remaining allowance
+to the jobs still waiting, corrected by the overshoot seen so far, instead
+of using two-pass encodes.
+"""
+from dataclasses import dataclass
+
+from mkv2mp4ui.planner import (DEFAULT_AUDIO_BITRATE, DEFAULT_VIDEO_BITRATE, check_free_space,
+                               estimate_job, format_bytes, resolution_bucket)
+
+
+BUDGET_TOTAL = "total"
+BUDGET_PER_HOUR = "per_hour"
+
+MIN_VIDEO_BITRATE = 150_000  # bits/s; below this a job gets the floor and the budget overshoots
+CONTAINER_OVERHEAD = 0.01  # MP4 muxing overhead as a fraction of the stream bytes
+MAXRATE_FACTOR = 1.5  # VBV peak bitrate relative to the target
+BUFSIZE_FACTOR = 2.0  # VBV buffer, in seconds at the target bitrate
+CORRECTION_LIMITS = (0.7, 1.5)  # bounds on the actual/planned size correction
+
+PENDING = "pending"
+RUNNING = "running"
+FINISHED = "finished"
+
+
+@dataclass
+class BudgetItem:
+    """One file's share of the budget"""
+    key: str  # input file
+    duration: float | None
+    weight: float  # relative bitrate need for its resolution
+    audio_bitrate: int  # bits/s
+    fixed_bytes: int | None = None  # expected size of stream-copy jobs, which can't be rate controlled
+    planned: int = 0  # bytes allocated
+    video_bitrate: int | None = None  # bits/s allocated
+    actual: int | None = None  # bytes written, once finished
+    state: str = PENDING
+
+    @property
+    def controllable(self):
+        return self.fixed_bytes is None and bool(self.duration)
+
+
+def video_bitrate_args(codec_settings):
+    """FFmpeg rate-control arguments for a budgeted job (single-pass ABR with a VBV cap)"""
+    bitrate = int(codec_settings['video_bitrate'])
+    return ['-b:v', f"{bitrate // 1000}k",
+            '-maxrate', f"{int(bitrate * MAXRATE_FACTOR) // 1000}k",
+            '-bufsize', f"{int(bitrate * BUFSIZE_FACTOR) // 1000}k"]
+
+
+class BudgetTracker:
+    """Allocates a storage budget across a batch and re-allocates as jobs finish"""
+
+    def __init__(self, mode, size_bytes):
+        self.mode = mode
+        self.size_bytes = size_bytes  # total, or per hour of video
+        self.items = {}  # key -> BudgetItem
+
+    def add(self, key, media, codec_settings):
+        """Register a file; media is its probe result or None"""
+        duration = media.duration if media else None
+        height = media.height if media else None
+        if codec_settings.get('max_height') and height:
+            height = min(height, codec_settings['max_height'])
+        weight = DEFAULT_VIDEO_BITRATE[resolution_bucket(height)] / DEFAULT_VIDEO_BITRATE['fhd']
+        if codec_settings.get('audio_codec') == 'copy':
+            audio_bitrate = (media.audio_bit_rate if media else None) or DEFAULT_AUDIO_BITRATE
+        else:
+            audio_bitrate = DEFAULT_AUDIO_BITRATE
+        fixed = None
+        if codec_settings.get('video_codec') == 'copy':
+            fixed = media.size if media else 0
+        self.items[key] = BudgetItem(key, duration, weight, audio_bitrate, fixed)
+        return self.items[key]
+
+    @property
+    def total_bytes(self):
+        if self.mode == BUDGET_PER_HOUR:
+            hours = sum(item.duration or 0 for item in self.items.values()) / 3600
+            return int(self.size_bytes * hours)
+        return int(self.size_bytes)
+
+    def correction(self):
+        """Actual/planned bytes over finished rate-controlled jobs, within CORRECTION_LIMITS"""
+        finished = [i for i in self.items.values() if i.state == FINISHED and i.controllable and i.actual]
+        planned = sum(i.planned for i in finished)
+        if not planned:
+            return 1.0
+        low, high = CORRECTION_LIMITS
+        return min(high, max(low, sum(i.actual for i in finished) / planned))
+
+    def committed_bytes(self):
+        """Bytes already written or reserved by jobs that are no longer pending"""
+        committed = 0
+        for item in self.items.values():
+            if item.state == FINISHED:
+                committed += item.actual or 0
+            elif item.state == RUNNING:
+                committed += item.fixed_bytes if item.fixed_bytes is not None else item.planned
+            elif item.fixed_bytes is not None:
+                committed += item.fixed_bytes
+        return committed
+
+    def allocate(self):
+        """Share what is left among pending rate-controlled jobs; returns {key: video bits/s}"""
+        pending = [i for i in self.items.values() if i.state == PENDING and i.controllable]
+        available = max(0, self.total_bytes - self.committed_bytes()) / (1 + CONTAINER_OVERHEAD)
+        demand = sum(i.weight * i.duration for i in pending)
+        correction = self.correction()
+        allocations = {}
+        for item in pending:
+            share = available * item.weight * item.duration / demand
+            # Aim lower (or higher) by the overshoot the encoder has shown so far
+            bitrate = share * 8 / item.duration / correction - item.audio_bitrate
+            item.video_bitrate = int(max(MIN_VIDEO_BITRATE, bitrate))
+            item.planned = int((item.video_bitrate + item.audio_bitrate) * item.duration / 8
+                               * (1 + CONTAINER_OVERHEAD))
+            allocations[item.key] = item.video_bitrate
+        return allocations
+
+    def start(self, key):
+        item = self.items.get(key)
+        if item is not None and item.state == PENDING:
+            item.state = RUNNING
+
+    def finish(self, key, actual_bytes):
+        """Record a finished job's real size (0 if it failed or was cancelled)"""
+        item = self.items.get(key)
+        if item is not None:
+            item.state = FINISHED
+            item.actual = actual_bytes
+
+    def drop_pending(self, keep):
+        """Forget pending files not in keep (rejected, cancelled or never queued)"""
+        for key, item in list(self.items.items()):
+            if item.state == PENDING and key not in keep:
+                del self.items[key]
+
+    def unallocated(self):
+        """Files that could not be budgeted because their duration is unknown"""
+        return [i.key for i in self.items.values() if i.fixed_bytes is None and not i.duration]
+
+    def over_budget(self):
+        """True if the floor bitrate or fixed-size jobs push the plan past the budget"""
+        planned = self.committed_bytes() + sum(i.planned for i in self.items.values()
+                                               if i.state == PENDING and i.controllable)
+        return planned > self.total_bytes
+
+    def summary(self):
+        used = sum(i.actual or 0 for i in self.items.values() if i.state == FINISHED)
+        pending = [i for i in self.items.values() if i.state == PENDING and i.controllable]
+        text = f"Budget: {format_bytes(used)} written of {format_bytes(self.total_bytes)}"
+        if pending:
+            average = sum(i.video_bitrate for i in pending) / len(pending)
+            text += f"; {len(pending)} waiting jobs at ~{average / 1e6:.2f} Mb/s video"
+        correction = self.correction()
+        if correction != 1.0:
+            text += f" (encoder running {(correction - 1) * 100:+.0f}% vs plan)"
+        return text
+
+
+def apply_budget(plan, tracker, history=None):
+    """Budget a BatchPlan: sets video_bitrate in each estimate's codec_settings and
+    re-estimates sizes and free space. Returns the allocations {input_file: bits/s}."""
+    for estimate in plan.estimates:
+        tracker.add(estimate.input_file, estimate.media, estimate.codec_settings)
+    allocations = tracker.allocate()
+    for estimate in plan.estimates:
+        if estimate.input_file in allocations:
+            estimate.codec_settings = dict(estimate.codec_settings, video_bitrate=allocations[estimate.input_file])
+            estimate.seconds, estimate.output_bytes, estimate.from_history = estimate_job(
+                estimate.media, estimate.codec_settings, history)
+    plan.volumes = check_free_space(plan.estimates)
+    return allocations
@@ -0,0 +1,85 @@
+"""
+Asynchronous cancellation of ffmpeg processes and cleanup of partial outputs.
+
+Stopping escalates from asking ffmpeg to quit ('q' on stdin, which lets it
+finalise the file) to terminate() and finally kill(). It runs as an asyncio
+task, so the caller never waits on the process.
+"""
+import asyncio
+import os
+import shutil
+from pathlib import Path
+
+
+QUIT_GRACE_PERIOD = 3.0  # seconds to wait after sending 'q'
+TERMINATE_GRACE_PERIOD = 3.0  # seconds to wait after terminate() before kill()
+
+PARTIAL_DELETE = "delete"
+PARTIAL_QUARANTINE = "quarantine"
+QUARANTINE_DIR = ".partial"
+
+
+async def stop_process(process, quit_grace=QUIT_GRACE_PERIOD, terminate_grace=TERMINATE_GRACE_PERIOD):
+    """Stop an asyncio subprocess: 'q' -> terminate -> kill; returns once it has exited or been killed"""
+    if process.returncode is not None:
+        return
+
+    try:
+        if process.stdin:
+            process.stdin.write(b'q\n')
+            await process.stdin.drain()
+            await asyncio.wait_for(process.wait(), quit_grace)
+            return
+    except (OSError, ValueError, asyncio.TimeoutError):
+        pass
+
+    try:
+        process.terminate()
+        await asyncio.wait_for(process.wait(), terminate_grace)
+        return
+    except asyncio.TimeoutError:
+        pass
+    except OSError:
+        return
+
+    try:
+        process.kill()
+    except OSError:
+        pass
+
+
+def file_signature(path):
+    """(size, mtime_ns) of an existing file, or None if there is none"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def cleanup_partial_output(output_file, policy=PARTIAL_DELETE, existing=None):
+    """Delete an unfinished output, or move it into a .partial folder beside it.
+
+    existing is the file_signature() taken before the job started. A file
+    that is still unchanged was not written by this run and is left alone.
+    Returns a short description of what was done, or None if there was nothing to clean up.
+    """
+    path = Path(output_file)
+    if not path.exists():
+        return None
+    if existing is not None and file_signature(path) == existing:
+        return None
+
+    try:
+        if policy == PARTIAL_QUARANTINE:
+            quarantine = path.parent / QUARANTINE_DIR
+            quarantine.mkdir(exist_ok=True)
+            target = quarantine / path.name
+            if target.exists():
+                target.unlink()
+            shutil.move(str(path), str(target))
+            return f"moved partial output to {target}"
+        os.unlink(path)
+        return f"removed partial output {path.name}"
+    except OSError as e:
+        return f"could not clean up partial output {path.name}: {e}"
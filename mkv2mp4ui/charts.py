@@ -0,0 +1,143 @@
+"""
+Sparkline widgets for the live performance panel.
+
+Sparklines draw straight from timeseries.TimeSeries buffers. The panel
+repaints on a timer rather than on every FFmpeg stats line, so charting
+adds no work to the busy output path.
+"""
+from PyQt6.QtCore import Qt, QPointF
+from PyQt6.QtGui import QColor, QPainter, QPalette, QPen, QPolygonF
+from PyQt6.QtWidgets import QGridLayout, QGroupBox, QLabel, QSizePolicy, QWidget
+
+from mkv2mp4ui.planner import format_bytes, format_duration
+from mkv2mp4ui.timeseries import JOB_METRICS, BATCH_METRICS
+
+
+def format_rate(value):
+    return f"{format_bytes(value)}/s"
+
+
+# metric -> (label, value formatter, line colour)
+METRIC_STYLES = {
+    'fps': ("fps", lambda v: f"{v:.0f}", "#5cb85c"),
+    'speed': ("speed", lambda v: f"{v:.2f}x", "#5bc0de"),
+    'bitrate': ("bitrate", lambda v: f"{v / 1000:.1f} Mb/s", "#f0ad4e"),
+    'size': ("size", format_bytes, "#d9a109"),
+    'write_rate': ("write", format_rate, "#f0ad4e"),
+    'running': ("jobs", lambda v: f"{v:.0f}", "#aaaaaa"),
+}
+
+
+class Sparkline(QWidget):
+    """A small line chart of one TimeSeries with its latest value"""
+
+    def __init__(self, metric, series=None, parent=None):
+        super().__init__(parent)
+        self.label, self.formatter, colour = METRIC_STYLES[metric]
+        self.colour = QColor(colour)
+        self.series = series
+        self.setMinimumSize(110, 40)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        palette = self.palette()
+        rect = self.rect().adjusted(1, 1, -1, -1)
+        painter.fillRect(rect, palette.color(QPalette.ColorRole.Base))
+
+        # Caption on top, chart (scaled from zero to the series maximum) below it
+        series = self.series
+        latest = series.latest if series is not None else None
+        caption = f"{self.label} {self.formatter(latest) if latest is not None else '-'}"
+        caption_height = self.fontMetrics().height()
+        painter.setPen(palette.color(QPalette.ColorRole.Text))
+        painter.drawText(rect.adjusted(3, 0, -3, 0), Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop, caption)
+
+        if series is not None and len(series) > 1:
+            times, values = series.times, series.values
+            top = series.maximum() or 1.0
+            span = (times[-1] - times[0]) or 1.0
+            bottom = rect.bottom() - 2
+            height = bottom - rect.top() - caption_height - 2
+            points = QPolygonF([
+                QPointF(rect.left() + (t - times[0]) / span * rect.width(), bottom - v / top * height)
+                for t, v in zip(times, values)
+            ])
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setPen(QPen(self.colour, 1.5))
+            painter.drawPolyline(points)
+
+
+class PerformancePanel(QGroupBox):
+    """Batch totals plus one row of sparklines per running job"""
+
+    def __init__(self, metrics, parent=None):
+        super().__init__("Performance", parent)
+        self.metrics = metrics  # timeseries.MetricsRecorder
+        self.grid = QGridLayout(self)
+        self.grid.setContentsMargins(6, 4, 6, 4)
+        self.grid.setVerticalSpacing(2)
+        self.rows = {}  # job_id -> (grid row, name label, status label, sparklines)
+
+        self.grid.addWidget(QLabel("Batch"), 0, 0)
+        self.batch_lines = [Sparkline(metric, metrics.batch[metric]) for metric in BATCH_METRICS]
+        for column, sparkline in enumerate(self.batch_lines, 1):
+            self.grid.addWidget(sparkline, 0, column)
+        self.batch_status = QLabel("")
+        self.grid.addWidget(self.batch_status, 0, len(BATCH_METRICS) + 1)
+
+    def add_job(self, job_id, name):
+        if job_id in self.rows:
+            return
+        series = self.metrics.series(job_id)
+        # Reuse the grid rows of finished jobs
+        used = {r for r, *_ in self.rows.values()}
+        row = next(r for r in range(1, len(used) + 2) if r not in used)
+        name_label = QLabel(name)
+        name_label.setMaximumWidth(220)
+        name_label.setToolTip(name)
+        sparklines = [Sparkline(metric, series[metric]) for metric in JOB_METRICS]
+        status_label = QLabel("")
+        self.grid.addWidget(name_label, row, 0)
+        for column, sparkline in enumerate(sparklines, 1):
+            self.grid.addWidget(sparkline, row, column)
+        self.grid.addWidget(status_label, row, len(JOB_METRICS) + 1)
+        self.rows[job_id] = (row, name_label, status_label, sparklines)
+
+    def remove_job(self, job_id):
+        entry = self.rows.pop(job_id, None)
+        if entry is None:
+            return
+        _, name_label, status_label, sparklines = entry
+        for widget in [name_label, status_label] + sparklines:
+            self.grid.removeWidget(widget)
+            widget.deleteLater()
+
+    def clear_jobs(self):
+        for job_id in list(self.rows):
+            self.remove_job(job_id)
+
+    def refresh(self, now):
+        """Repaint every chart and flag jobs that stopped reporting progress"""
+        stalled = paused = 0
+        for job_id, (_, _, status_label, sparklines) in self.rows.items():
+            seconds = self.metrics.stalled_seconds(job_id, now)
+            stalled += bool(seconds)
+            if job_id in self.metrics.paused:
+                # Suspended on purpose, so no stats is expected
+                paused += 1
+                status_label.setText("paused")
+            else:
+                status_label.setText(f"stalled {format_duration(seconds)}" if seconds else "")
+            status_label.setStyleSheet("color: #d9534f;" if seconds else "")
+            for sparkline in sparklines:
+                sparkline.update()
+        for sparkline in self.batch_lines:
+            sparkline.update()
+        counts = []
+        if stalled:
+            counts.append(f"{stalled} stalled")
+        if paused:
+            counts.append(f"{paused} paused")
+        self.batch_status.setText(", ".join(counts))
+        self.batch_status.setStyleSheet("color: #d9534f;" if stalled else "")
@@ -0,0 +1,546 @@
+"""
+Qt-free asyncio conversion engine.
+
+ConversionEngine runs jobs from a JobQueue with bounded concurrency, the
+per-device I/O limits of IOScheduler, pause/hold and cancellation, and
+reports everything as typed events. The GUI's ConversionWorker is one
+consumer; scripts and asyncio services can use convert_batch() directly:
+
+    token = CancelToken()
+    async for event in convert_batch([("a.mkv", "a.mp4")], "ffmpeg", max_parallel=2, token=token):
+        if isinstance(event, JobProgress) and event.percent is not None:
+            print(f"{event.job.input_file}: {event.percent:.0f}%")
+
+Control methods (cancel_job, stop, set_paused, set_limits, ...) and
+CancelToken.cancel() are thread-safe, so the engine can run in its own
+thread and event loop while another thread steers it.
+"""
+import asyncio
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from mkv2mp4ui.jobqueue import Job, JobQueue, JobStatus
+from mkv2mp4ui.scheduler import IOScheduler
+from mkv2mp4ui.throttle import suspend_process, resume_process
+from mkv2mp4ui.cancellation import stop_process, cleanup_partial_output, file_signature, PARTIAL_DELETE
+from mkv2mp4ui.sidecars import plan_sidecars
+from mkv2mp4ui.budget import video_bitrate_args
+from mkv2mp4ui.planner import probe_file, find_ffprobe
+from mkv2mp4ui.rules import SIZE_UNITS
+from mkv2mp4ui.profiling import profiler, profiled
+
+
+DEFAULT_CODEC_SETTINGS = {
+    'video_codec': 'libx264',
+    'audio_codec': 'aac',
+    'crf': 23,
+    'preset': 'medium',
+}
+
+DISPATCH_INTERVAL = 0.25  # seconds; also picks up jobs added to the queue from other threads
+READ_CHUNK = 4096
+
+DURATION_RE = re.compile(r'Duration: (\d{2}):(\d{2}):(\d{2}\.\d{2})')
+TIME_RE = re.compile(r'time=(\d{2}):(\d{2}):(\d{2}\.\d{2})')
+SPEED_RE = re.compile(r'speed=(\d+\.?\d*)x')
+FPS_RE = re.compile(r'fps=\s*(\d+\.?\d*)')
+BITRATE_RE = re.compile(r'bitrate=\s*(\d+\.?\d*)kbits/s')
+SIZE_RE = re.compile(r'size=\s*(\d+)\s*(kib|kb|mib|mb|gib|b)?', re.I)
+
+
+@dataclass
+class JobEvent:
+    job: Job
+
+
+@dataclass
+class JobStarted(JobEvent):
+    pass
+
+
+@dataclass
+class JobOutput(JobEvent):
+    line: str
+
+
+@dataclass
+class JobProgress(JobEvent):
+    position: float  # seconds of media processed
+    duration: float | None = None  # total seconds, if FFmpeg reported it
+    speed: float | None = None  # multiple of real time
+    fps: float | None = None  # frames encoded per wall second
+    bitrate: float | None = None  # output bitrate so far, kbit/s
+    size: int | None = None  # output bytes written so far
+
+    @property
+    def percent(self):
+        if not self.duration:
+            return None
+        return min(100.0, self.position / self.duration * 100)
+
+    @property
+    def remaining_seconds(self):
+        """Wall-clock seconds left at the current speed, or None"""
+        if not self.duration or not self.speed:
+            return None
+        return max(0.0, self.duration - self.position) / self.speed
+
+
+@dataclass
+class JobFinished(JobEvent):
+    success: bool
+    message: str
+    return_code: int | None = None
+
+
+def parse_timestamp(hours, minutes, seconds):
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def parse_duration(line):
+    """Total duration in seconds from FFmpeg's 'Duration:' line, or None"""
+    match = DURATION_RE.search(line)
+    return parse_timestamp(*match.groups()) if match else None
+
+
+def parse_progress(line):
+    """(position, speed) from an FFmpeg stats line, or None if it isn't one"""
+    if "frame=" not in line and "size=" not in line:
+        return None
+    time_match = TIME_RE.search(line)
+    if not time_match:
+        return None
+    speed_match = SPEED_RE.search(line)
+    return parse_timestamp(*time_match.groups()), float(speed_match.group(1)) if speed_match else None
+
+
+def parse_stats(line):
+    """(fps, bitrate kbit/s, output bytes) from an FFmpeg stats line; N/A fields are None"""
+    fps = FPS_RE.search(line)
+    bitrate = BITRATE_RE.search(line)
+    size = SIZE_RE.search(line)
+    return (float(fps.group(1)) if fps else None,
+            float(bitrate.group(1)) if bitrate else None,
+            int(size.group(1)) * SIZE_UNITS[(size.group(2) or 'kb').lower()] if size else None)
+
+
+async def read_lines(stream):
+    """Yield lines split on \\n or \\r, since FFmpeg rewrites its stats line with \\r"""
+    buffer = ""
+    while True:
+        chunk = await stream.read(READ_CHUNK)
+        if not chunk:
+            break
+        buffer += chunk.decode('utf-8', errors='replace')
+        *lines, buffer = re.split(r'[\r\n]', buffer)
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+class CancelToken:
+    """Thread-safe cancellation flag; callbacks run once, on the cancelling thread"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback):
+        """Call callback() on cancellation, immediately if already cancelled"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+class ConversionEngine:
+    """Runs conversion jobs as FFmpeg subprocesses and reports typed events"""
+
+    def __init__(self, ffmpeg_path, max_parallel=1, max_io_jobs_per_device=1,
+                 partial_policy=PARTIAL_DELETE, probe_media=False):
+        self.ffmpeg_path = ffmpeg_path
+        self.max_parallel = max_parallel
+        self.scheduler = IOScheduler(max_io_jobs_per_device)
+        self.partial_policy = partial_policy
+        self.probe_media = probe_media  # probe inputs without job.extra['media'] for sidecar planning
+        self.job_queue = None
+        self.should_stop = False
+        self.paused = False  # paused by the user
+        self.held = False  # held back by an admission controller
+        self.running_jobs = {}  # job_id -> Job
+        self.processes = {}  # job_id -> asyncio.subprocess.Process
+        self._lock = threading.Lock()
+        self._loop = None
+        self._loop_thread = None
+        self._wakeup = None
+        self._events = None
+        self._background = set()  # stop tasks, kept referenced until done
+
+    # -- running ---------------------------------------------------------
+
+    async def run(self, job_queue, token=None):
+        """Run jobs from job_queue until it is drained or stopped, yielding events.
+
+        Jobs added to the queue while running are picked up.
+        """
+        self.job_queue = job_queue
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._wakeup = asyncio.Event()
+        self._events = asyncio.Queue()
+        done = object()
+
+        if token is not None:
+            token.add_callback(self.stop)
+        dispatcher = asyncio.ensure_future(self._dispatch(done))
+        try:
+            while True:
+                event = await self._events.get()
+                if event is done:
+                    break
+                yield event
+        finally:
+            if token is not None:
+                token.remove_callback(self.stop)
+            if not dispatcher.done():
+                # The consumer gave up early: stop FFmpeg rather than leaving it running
+                self.stop()
+                await asyncio.shield(dispatcher)
+            self._loop = None
+
+    async def _dispatch(self, done):
+        # Keep up to max_parallel job tasks running so slots never sit idle
+        tasks = {}
+        try:
+            while True:
+                for job_id, task in list(tasks.items()):
+                    if task.done():
+                        del tasks[job_id]
+
+                if self.should_stop and not tasks:
+                    break
+
+                # Don't start new jobs while paused or held back
+                if not self.should_stop and not self.is_paused() and len(tasks) < self.max_parallel:
+                    with self._lock:
+                        running = list(self.running_jobs.values())
+                    job = self.job_queue.next_job(lambda j: self.scheduler.admits(j, running))
+                    if job is not None:
+                        with self._lock:
+                            self.running_jobs[job.id] = job
+                        tasks[job.id] = asyncio.ensure_future(self._run_job(job))
+                        continue
+                    if not tasks and not self.job_queue.has_pending():
+                        break
+
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), DISPATCH_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks.values(), return_exceptions=True)
+            self._events.put_nowait(done)
+
+    @profiled("engine.build_command")
+    def build_command(self, job):
+        """Build the ffmpeg command line for a job"""
+        codec_settings = job.codec_settings
+        cmd = [self.ffmpeg_path, '-i', job.input_file]
+
+        # Subtitles, chapters and thumbnails come out of the same read of the input
+        sidecars = plan_sidecars(job.extra.get('media'), job.output_file, codec_settings)
+        job.extra['sidecars'] = sidecars.files
+        job.extra['sidecars_kept'] = sidecars.kept
+        if sidecars.filter_complex:
+            cmd.extend(['-filter_complex', sidecars.filter_complex])
+        cmd.extend(sidecars.main_args)
+
+        # Add codec options
+        if codec_settings['video_codec'] != 'copy':
+            cmd.extend(['-c:v', codec_settings['video_codec']])
+            if codec_settings.get('video_bitrate'):
+                # Storage-budget mode: single-pass average bitrate instead of CRF
+                cmd.extend(video_bitrate_args(codec_settings))
+            elif codec_settings.get('crf'):
+                cmd.extend(['-crf', str(codec_settings['crf'])])
+            if codec_settings.get('preset'):
+                cmd.extend(['-preset', codec_settings['preset']])
+            if codec_settings.get('pix_fmt'):
+                cmd.extend(['-pix_fmt', codec_settings['pix_fmt']])
+        else:
+            cmd.extend(['-c:v', 'copy'])
+
+        if codec_settings['audio_codec'] != 'copy':
+            cmd.extend(['-c:a', codec_settings['audio_codec']])
+        else:
+            cmd.extend(['-c:a', 'copy'])
+
+        # Add output file and overwrite option
+        cmd.extend(['-y', job.output_file])
+        for output_args in sidecars.extra_outputs:
+            cmd.extend(output_args)
+        return cmd
+
+    def is_cancelled(self, job):
+        return self.should_stop or job.status == JobStatus.CANCELLED
+
+    async def _run_job(self, job):
+        name = Path(job.input_file).name
+        return_code = None
+        self._emit(JobStarted(job))
+
+        try:
+            if self.probe_media and job.extra.get('media') is None:
+                job.extra['media'] = await self._loop.run_in_executor(
+                    None, probe_file, job.input_file, find_ffprobe(self.ffmpeg_path))
+
+            cmd = self.build_command(job)
+            self._emit(JobOutput(job, f"Command: {' '.join(cmd)}"))
+            for path in job.extra['sidecars_kept']:
+                self._emit(JobOutput(job, f"Keeping existing {Path(path).name}"))
+            # Files already on disk are only cleaned up if this run overwrote them
+            existing = {path: file_signature(path) for path in [job.output_file] + job.extra['sidecars']}
+
+            # stdin lets us ask ffmpeg to quit cleanly
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+            with self._lock:
+                self.processes[job.id] = process
+            self.apply_pause_state()
+            # Cancelled between being dequeued and having a process to stop
+            if self.is_cancelled(job):
+                self.stop_job_process(job)
+
+            # Keep draining output while a stop escalates so ffmpeg never blocks on the pipe
+            duration = None
+            async for line in read_lines(process.stdout):
+                line = line.strip()
+                if not line:
+                    continue
+                with profiler.stage("engine.parse_output"):
+                    self._emit(JobOutput(job, line))
+                    if "Duration:" in line:
+                        duration = parse_duration(line)
+                    progress = parse_progress(line)
+                    if progress is not None:
+                        self._emit(JobProgress(job, progress[0], duration, progress[1], *parse_stats(line)))
+
+            return_code = await process.wait()
+
+            if job.status == JobStatus.CANCELLED or self.should_stop:
+                success, message = False, f"✗ Cancelled: {name}"
+            elif return_code == 0:
+                success, message = True, f"✓ Converted: {name}"
+            else:
+                success, message = False, f"✗ Failed: {name} (Exit code: {return_code})"
+
+            if not success:
+                for path in [job.output_file] + job.extra.get('sidecars', []):
+                    cleanup = cleanup_partial_output(path, self.partial_policy, existing.get(path))
+                    if cleanup:
+                        self._emit(JobOutput(job, cleanup))
+
+        except Exception as e:
+            success, message = False, f"✗ Error: {name} - {str(e)}"
+
+        with self._lock:
+            self.processes.pop(job.id, None)
+            self.running_jobs.pop(job.id, None)
+
+        self.job_queue.finish(job.id, success, message)
+        self._emit(JobFinished(job, success, message, return_code))
+        self.wake()
+
+    # -- thread-safe helpers ---------------------------------------------
+
+    def _emit(self, event):
+        if self._loop is None:
+            return
+        if threading.get_ident() == self._loop_thread:
+            self._events.put_nowait(event)
+        else:
+            self._loop.call_soon_threadsafe(self._events.put_nowait, event)
+
+    def _call_soon(self, callback, *args):
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass  # the loop has already closed
+
+    def wake(self):
+        """Make the dispatcher look at the queue now"""
+        if self._wakeup is not None:
+            self._call_soon(self._wakeup.set)
+
+    # -- control (callable from any thread) ------------------------------
+
+    def stop_job_process(self, job):
+        """Start the quit -> terminate -> kill escalation once per job, without waiting for it"""
+        with self._lock:
+            process = self.processes.get(job.id)
+            if process is None or job.extra.get('stopping'):
+                return
+            job.extra['stopping'] = True
+            # A suspended process can't react to 'q' or terminate()
+            if job.extra.get('suspended'):
+                self.resume_job_process(job, process)
+        self._call_soon(self._start_stop, process)
+
+    def _start_stop(self, process):
+        task = asyncio.ensure_future(stop_process(process))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def is_paused(self):
+        return self.paused or self.held
+
+    def set_paused(self, paused):
+        """Pause or resume by user request"""
+        self.paused = paused
+        self.apply_pause_state()
+
+    def set_held(self, held):
+        """Hold back or release jobs on behalf of an admission controller"""
+        self.held = held
+        self.apply_pause_state()
+
+    def set_limits(self, max_parallel, max_io_jobs_per_device):
+        """Change concurrency limits of a running batch"""
+        self.max_parallel = max_parallel
+        self.scheduler.max_io_jobs_per_device = max_io_jobs_per_device
+        self.wake()
+
+    def running_pids(self):
+        with self._lock:
+            return [p.pid for p in self.processes.values() if p.returncode is None]
+
+    def suspended_job_ids(self):
+        """Running jobs whose ffmpeg is currently suspended by a pause or hold"""
+        with self._lock:
+            return {job_id for job_id, job in self.running_jobs.items() if job.extra.get('suspended')}
+
+    def apply_pause_state(self):
+        """Suspend or resume every running ffmpeg to match the pause flags"""
+        with self._lock:
+            for job_id, process in self.processes.items():
+                job = self.running_jobs.get(job_id)
+                if job is None or process.returncode is not None or job.extra.get('stopping'):
+                    continue
+                suspended = job.extra.get('suspended', False)
+                try:
+                    if self.is_paused() and not suspended:
+                        suspend_process(process.pid)
+                        job.extra['suspended'] = True
+                        job.extra['suspended_at'] = time.monotonic()
+                        self._emit(JobOutput(job, f"Paused: {Path(job.input_file).name}"))
+                    elif not self.is_paused() and suspended:
+                        self.resume_job_process(job, process)
+                        self._emit(JobOutput(job, f"Resumed: {Path(job.input_file).name}"))
+                except Exception as e:
+                    self._emit(JobOutput(job, f"Could not change pause state: {e}"))
+        self.wake()
+
+    def resume_job_process(self, job, process):
+        try:
+            resume_process(process.pid)
+        except Exception:
+            pass
+        job.extra['suspended'] = False
+        # Time spent suspended isn't encode time; the speed history subtracts it
+        suspended_at = job.extra.pop('suspended_at', None)
+        if suspended_at is not None:
+            job.extra['suspended_seconds'] = (job.extra.get('suspended_seconds', 0.0)
+                                              + time.monotonic() - suspended_at)
+
+    def cancel_job(self, job_id):
+        """Cancel one pending or running job without stopping the batch; returns its previous status"""
+        previous = self.job_queue.cancel(job_id)
+        job = self.job_queue.get(job_id)
+        if previous == JobStatus.RUNNING and job is not None:
+            self.stop_job_process(job)
+        return previous
+
+    def stop(self):
+        """Cancel everything; running ffmpeg processes are stopped in the background"""
+        self.should_stop = True
+        if self.job_queue is None:
+            return
+        self.job_queue.cancel_pending()
+        with self._lock:
+            running = list(self.running_jobs.values())
+        for job in running:
+            self.job_queue.cancel(job.id)
+            self.stop_job_process(job)
+        self.wake()
+
+
+async def convert_batch(jobs, ffmpeg_path, codec_settings=None, *, max_parallel=1,
+                        max_io_jobs_per_device=1, partial_policy=PARTIAL_DELETE,
+                        token=None, probe_media=True, preflight=False):
+    """Convert a batch and yield JobStarted/JobOutput/JobProgress/JobFinished events.
+
+    jobs is a JobQueue (which may grow while the batch runs) or an iterable of
+    (input_file, output_file) pairs converted with codec_settings. With
+    preflight, the pending jobs get a short trial encode first; jobs that
+    cannot work are failed (a JobFinished without a return code) before any
+    long conversion starts.
+    """
+    if isinstance(jobs, JobQueue):
+        job_queue = jobs
+    else:
+        job_queue = JobQueue()
+        for input_file, output_file in jobs:
+            job_queue.add(input_file, output_file, codec_settings or DEFAULT_CODEC_SETTINGS)
+
+    if preflight:
+        # Imported here: the preflight module builds its trial commands with this engine
+        from mkv2mp4ui.preflight import ACTION_REJECT, preflight_batch
+        pending = [job for job in job_queue.jobs() if job.status == JobStatus.PENDING]
+        results = await preflight_batch(pending, ffmpeg_path, max_parallel=max(max_parallel, 2),
+                                        probe_media=probe_media)
+        for job in pending:
+            result = results[job.id]
+            if result.action == ACTION_REJECT:
+                message = f"✗ {Path(job.input_file).name}: {result.summary()}"
+                if job_queue.reject(job.id, message):
+                    yield JobFinished(job, False, message)
+            else:
+                job.codec_settings = result.codec_settings
+
+    engine = ConversionEngine(ffmpeg_path, max_parallel, max_io_jobs_per_device, partial_policy,
+                              probe_media=probe_media)
+    async for event in engine.run(job_queue, token):
+        yield event
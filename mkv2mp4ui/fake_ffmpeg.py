@@ -0,0 +1,322 @@
+"""
+Deterministic FFmpeg/FFprobe stand-ins for testing and benchmarking.
+
+Installed as the mkv2mp4ui-fake-ffmpeg and mkv2mp4ui-fake-ffprobe commands,
+so the fake can be used anywhere an ffmpeg path is accepted (find_ffprobe()
+finds the fake ffprobe next to it). It prints a realistic banner, Duration
+and stats lines at a simulated speed, honours 'q' on stdin, and writes a
+small placeholder output that the fake ffprobe can read back.
+
+Behaviour is configured through environment variables, since the app only
+passes real FFmpeg arguments:
+
+    FAKE_FFMPEG_SPEED         encode speed as a multiple of real time (default 50)
+    FAKE_FFMPEG_DURATION      media duration in seconds for real inputs (default 60)
+    FAKE_FFMPEG_STATS_PERIOD  wall seconds between stats lines (default 0.5)
+    FAKE_FFMPEG_BITRATE       output bitrate in kb/s, for sizes and stats (default 2000)
+    FAKE_FFMPEG_MAX_OUTPUT    cap on placeholder output bytes (default 1048576)
+    FAKE_FFMPEG_SEED          seed for speed jitter (default: derived from the input name)
+    FAKE_FFMPEG_FAIL          exit | hang | error | truncate (default: none)
+    FAKE_FFMPEG_FAIL_AT       fraction of the duration where the failure happens (default 0.5)
+    FAKE_FFMPEG_FAIL_MATCH    only fail runs whose command line contains this text
+    FAKE_FFMPEG_EXIT_CODE     exit code for FAIL=exit (default 1)
+    FAKE_FFMPEG_ERROR_TEXT    error message for FAIL=exit (default: a full disk)
+
+Failure modes: 'exit' stops with an error and a nonzero exit code, 'hang'
+stops producing output and ignores 'q' (only terminate/kill end it),
+'error' prints decode errors but finishes normally, and 'truncate' exits 0
+with an output that is shorter than the input, like after a full disk.
+"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+
+
+PLACEHOLDER_MAGIC = b"MKV2MP4UI-FAKE "
+PARTIAL_MAGIC = b"MKV2MP4UI-PARTIAL\n"
+VERSION_LINE = "ffmpeg version 7.1-mkv2mp4ui-fake Copyright (c) 2000-2024 the FFmpeg developers"
+
+ENCODERS = [
+    ("V....D", "libx264", "libx264 H.264 / AVC / MPEG-4 AVC / MPEG-4 part 10 (codec h264)"),
+    ("V....D", "libx265", "libx265 H.265 / HEVC (codec hevc)"),
+    ("A....D", "aac", "AAC (Advanced Audio Coding)"),
+    ("A....D", "libmp3lame", "libmp3lame MP3 (MPEG audio layer 3) (codec mp3)"),
+    ("S.....", "mov_text", "3GPP Timed Text subtitle"),
+]
+MUXERS = [
+    (" E", "mp4", "MP4 (MPEG-4 Part 14)"),
+    (" E", "null", "raw null video"),
+    (" E", "sup", "raw HDMV Presentation Graphic Stream subtitles"),
+    (" E", "srt", "SubRip subtitle"),
+    ("DE", "matroska", "Matroska"),
+]
+
+# Options that take no value; every other '-option' consumes the next argument
+FLAGS = {'-y', '-n', '-nostdin', '-hide_banner', '-stats', '-nostats'}
+QUERIES = {'-version', '-encoders', '-hwaccels', '-muxers'}
+
+
+def env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def parse_args(argv):
+    """Return (options, inputs, outputs) from an ffmpeg-style command line"""
+    options, inputs, outputs = {}, [], []
+    index = 0
+    while index < len(argv):
+        arg = argv[index]
+        if arg in FLAGS or arg in QUERIES:
+            options[arg] = True
+        elif arg == '-i' and index + 1 < len(argv):
+            inputs.append(argv[index + 1])
+            index += 1
+        elif arg.startswith('-') and arg != '-' and index + 1 < len(argv):
+            options[arg] = argv[index + 1]
+            index += 1
+        else:
+            outputs.append(arg)
+        index += 1
+    return options, inputs, outputs
+
+
+def read_placeholder(path):
+    """Metadata stored in a placeholder written by the fake, or None"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.readline()
+    except OSError:
+        return None
+    if not header.startswith(PLACEHOLDER_MAGIC):
+        return None
+    try:
+        return json.loads(header[len(PLACEHOLDER_MAGIC):])
+    except ValueError:
+        return None
+
+
+def source_info(path):
+    """Duration and streams of an input, real or placeholder"""
+    info = read_placeholder(path)
+    if info is not None:
+        return info
+    return {
+        'duration': env_float('FAKE_FFMPEG_DURATION', 60.0),
+        'streams': [
+            {'codec_type': 'video', 'codec_name': 'h264', 'width': 1920, 'height': 1080},
+            {'codec_type': 'audio', 'codec_name': 'ac3', 'bit_rate': '384000'},
+            {'codec_type': 'subtitle', 'codec_name': 'subrip'},
+        ],
+    }
+
+
+def format_timestamp(seconds):
+    hours, rest = divmod(max(0.0, seconds), 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{secs:05.2f}"
+
+
+def print_query(options):
+    if '-version' in options:
+        print(VERSION_LINE)
+        print("configuration: --enable-gpl --enable-libx264 --enable-libx265")
+    elif '-encoders' in options:
+        print("Encoders:\n V..... = Video\n A..... = Audio\n S..... = Subtitle\n ------")
+        for flags, name, description in ENCODERS:
+            print(f" {flags} {name:<20} {description}")
+    elif '-muxers' in options:
+        print("File formats:\n D. = Demuxing supported\n .E = Muxing supported\n --")
+        for flags, name, description in MUXERS:
+            print(f" {flags} {name:<15} {description}")
+    elif '-hwaccels' in options:
+        print("Hardware acceleration methods:")
+    return 0
+
+
+class StdinQuit:
+    """Watches stdin for FFmpeg's 'q' command"""
+
+    def __init__(self, enabled):
+        self.event = threading.Event()
+        if enabled and sys.stdin is not None:
+            threading.Thread(target=self._watch, daemon=True).start()
+
+    def _watch(self):
+        try:
+            while True:
+                char = sys.stdin.read(1)
+                if not char:
+                    return
+                if char == 'q':
+                    self.event.set()
+                    return
+        except (OSError, ValueError):
+            return
+
+    def requested(self):
+        return self.event.is_set()
+
+
+def write_placeholder(path, info, size):
+    """Write the metadata line, padded with zeros to roughly the given size"""
+    header = PLACEHOLDER_MAGIC + json.dumps(info).encode() + b"\n"
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(b"\0" * max(0, size - len(header)))
+
+
+def grow_file(path, size):
+    """Extend a partial output to size bytes, as an encode in progress would"""
+    try:
+        with open(path, 'ab') as f:
+            missing = size - f.tell()
+            if missing > 0:
+                f.write(b"\0" * missing)
+    except OSError:
+        pass
+
+
+def ffmpeg_main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    options, inputs, outputs = parse_args(argv)
+    if QUERIES & options.keys():
+        return print_query(options)
+    if not inputs:
+        print("Output file #0 does not contain any stream", file=sys.stderr)
+        return 1
+
+    err = sys.stderr
+    input_file = inputs[0]
+    # The first output is the MP4; any further ones are sidecars from the same run
+    files = [o for o in outputs if o != '-']
+    output_file = files[0] if files else None
+    if not os.path.exists(input_file):
+        print(f"{input_file}: No such file or directory", file=err)
+        return 1
+
+    info = source_info(input_file)
+    start = float(options.get('-ss', 0) or 0)
+    duration = max(0.0, info['duration'] - start)
+    if '-t' in options:
+        duration = min(duration, float(options['-t']))
+
+    speed = env_float('FAKE_FFMPEG_SPEED', 50.0)
+    period = env_float('FAKE_FFMPEG_STATS_PERIOD', 0.5)
+    bitrate = env_float('FAKE_FFMPEG_BITRATE', 2000.0)
+    max_output = int(env_float('FAKE_FFMPEG_MAX_OUTPUT', 1024 * 1024))
+    seed = os.environ.get('FAKE_FFMPEG_SEED') or zlib.crc32(os.path.basename(input_file).encode())
+    rng = random.Random(seed)
+
+    match = os.environ.get('FAKE_FFMPEG_FAIL_MATCH', '')
+    fail = os.environ.get('FAKE_FFMPEG_FAIL', '') if match in " ".join(argv) else ''
+    fail_at = duration * env_float('FAKE_FFMPEG_FAIL_AT', 0.5)
+
+    # -v error (as used by verification) leaves only error messages
+    quiet = options.get('-v', options.get('-loglevel')) in ('quiet', 'panic', 'fatal', 'error')
+
+    def log(text, end="\n", error=False):
+        if error or not quiet:
+            err.write(text + end)
+            err.flush()
+
+    if '-hide_banner' not in options:
+        log(VERSION_LINE)
+    log(f"Input #0, matroska,webm, from '{input_file}':")
+    log(f"  Duration: {format_timestamp(info['duration'])}, start: 0.000000, bitrate: {bitrate:.0f} kb/s")
+    for index, stream in enumerate(info['streams']):
+        log(f"  Stream #0:{index}: {stream['codec_type'].capitalize()}: {stream['codec_name']}")
+    writing = output_file is not None
+    for number, path in enumerate(files):
+        log(f"Output #{number}, {'mp4' if number == 0 else 'sidecar'}, to '{path}':")
+        # Like a real MP4 without its moov atom, the partial file cannot be probed
+        with open(path, 'wb') as f:
+            f.write(PARTIAL_MAGIC)
+    log("Press [q] to stop, [?] for help")
+
+    quit_request = StdinQuit('-nostdin' not in options)
+    fps = 23.976
+    position = 0.0
+    errors_printed = False
+    while position < duration:
+        if quit_request.requested():
+            log("\n[q] command received. Exiting.")
+            break
+        # Short clips (e.g. sampled verification decodes) finish within one period
+        wait = min(period, (duration - position) / speed) if speed > 0 else period
+        time.sleep(wait)
+        position = min(duration, position + wait * speed * rng.uniform(0.8, 1.2))
+
+        if fail and position >= fail_at:
+            if fail == 'hang':
+                while True:  # only terminate/kill ends this
+                    time.sleep(3600)
+            if fail == 'exit':
+                log("\n" + os.environ.get('FAKE_FFMPEG_ERROR_TEXT',
+                                          "[vost#0:0/libx264 @ 0x55d0c0a1e2c0] Error submitting a packet "
+                                          "to the muxer: No space left on device"), error=True)
+                return int(env_float('FAKE_FFMPEG_EXIT_CODE', 1))
+            if fail == 'truncate':
+                duration = position
+            if fail == 'error' and not errors_printed:
+                log("\n[h264 @ 0x55d0c0a1f040] error while decoding MB 73 41, bytestream -7", error=True)
+                log("[h264 @ 0x55d0c0a1f040] concealing 1620 DC, 1620 AC, 1620 MV errors in P frame",
+                    error=True)
+                errors_printed = True
+
+        if writing:
+            grow_file(output_file, min(max_output, int(position * bitrate * 1000 / 8)))
+        current_speed = speed * rng.uniform(0.9, 1.1)
+        log(f"frame={int(position * fps):5d} fps={fps * current_speed:4.0f} q=28.0 "
+            f"size={int(position * bitrate / 8):8d}KiB time={format_timestamp(position)} "
+            f"bitrate={bitrate:6.1f}kbits/s speed={current_speed:.3g}x", end="\r")
+
+    if writing:
+        output_info = {'duration': round(position, 2), 'streams': info['streams']}
+        write_placeholder(output_file, output_info, min(max_output, int(position * bitrate * 1000 / 8)))
+        for path in files[1:]:
+            write_placeholder(path, {'duration': 0.0, 'streams': []}, 0)
+    log(f"\n[out#0/mp4 @ 0x55d0c0a1d100] video:{int(position * bitrate * 0.9 / 8)}KiB "
+        f"audio:{int(position * bitrate * 0.1 / 8)}KiB muxing overhead: 0.231112%")
+    return 0
+
+
+def ffprobe_main(argv=None):
+    """Minimal ffprobe: JSON format/streams for the last argument"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Simple multimedia streams analyzer", file=sys.stderr)
+        return 1
+    path = argv[-1]
+    if not os.path.exists(path):
+        print(f"{path}: No such file or directory", file=sys.stderr)
+        return 1
+    with open(path, 'rb') as f:
+        if f.read(len(PARTIAL_MAGIC)) == PARTIAL_MAGIC:
+            print(f"[mov,mp4,m4a,3gp,3g2,mj2 @ 0x55d0c0a1d100] moov atom not found\n"
+                  f"{path}: Invalid data found when processing input", file=sys.stderr)
+            return 1
+    info = source_info(path)
+    size = os.path.getsize(path)
+    duration = info['duration']
+    streams = [dict(stream, index=index) for index, stream in enumerate(info['streams'])]
+    print(json.dumps({
+        'streams': streams,
+        'format': {
+            'filename': path,
+            'duration': f"{duration:.6f}",
+            'size': str(size),
+            'bit_rate': str(int(size * 8 / duration)) if duration else "0",
+        },
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(ffmpeg_main())
@@ -1,9 +1,15 @@
 import os
 import sys
+import json
 import shutil
+import hashlib
+import http.client
+import threading
+import urllib.error
 import urllib.request
 import zipfile
-import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 import requests
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QLabel, QPushButton,
                              QProgressBar, QMessageBox, QCheckBox,
@@ -11,75 +17,383 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QLabel, QPushButton,
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 
 
+FFMPEG_URL = "https://github.com/BtbN/FFmpeg-Builds/releases/download/latest/ffmpeg-master-latest-win64-gpl-shared.zip"
+FFMPEG_CHECKSUM_URL = "https://github.com/BtbN/FFmpeg-Builds/releases/download/latest/checksums.sha256"
+
+
+class DownloadError(Exception):
+    """Raised when a download cannot be completed or fails verification"""
+
+
+class DownloadCancelled(DownloadError):
+    pass
+
+
+def default_cache_dir():
+    """Directory used to keep downloaded archives for reuse.
+
+    Set MKV2MP4UI_CACHE_DIR to share one cache (e.g. a network drive) across machines.
+    """
+    override = os.environ.get("MKV2MP4UI_CACHE_DIR")
+    if override:
+        return Path(override)
+    if sys.platform == "win32" and os.environ.get("LOCALAPPDATA"):
+        return Path(os.environ["LOCALAPPDATA"]) / "mkv2mp4ui" / "cache"
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "mkv2mp4ui"
+
+
+def sha256_file(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RangeDownloader:
+    """Download a file in parallel byte ranges with resume and SHA-256 verification.
+
+    Partial segments and a small state file are kept next to the target in
+    cache_dir, so an interrupted download continues where it stopped. A
+    verified archive is reused from the cache on later runs.
+    """
+
+    CHUNK_SIZE = 256 * 1024
+
+    def __init__(self, url, cache_dir=None, segments=4, expected_sha256=None,
+                 checksum_url=None, progress_callback=None, timeout=30):
+        self.url = url
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.segments = max(1, segments)
+        self.expected_sha256 = expected_sha256.lower() if expected_sha256 else None
+        self.checksum_url = checksum_url
+        self.progress_callback = progress_callback
+        self.timeout = timeout
+
+        self.filename = os.path.basename(urllib.request.urlparse(url).path) or "download.bin"
+        self.target = self.cache_dir / self.filename
+        self.state_path = self.cache_dir / (self.filename + ".part.json")
+        self.checksum_path = self.cache_dir / (self.filename + ".sha256")
+
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._done = 0
+        self._total = 0
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def download(self):
+        """Return the path of the verified archive, downloading it if needed"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        expected = self.expected_sha256 or self.fetch_expected_checksum()
+
+        cached = self.cached_archive(expected)
+        if cached:
+            return cached
+
+        size, ranges_supported, validator = self.probe()
+        state = self.load_state(size, validator)
+        if state is None:
+            self.discard_parts()
+            state = self.new_state(size, ranges_supported, validator)
+            self.save_state(state)
+
+        self._total = size or 0
+        self._done = sum(self.part_size(i) for i in range(len(state['segments'])))
+        self.report_progress()
+
+        with ThreadPoolExecutor(max_workers=len(state['segments'])) as pool:
+            futures = [pool.submit(self.fetch_segment, index, start, end, state['ranges'])
+                       for index, (start, end) in enumerate(state['segments'])]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                # Stop the other segments too; what they have so far is kept for resuming
+                self._cancelled.set()
+                raise
+
+        return self.assemble(state, expected)
+
+    def cached_archive(self, expected):
+        """Return the cached archive if it is complete and matches its checksum"""
+        if not self.target.exists():
+            return None
+        wanted = expected or self.recorded_checksum()
+        if wanted and sha256_file(self.target) == wanted:
+            return str(self.target)
+        # Stale or unverifiable cache entry
+        self.target.unlink()
+        return None
+
+    def recorded_checksum(self):
+        """SHA-256 recorded when the cached archive was verified, or None"""
+        try:
+            return self.checksum_path.read_text(encoding="utf-8").split()[0].lower()
+        except (OSError, IndexError):
+            return None
+
+    def fetch_expected_checksum(self):
+        """Look up the archive's SHA-256 in a checksums file, if one was given.
+
+        A configured checksums file that can't be read, or doesn't list the
+        archive, fails the download rather than skipping verification. When it
+        can't be reached but a verified archive is cached, the checksum recorded
+        for that archive is used instead, so an offline machine keeps working.
+        """
+        if not self.checksum_url:
+            return None
+        try:
+            with urllib.request.urlopen(self.checksum_url, timeout=self.timeout) as response:
+                text = response.read().decode("utf-8", errors="replace")
+        except (urllib.error.URLError, OSError) as e:
+            recorded = self.recorded_checksum()
+            if recorded and self.target.exists():
+                return recorded
+            raise DownloadError(f"Cannot read the checksums from {self.checksum_url}: {e}")
+        for line in text.splitlines():
+            parts = line.split()
+            if len(parts) >= 2 and parts[-1].lstrip('*') == self.filename:
+                return parts[0].lower()
+        raise DownloadError(f"{self.checksum_url} has no checksum for {self.filename}")
+
+    def probe(self):
+        """Return (size, supports_ranges, validator) for the remote file"""
+        request = urllib.request.Request(self.url, method="HEAD")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                headers = response.headers
+        except (urllib.error.URLError, OSError) as e:
+            raise DownloadError(f"Cannot reach {self.url}: {e}")
+        length = headers.get("Content-Length")
+        size = int(length) if length and length.isdigit() else None
+        ranges = headers.get("Accept-Ranges", "").lower() == "bytes" and size is not None
+        validator = headers.get("ETag") or headers.get("Last-Modified") or ""
+        return size, ranges, validator
+
+    def new_state(self, size, ranges_supported, validator):
+        if not ranges_supported or size < self.segments * self.CHUNK_SIZE:
+            ranges_supported = ranges_supported and bool(size)
+            segments = [(0, size - 1 if size else None)]
+        else:
+            step = size // self.segments
+            segments = [(i * step, size - 1 if i == self.segments - 1 else (i + 1) * step - 1)
+                        for i in range(self.segments)]
+        return {'url': self.url, 'size': size, 'validator': validator,
+                'ranges': ranges_supported, 'segments': segments}
+
+    def load_state(self, size, validator):
+        """Return saved state if it still describes the same remote file"""
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if state.get('url') != self.url or state.get('size') != size or state.get('validator') != validator:
+            return None
+        if not state.get('ranges'):
+            return None  # a single stream without range support cannot resume
+        return state
+
+    def save_state(self, state):
+        self.state_path.write_text(json.dumps(state), encoding="utf-8")
+
+    def part_path(self, index):
+        return self.cache_dir / f"{self.filename}.part{index}"
+
+    def part_size(self, index):
+        try:
+            return self.part_path(index).stat().st_size
+        except OSError:
+            return 0
+
+    def discard_parts(self):
+        for path in self.cache_dir.glob(self.filename + ".part*"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def fetch_segment(self, index, start, end, ranged):
+        """Download one byte range, appending to any partial data already on disk"""
+        part = self.part_path(index)
+        have = self.part_size(index) if ranged else 0
+        if end is not None and start + have > end:
+            return
+
+        request = urllib.request.Request(self.url)
+        if ranged:
+            request.add_header("Range", f"bytes={start + have}-{end}")
+
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                if ranged and response.status != 206:
+                    raise DownloadError(f"Server ignored the byte range for segment {index}")
+                with open(part, 'ab' if have else 'wb') as f:
+                    self.copy_stream(response, f)
+        except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+            raise DownloadError(f"Segment {index} failed: {e}")
+
+        if end is not None and self.part_size(index) != end - start + 1:
+            raise DownloadError(f"Segment {index} is incomplete")
+
+    def copy_stream(self, response, f):
+        while True:
+            if self._cancelled.is_set():
+                raise DownloadCancelled("Download cancelled")
+            chunk = response.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            f.write(chunk)
+            with self._lock:
+                self._done += len(chunk)
+            self.report_progress()
+
+    def assemble(self, state, expected):
+        """Join the parts, verify the checksum and move the result into the cache"""
+        temp_path = self.cache_dir / (self.filename + ".tmp")
+        digest = hashlib.sha256()
+        with open(temp_path, 'wb') as out:
+            for index in range(len(state['segments'])):
+                with open(self.part_path(index), 'rb') as part:
+                    for chunk in iter(lambda: part.read(1024 * 1024), b''):
+                        digest.update(chunk)
+                        out.write(chunk)
+
+        actual = digest.hexdigest()
+        if expected and actual != expected:
+            temp_path.unlink()
+            self.discard_parts()
+            raise DownloadError(f"Checksum mismatch for {self.filename}: expected {expected}, got {actual}")
+
+        os.replace(temp_path, self.target)
+        self.checksum_path.write_text(f"{actual}  {self.filename}\n", encoding="utf-8")
+        self.discard_parts()
+        return str(self.target)
+
+    def report_progress(self):
+        if self.progress_callback:
+            self.progress_callback(self._done, self._total)
+
+
 class DownloadThread(QThread):
     """Thread for downloading files without blocking UI"""
     progress_updated = pyqtSignal(int)
     download_complete = pyqtSignal(str)
     download_error = pyqtSignal(str)
+    download_cancelled = pyqtSignal()
 
-    def __init__(self, url, destination):
+    def __init__(self, url, destination, checksum_url=None, cache_dir=None):
         super().__init__()
         self.url = url
         self.destination = destination
+        self.downloader = RangeDownloader(url, cache_dir=cache_dir, checksum_url=checksum_url,
+                                          progress_callback=self.progress_callback)
+        self.last_percent = -1
+
+    def progress_callback(self, done, total):
+        if not total:
+            return
+        percent = int(done * 100 / total)
+        if percent != self.last_percent:
+            self.last_percent = percent
+            self.progress_updated.emit(percent)
 
     def run(self):
         try:
-            # Create a temporary file for download
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.zip')
-            temp_file.close()
-
-            def progress_callback(count, block_size, total_size):
-                percent = int(count * block_size * 100 / total_size)
-                self.progress_updated.emit(percent)
+            # Reuses a verified cached archive or resumes a partial download
+            archive_path = self.downloader.download()
 
-            # Download the file
-            urllib.request.urlretrieve(self.url, temp_file.name, progress_callback)
-
-            # Signal completion with temp file path
-            self.download_complete.emit(temp_file.name)
+            # Signal completion with the cached archive path
+            self.download_complete.emit(archive_path)
 
+        except DownloadCancelled:
+            self.download_cancelled.emit()
         except Exception as e:
             self.download_error.emit(str(e))
 
+    def cancel(self):
+        self.downloader.cancel()
+
+
+FFMPEG_BINARIES = ("ffmpeg.exe", "ffplay.exe", "ffprobe.exe", "ffmpeg", "ffplay", "ffprobe")
+
+
+def is_install_member(info):
+    """True for archive members the application actually needs: executables and shared libraries"""
+    if info.is_dir():
+        return False
+    name = info.filename.rsplit('/', 1)[-1]
+    if name in FFMPEG_BINARIES:
+        return True
+    return name.endswith('.dll') or name.endswith('.so') or '.so.' in name
+
 
 class ExtractThread(QThread):
-    """Thread for extracting ZIP files without blocking UI"""
+    """Thread that installs the FFmpeg binaries and libraries from a ZIP without blocking UI.
+
+    Only the needed members are read, straight from the archive index, and
+    written flat into the install directory.
+    """
     progress_updated = pyqtSignal(int)
-    extraction_complete = pyqtSignal()
+    extraction_complete = pyqtSignal(list)  # installed file paths
     extraction_error = pyqtSignal(str)
 
-    def __init__(self, zip_path, extract_to):
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, zip_path, extract_to, delete_archive=False):
         super().__init__()
         self.zip_path = zip_path
         self.extract_to = extract_to
+        self.delete_archive = delete_archive
 
     def run(self):
         try:
-            # Open the zip file
+            installed = []
             with zipfile.ZipFile(self.zip_path, 'r') as zip_ref:
-                # Get total file count for progress
-                total_files = len(zip_ref.infolist())
-                extracted = 0
-
-                # Extract each file
-                for file in zip_ref.infolist():
-                    extracted += 1
-                    percent = int(extracted * 100 / total_files)
-                    self.progress_updated.emit(percent)
-
-                    # Extract the file
-                    zip_ref.extract(file, self.extract_to)
-
-            self.extraction_complete.emit()
+                members = [info for info in zip_ref.infolist() if is_install_member(info)]
+                names = {info.filename.rsplit('/', 1)[-1] for info in members}
+                if not names & {"ffmpeg.exe", "ffmpeg"}:
+                    raise FileNotFoundError("The archive does not contain an ffmpeg executable")
+
+                # Progress is reported by uncompressed bytes written
+                total_bytes = sum(info.file_size for info in members) or 1
+                written = 0
+                last_percent = -1
+
+                os.makedirs(self.extract_to, exist_ok=True)
+                for info in members:
+                    name = info.filename.rsplit('/', 1)[-1]
+                    dst_path = os.path.join(self.extract_to, name)
+                    temp_path = dst_path + ".partial"
+
+                    with zip_ref.open(info) as src, open(temp_path, 'wb') as dst:
+                        for chunk in iter(lambda: src.read(self.CHUNK_SIZE), b''):
+                            dst.write(chunk)
+                            written += len(chunk)
+                            percent = int(written * 100 / total_bytes)
+                            if percent != last_percent:
+                                last_percent = percent
+                                self.progress_updated.emit(percent)
+
+                    # Keep the executable bit from archives built on Unix
+                    mode = info.external_attr >> 16
+                    if mode:
+                        os.chmod(temp_path, mode & 0o777)
+                    os.replace(temp_path, dst_path)
+                    installed.append(dst_path)
+
+            self.extraction_complete.emit(installed)
 
         except Exception as e:
             self.extraction_error.emit(str(e))
         finally:
-            # Clean up the temp zip file
-            try:
-                os.unlink(self.zip_path)
-            except:
-                pass
+            # Clean up the zip file unless it lives in the download cache
+            if self.delete_archive:
+                try:
+                    os.unlink(self.zip_path)
+                except:
+                    pass
 
 
 class FFmpegPromptDialog(QDialog):
@@ -202,20 +516,36 @@ class FFmpegPromptDialog(QDialog):
         self.progress_bar.setValue(0)
         self.progress_bar.setVisible(True)
         self.download_button.setEnabled(False)
-        self.skip_button.setEnabled(False)
+        self.skip_button.setText("Cancel")
         self.download_checkbox.setEnabled(False)
 
         # Start download thread
         # Use current working directory instead of script directory
         self.download_thread = DownloadThread(
-            "https://github.com/BtbN/FFmpeg-Builds/releases/download/latest/ffmpeg-master-latest-win64-gpl-shared.zip",
-            os.getcwd()
+            FFMPEG_URL,
+            os.getcwd(),
+            checksum_url=FFMPEG_CHECKSUM_URL
         )
         self.download_thread.progress_updated.connect(self.update_download_progress)
         self.download_thread.download_complete.connect(self.handle_download_complete)
         self.download_thread.download_error.connect(self.handle_download_error)
+        self.download_thread.download_cancelled.connect(self.reset_after_download)
         self.download_thread.start()
 
+    def reject(self):
+        """Skip, Cancel, Esc or closing the window: stop a running download first"""
+        download_thread = getattr(self, 'download_thread', None)
+        if download_thread is not None and download_thread.isRunning():
+            # Stops every range worker; the partial download is kept for resuming
+            self.status_label.setText("Cancelling download...")
+            download_thread.cancel()
+            download_thread.wait()
+            return
+        extract_thread = getattr(self, 'extract_thread', None)
+        if extract_thread is not None and extract_thread.isRunning():
+            extract_thread.wait()
+        super().reject()
+
     def update_download_progress(self, percent):
         self.progress_bar.setValue(percent)
 
@@ -223,6 +553,7 @@ class FFmpegPromptDialog(QDialog):
         # Update UI for extraction
         self.status_label.setText("Extracting FFmpeg...")
         self.progress_bar.setValue(0)
+        self.skip_button.setEnabled(False)
 
         # Start extraction thread
         # Use current working directory instead of script directory
@@ -238,45 +569,10 @@ class FFmpegPromptDialog(QDialog):
     def update_extract_progress(self, percent):
         self.progress_bar.setValue(percent)
 
-    def handle_extraction_complete(self):
-        # Move required files if they're in a subfolder
-        self.status_label.setText("Finalizing installation...")
-
-        app_dir = os.getcwd()
-
-        # Find the bin directory that contains the executables
-        bin_dir = None
-        for root, dirs, files in os.walk(app_dir):
-            if "ffmpeg.exe" in files:
-                bin_dir = root
-                break
-
-        # If bin directory found and it's not the app directory, move files
-        if bin_dir and bin_dir != app_dir:
-            # 1. Copy executables
-            for exe_file in ["ffmpeg.exe", "ffplay.exe", "ffprobe.exe"]:
-                src_path = os.path.join(bin_dir, exe_file)
-                dst_path = os.path.join(app_dir, exe_file)
-
-                if os.path.exists(src_path):
-                    # If destination already exists, replace it
-                    if os.path.exists(dst_path):
-                        os.unlink(dst_path)
-                    shutil.copy2(src_path, dst_path)  # Using copy instead of move
-
-            # 2. Find and copy required DLLs
-            for root, dirs, files in os.walk(os.path.dirname(bin_dir)):
-                for file in files:
-                    if file.endswith('.dll') or file.endswith('.dll.a'):
-                        src_path = os.path.join(root, file)
-                        dst_path = os.path.join(app_dir, file)
-
-                        # Copy DLL if it doesn't already exist
-                        if not os.path.exists(dst_path):
-                            shutil.copy2(src_path, dst_path)
-
+    def handle_extraction_complete(self, installed):
+        # ExtractThread already wrote the binaries and DLLs into the install directory
         # Update UI to show success
-        self.status_label.setText("FFmpeg successfully installed!")
+        self.status_label.setText(f"FFmpeg successfully installed! ({len(installed)} files)")
         self.download_button.setText("Continue")
         self.download_button.setEnabled(True)
         self.skip_button.setVisible(False)
@@ -291,9 +587,14 @@ class FFmpegPromptDialog(QDialog):
             "Download Error",
             f"Failed to download FFmpeg: {error_msg}\n\nPlease try downloading manually."
         )
+        self.reset_after_download()
+
+    def reset_after_download(self):
+        """Return to the initial state after a failed or cancelled download"""
         self.status_label.setVisible(False)
         self.progress_bar.setVisible(False)
         self.download_button.setEnabled(True)
+        self.skip_button.setText("Continue Without FFmpeg")
         self.skip_button.setEnabled(True)
         self.download_checkbox.setEnabled(True)
 
@@ -304,11 +605,7 @@ class FFmpegPromptDialog(QDialog):
             "Extraction Error",
             f"Failed to extract FFmpeg: {error_msg}\n\nPlease try downloading manually."
         )
-        self.status_label.setVisible(False)
-        self.progress_bar.setVisible(False)
-        self.download_button.setEnabled(True)
-        self.skip_button.setEnabled(True)
-        self.download_checkbox.setEnabled(True)
+        self.reset_after_download()
 
 
 def check_ffmpeg():
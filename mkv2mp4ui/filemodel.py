@@ -0,0 +1,288 @@
+"""
+Model/view classes for the source file list.
+
+FileTableModel keeps one lightweight row per file and maintains the checked
+count incrementally, so large libraries don't need a full recount on every
+checkbox toggle. FileFilterProxyModel adds sorting and simple filter
+expressions such as "hevc >10GB" or "video:h264 duration>1h", parsed with
+the same comparisons and units as the encode rules.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+
+from PyQt6.QtCore import (QAbstractTableModel, QModelIndex, QSortFilterProxyModel,
+                          Qt, pyqtSignal)
+
+from mkv2mp4ui.planner import format_bytes, format_duration
+from mkv2mp4ui.profiling import profiled
+from mkv2mp4ui.rules import compare, parse_comparison
+
+
+SORT_ROLE = Qt.ItemDataRole.UserRole + 1
+
+
+@dataclass
+class FileEntry:
+    """One row of the file table"""
+    path: str
+    size: int = 0
+    checked: bool = True
+    media: object = None  # planner.MediaInfo once probed
+    status: str = ""
+    plan: object = None  # rules.FilePlan with the settings this file will be encoded with
+    estimate: object = None  # planner.JobEstimate from the last Plan/Start
+
+
+class FileTableModel(QAbstractTableModel):
+    checked_count_changed = pyqtSignal(int)
+
+    COLUMNS = ["Name", "Size", "Duration", "Video", "Audio", "Plan", "Estimate", "Status"]
+    NAME, SIZE, DURATION, VIDEO, AUDIO, PLAN, ESTIMATE, STATUS = range(8)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.entries = []
+        self.row_for_path = {}
+        self.checked_count = 0
+        self.plan_for_entry = None  # entry -> rules.FilePlan, see set_plan_function()
+
+    # Qt model interface
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def flags(self, index):
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if index.column() == self.NAME:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entries[index.row()]
+        column = index.column()
+        media = entry.media
+
+        if role == Qt.ItemDataRole.CheckStateRole and column == self.NAME:
+            return Qt.CheckState.Checked if entry.checked else Qt.CheckState.Unchecked
+
+        if role == Qt.ItemDataRole.ToolTipRole and column == self.NAME:
+            return entry.path
+
+        if role == Qt.ItemDataRole.ToolTipRole and column == self.PLAN and entry.plan:
+            if not entry.plan.rules:
+                return "Global settings (no rule matched)"
+            return "Matched rules:\n" + "\n".join(entry.plan.rules)
+
+        if role == Qt.ItemDataRole.ToolTipRole and column == self.ESTIMATE and entry.estimate:
+            if entry.estimate.seconds is None:
+                return "Not estimated: the file could not be probed"
+            source = "speed history" if entry.estimate.from_history else "default speeds"
+            return f"Estimated wall time and output size, from {source}"
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.NAME:
+                return Path(entry.path).name
+            if column == self.SIZE:
+                return format_bytes(entry.size)
+            if column == self.DURATION:
+                return format_duration(media.duration) if media and media.duration else ""
+            if column == self.VIDEO:
+                if media and media.video_codec:
+                    return f"{media.video_codec} {media.width or '?'}x{media.height or '?'}"
+                return ""
+            if column == self.AUDIO:
+                return (media.audio_codec or "") if media else ""
+            if column == self.PLAN:
+                return entry.plan.summary() if entry.plan else ""
+            if column == self.ESTIMATE:
+                estimate = entry.estimate
+                if estimate is None or estimate.seconds is None:
+                    return ""
+                return f"~{format_duration(estimate.seconds)}, {format_bytes(estimate.output_bytes or 0)}"
+            if column == self.STATUS:
+                return entry.status
+
+        if role == SORT_ROLE:
+            if column == self.NAME:
+                return Path(entry.path).name.lower()
+            if column == self.SIZE:
+                return entry.size
+            if column == self.DURATION:
+                return (media.duration or 0.0) if media else -1.0
+            if column == self.VIDEO:
+                return f"{media.video_codec or ''}{(media.height or 0):06d}" if media else ""
+            if column == self.AUDIO:
+                return (media.audio_codec or "") if media else ""
+            if column == self.PLAN:
+                return entry.plan.summary() if entry.plan else ""
+            if column == self.ESTIMATE:
+                return (entry.estimate.seconds or 0.0) if entry.estimate else -1.0
+            if column == self.STATUS:
+                return entry.status
+
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.CheckStateRole or index.column() != self.NAME:
+            return False
+        checked = Qt.CheckState(value) == Qt.CheckState.Checked
+        entry = self.entries[index.row()]
+        if entry.checked != checked:
+            entry.checked = checked
+            self.checked_count += 1 if checked else -1
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+            self.checked_count_changed.emit(self.checked_count)
+        return True
+
+    # Bulk operations
+
+    def set_files(self, paths_and_sizes):
+        """Replace all rows with (path, size) pairs, all checked"""
+        self.beginResetModel()
+        self.entries = [FileEntry(path, size) for path, size in paths_and_sizes]
+        if self.plan_for_entry:
+            for entry in self.entries:
+                entry.plan = self.plan_for_entry(entry)
+        self.row_for_path = {entry.path: row for row, entry in enumerate(self.entries)}
+        self.checked_count = len(self.entries)
+        self.endResetModel()
+        self.checked_count_changed.emit(self.checked_count)
+
+    def set_rows_checked(self, rows, checked):
+        """Check or uncheck many rows with a single change notification"""
+        changed = 0
+        for row in rows:
+            entry = self.entries[row]
+            if entry.checked != checked:
+                entry.checked = checked
+                changed += 1
+        if changed:
+            self.checked_count += changed if checked else -changed
+            self.dataChanged.emit(self.index(0, self.NAME), self.index(len(self.entries) - 1, self.NAME),
+                                  [Qt.ItemDataRole.CheckStateRole])
+            self.checked_count_changed.emit(self.checked_count)
+
+    def checked_paths(self):
+        return [entry.path for entry in self.entries if entry.checked]
+
+    @profiled("slot.update_media")
+    def update_media(self, media_by_path):
+        """Attach probe results; emits one change for the affected row span"""
+        rows = []
+        for path, media in media_by_path.items():
+            row = self.row_for_path.get(path)
+            if row is not None:
+                entry = self.entries[row]
+                entry.media = media
+                if self.plan_for_entry:
+                    # Rules on resolution, codec or bitrate can only match once probed
+                    entry.plan = self.plan_for_entry(entry)
+                rows.append(row)
+        if rows:
+            self.dataChanged.emit(self.index(min(rows), self.DURATION),
+                                  self.index(max(rows), self.PLAN))
+
+    def update_estimates(self, estimates):
+        """Attach planner.JobEstimates; emits one change for the affected row span"""
+        rows = []
+        for estimate in estimates:
+            row = self.row_for_path.get(estimate.input_file)
+            if row is not None:
+                self.entries[row].estimate = estimate
+                rows.append(row)
+        if rows:
+            self.dataChanged.emit(self.index(min(rows), self.ESTIMATE), self.index(max(rows), self.ESTIMATE))
+
+    def set_plan_function(self, plan_for_entry):
+        """Set how encode plans are computed (entry -> FilePlan) and refresh every row"""
+        self.plan_for_entry = plan_for_entry
+        if not self.entries:
+            return
+        for entry in self.entries:
+            entry.plan = plan_for_entry(entry)
+        self.dataChanged.emit(self.index(0, self.PLAN), self.index(len(self.entries) - 1, self.PLAN))
+
+    def set_status(self, path, status):
+        row = self.row_for_path.get(path)
+        if row is None or self.entries[row].status == status:
+            return
+        self.entries[row].status = status
+        index = self.index(row, self.STATUS)
+        self.dataChanged.emit(index, index)
+
+
+class FileFilterProxyModel(QSortFilterProxyModel):
+    """Sorting plus whitespace-separated filter terms that must all match.
+
+    Terms: a comparison such as ">10GB", "size<700mb", "duration>1h", "height>=2160"; a
+    field match such as "video:hevc", "audio:aac", "plan:x265",
+    "status:failed"; or a bare word matched against the name, codecs and status.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(SORT_ROLE)
+        self.terms = []
+
+    def set_filter_text(self, text):
+        self.terms = [self.parse_term(token) for token in text.lower().split()]
+        self.invalidateRowsFilter()
+
+    @staticmethod
+    def parse_term(token):
+        try:
+            comparison = parse_comparison(token, infer_field=True)
+        except ValueError:
+            comparison = None  # unknown unit: match it as a plain word
+        if comparison is not None:
+            return comparison
+        if ':' in token:
+            field, _, value = token.partition(':')
+            if field in ('video', 'audio', 'plan', 'status', 'name'):
+                return (field, ':', value)
+        return ('any', ':', token)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self.terms:
+            return True
+        entry = self.sourceModel().entries[source_row]
+        media = entry.media
+        video = ((media.video_codec or '') if media else '').lower()
+        audio = ((media.audio_codec or '') if media else '').lower()
+        name = Path(entry.path).name.lower()
+        status = entry.status.lower()
+
+        for field, op, value in self.terms:
+            if field == 'size':
+                ok = compare(entry.size, op, value)
+            elif field in ('duration', 'height', 'width', 'bitrate'):
+                actual = getattr(media, 'bit_rate' if field == 'bitrate' else field, None) if media else None
+                ok = compare(actual, op, value)
+            elif field == 'video':
+                ok = value in video
+            elif field == 'audio':
+                ok = value in audio
+            elif field == 'plan':
+                ok = entry.plan is not None and value in entry.plan.summary().lower()
+            elif field == 'status':
+                ok = value in status
+            elif field == 'name':
+                ok = value in name
+            else:
+                ok = value in name or value in video or value in audio or value in status
+            if not ok:
+                return False
+        return True
+
+    def visible_source_rows(self):
+        return [self.mapToSource(self.index(row, 0)).row() for row in range(self.rowCount())]
@@ -0,0 +1,177 @@
+"""
+Thread-safe job queue shared between the GUI and the conversion worker.
+
+The GUI can add, reorder, reprioritise and cancel jobs while the worker is
+pulling from the queue, so a running batch never has to be stopped to change it.
+"""
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+
+
+class JobStatus:
+    PENDING = "Pending"
+    RUNNING = "Running"
+    DONE = "Done"
+    FAILED = "Failed"
+    CANCELLED = "Cancelled"
+
+    FINISHED = (DONE, FAILED, CANCELLED)
+
+
+@dataclass
+class Job:
+    """One input/output conversion with the settings captured when it was queued"""
+    id: int
+    input_file: str
+    output_file: str
+    codec_settings: dict
+    priority: int = 0
+    status: str = JobStatus.PENDING
+    message: str = ""
+    extra: dict = field(default_factory=dict)
+
+
+class JobQueue:
+    """Priority-ordered job queue; higher priority runs first, then insertion order"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._jobs = {}
+        self._pending = []  # job ids in queue order
+        self._active = Counter()  # input file -> number of pending or running jobs
+        self._next_id = 0
+
+    def add(self, input_file, output_file, codec_settings, priority=0):
+        with self._lock:
+            job = Job(self._next_id, input_file, output_file, dict(codec_settings), priority)
+            self._next_id += 1
+            self._jobs[job.id] = job
+            self._pending.append(job.id)
+            self._active[input_file] += 1
+            return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        """All jobs: running first, then pending in run order, then finished"""
+        with self._lock:
+            running = [j for j in self._jobs.values() if j.status == JobStatus.RUNNING]
+            pending = [self._jobs[i] for i in self._ordered_pending()]
+            finished = [j for j in self._jobs.values() if j.status in JobStatus.FINISHED]
+            return running + pending + finished
+
+    def _ordered_pending(self):
+        # Stable sort keeps manual ordering within the same priority
+        return sorted(self._pending, key=lambda i: -self._jobs[i].priority)
+
+    def next_job(self, accept=None):
+        """Pop the first pending job that accept(job) allows, mark it running, or return None"""
+        with self._lock:
+            for job_id in self._ordered_pending():
+                job = self._jobs[job_id]
+                if accept is None or accept(job):
+                    self._pending.remove(job_id)
+                    job.status = JobStatus.RUNNING
+                    return job
+            return None
+
+    def finish(self, job_id, success, message=""):
+        with self._lock:
+            job = self._jobs[job_id]
+            if job.status != JobStatus.CANCELLED:
+                self._release(job)
+                job.status = JobStatus.DONE if success else JobStatus.FAILED
+            job.message = message
+
+    def _release(self, job):
+        """Drop a job that is leaving the pending/running states from the active set"""
+        if job.status in (JobStatus.PENDING, JobStatus.RUNNING):
+            self._active[job.input_file] -= 1
+            if self._active[job.input_file] <= 0:
+                del self._active[job.input_file]
+
+    def has_pending(self):
+        with self._lock:
+            return bool(self._pending)
+
+    def is_queued(self, input_file):
+        """True if the file is already pending or running"""
+        with self._lock:
+            return input_file in self._active
+
+    def move(self, job_id, offset):
+        """Move a pending job up (negative) or down (positive) in the queue"""
+        with self._lock:
+            ordered = self._ordered_pending()
+            if job_id not in ordered:
+                return False
+            index = ordered.index(job_id)
+            new_index = max(0, min(len(ordered) - 1, index + offset))
+            if new_index == index:
+                return False
+            neighbour = self._jobs[ordered[new_index]]
+            job = self._jobs[job_id]
+            # Moving past a job with a different priority takes on its priority
+            job.priority = neighbour.priority
+            ordered.remove(job_id)
+            ordered.insert(new_index, job_id)
+            self._pending = ordered
+            return True
+
+    def set_priority(self, job_id, priority):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JobStatus.PENDING:
+                return False
+            job.priority = priority
+            return True
+
+    def update_settings(self, job_id, **changes):
+        """Change codec settings of a job that hasn't started yet"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JobStatus.PENDING:
+                return False
+            job.codec_settings = dict(job.codec_settings, **changes)
+            return True
+
+    def cancel(self, job_id):
+        """Cancel a pending or running job; returns its previous status or None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in JobStatus.FINISHED:
+                return None
+            previous = job.status
+            if job_id in self._pending:
+                self._pending.remove(job_id)
+            self._release(job)
+            job.status = JobStatus.CANCELLED
+            job.message = "Cancelled"
+            return previous
+
+    def reject(self, job_id, message):
+        """Fail a pending job before it starts (e.g. after a failed preflight)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job_id not in self._pending:
+                return False
+            self._pending.remove(job_id)
+            self._release(job)
+            job.status = JobStatus.FAILED
+            job.message = message
+            return True
+
+    def cancel_pending(self):
+        """Cancel every pending job, leaving running jobs alone"""
+        with self._lock:
+            for job_id in list(self._pending):
+                self.cancel(job_id)
+
+    def counts(self):
+        """(finished, total) job counts for progress display"""
+        with self._lock:
+            finished = sum(1 for j in self._jobs.values() if j.status in JobStatus.FINISHED)
+            return finished, len(self._jobs)
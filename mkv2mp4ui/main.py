@@ -1,130 +1,328 @@
 import sys
 import os
+import asyncio
 import threading
 from pathlib import Path
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout,
                              QWidget, QPushButton, QLabel, QListWidget, QListWidgetItem,
                              QProgressBar, QTextEdit, QFileDialog, QCheckBox, QGroupBox,
-                             QSpinBox, QComboBox, QMessageBox, QSplitter, QDialog)
-from PyQt6.QtCore import QThread, pyqtSignal, Qt, QTimer, QSettings
+                             QSpinBox, QComboBox, QMessageBox, QSplitter, QDialog,
+                             QTableView, QLineEdit, QHeaderView, QAbstractItemView,
+                             QDoubleSpinBox, QPlainTextEdit, QDialogButtonBox)
+from PyQt6.QtCore import QThread, QObject, pyqtSignal, Qt, QTimer, QSettings
 from PyQt6.QtGui import QFont, QIcon
 import ffmpeg
 import subprocess
 import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 # Import our FFmpeg downloader utility
 from mkv2mp4ui.ffmpeg_downloader import check_ffmpeg, FFmpegPromptDialog
+from mkv2mp4ui.planner import SpeedHistory, plan_batch, find_ffprobe, probe_file
+from mkv2mp4ui.jobqueue import Job, JobQueue, JobStatus
+from mkv2mp4ui.filemodel import FileTableModel, FileFilterProxyModel
+from mkv2mp4ui.registry import FFmpegRegistry, query_capabilities
+from mkv2mp4ui.throttle import AdmissionController, ThrottleSettings, parse_windows, unavailable_checks
+from mkv2mp4ui.cancellation import PARTIAL_DELETE, PARTIAL_QUARANTINE
+from mkv2mp4ui.engine import ConversionEngine, JobStarted, JobOutput, JobProgress, JobFinished
+from mkv2mp4ui.verify import verify_output, VerificationResult, TIER_OFF, TIER_QUICK, TIER_SAMPLED, TIER_FULL, TIER_NAMES
+from mkv2mp4ui.report import BatchReport
+from mkv2mp4ui.profiling import profiler, profiled, parse_profile_args
+from mkv2mp4ui.rules import parse_rules, plan_file
+from mkv2mp4ui.timeseries import MetricsRecorder
+from mkv2mp4ui.charts import PerformancePanel
+from mkv2mp4ui.preflight import preflight_batch, ACTION_OK, ACTION_FIXED, ACTION_REJECT
+from mkv2mp4ui.budget import BudgetTracker, BUDGET_TOTAL, BUDGET_PER_HOUR, apply_budget
+from mkv2mp4ui.sidecars import (SUBS_EMBED, SUBS_SRT, SUBS_BOTH, SUBS_NONE,
+                               THUMB_NONE, THUMB_POSTER, THUMB_SHEET, THUMB_BOTH)
+
+FFMPEG_ENV = "MKV2MP4UI_FFMPEG"  # use this ffmpeg (e.g. mkv2mp4ui-fake-ffmpeg) instead of searching
+
+
+class ProbeWorker(QThread):
+    """Probe scanned files in the background and hand results over in batches"""
+    probed = pyqtSignal(object)  # dict of path -> MediaInfo
+
+    BATCH_INTERVAL = 0.5  # seconds between batched updates
+
+    def __init__(self, paths, ffprobe_path, probe_cache):
+        super().__init__()
+        self.paths = paths
+        self.ffprobe_path = ffprobe_path
+        self.probe_cache = probe_cache
+        self.should_stop = False
 
+    def run(self):
+        batch = {}
+        last_emit = time.monotonic()
+        for path in self.paths:
+            if self.should_stop:
+                return
+            if path in self.probe_cache:
+                continue
+            media = probe_file(path, self.ffprobe_path)
+            if media is not None:
+                self.probe_cache[path] = media
+                batch[path] = media
+            if batch and time.monotonic() - last_emit >= self.BATCH_INTERVAL:
+                self.probed.emit(batch)
+                batch = {}
+                last_emit = time.monotonic()
+        if batch:
+            self.probed.emit(batch)
 
+    def stop(self):
+        self.should_stop = True
 
-class ConversionWorker(QThread):
-    progress_updated = pyqtSignal(int, str)  # file_index, status_message
-    conversion_complete = pyqtSignal(int, bool, str)  # file_index, success, message
-    ffmpeg_output = pyqtSignal(str)  # FFmpeg output line
-    all_complete = pyqtSignal()
 
-    def __init__(self, files_to_convert, output_folder, codec_settings, ffmpeg_path):
+class PlanWorker(QThread):
+    """Probe files and build a BatchPlan without blocking the UI"""
+    plan_ready = pyqtSignal(object)  # BatchPlan
+
+    def __init__(self, files, codec_settings, history, ffprobe_path, probe_cache, rules=None, max_parallel=1):
         super().__init__()
-        self.files_to_convert = files_to_convert
-        self.output_folder = output_folder
+        self.files = files
         self.codec_settings = codec_settings
-        self.ffmpeg_path = ffmpeg_path
+        self.history = history
+        self.ffprobe_path = ffprobe_path
+        self.probe_cache = probe_cache
+        self.rules = rules
+        self.max_parallel = max_parallel
         self.should_stop = False
-        self.current_process = None
 
     def run(self):
-        for i, (input_file, output_file) in enumerate(self.files_to_convert):
-            if self.should_stop:
-                break
+        plan = plan_batch(self.files, self.codec_settings, self.history,
+                          self.ffprobe_path, self.probe_cache, self.rules,
+                          should_stop=lambda: self.should_stop, max_parallel=self.max_parallel)
+        if plan is not None:
+            self.plan_ready.emit(plan)
+
+    def stop(self):
+        self.should_stop = True
+
+
+class EncodeRulesDialog(QDialog):
+    """Edit the per-file encode rules, validating them as they are typed"""
+
+    EXAMPLE = ("# <conditions> => <settings>; every matching rule applies, later ones win\n"
+               "# height<=576 => preset=veryfast crf=22\n"
+               "# height>=2160 size>20GB => video=libx265 crf=24 preset=slow\n"
+               "# height>1080 => max_height=1080\n"
+               "# path:*/anime/* => crf=20\n")
+
+    def __init__(self, text, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Encode Rules")
+        self.resize(640, 360)
+        layout = QVBoxLayout(self)
+
+        help_label = QLabel("Conditions: height, width, size, duration, bitrate comparisons (e.g. size>20GB, "
+                            "bitrate<8mbps), video:/audio: codecs, path:/name: globs, * for all files.\n"
+                            "Settings: video, audio, crf, preset, max_height (downscale), pix_fmt.")
+        help_label.setWordWrap(True)
+        layout.addWidget(help_label)
+
+        self.editor = QPlainTextEdit(text or self.EXAMPLE)
+        self.editor.setFont(QFont("monospace"))
+        self.editor.textChanged.connect(self.validate)
+        layout.addWidget(self.editor)
 
-            self.progress_updated.emit(i, f"Converting: {Path(input_file).name}")
+        self.error_label = QLabel()
+        self.error_label.setStyleSheet("color: #d9534f;")
+        layout.addWidget(self.error_label)
 
+        self.buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        layout.addWidget(self.buttons)
+        self.validate()
+
+    def text(self):
+        return self.editor.toPlainText()
+
+    def validate(self):
+        try:
+            rules = parse_rules(self.text())
+        except ValueError as e:
+            self.error_label.setText(str(e))
+            self.buttons.button(QDialogButtonBox.StandardButton.Ok).setEnabled(False)
+            return
+        self.error_label.setText(f"{len(rules)} rules")
+        self.buttons.button(QDialogButtonBox.StandardButton.Ok).setEnabled(True)
+
+
+class PreflightWorker(QThread):
+    """Trial-convert the start of each file before the batch is queued"""
+    preflight_done = pyqtSignal(object)  # dict of job id -> PreflightResult
+
+    def __init__(self, jobs, ffmpeg_path, max_parallel):
+        super().__init__()
+        self.jobs = jobs
+        self.ffmpeg_path = ffmpeg_path
+        self.max_parallel = max_parallel
+        self.loop = None
+        self.task = None
+        self.cancelled = False
+
+    def run(self):
+        asyncio.run(self.run_batch())
+
+    async def run_batch(self):
+        self.loop = asyncio.get_running_loop()
+        # Probe like the real conversion does, so trials map the same streams
+        self.task = asyncio.ensure_future(
+            preflight_batch(self.jobs, self.ffmpeg_path, self.max_parallel, probe_media=True))
+        if self.cancelled:
+            self.task.cancel()
+        try:
+            results = await self.task
+        except asyncio.CancelledError:
+            return
+        self.preflight_done.emit(results)
+
+    def cancel(self):
+        """Abandon the trials and kill their FFmpeg processes; callable from the GUI thread"""
+        self.cancelled = True
+        loop, task = self.loop, self.task
+        if loop is not None and task is not None:
             try:
-                # Build ffmpeg command manually for better control
-                cmd = [self.ffmpeg_path, '-i', input_file]
-
-                # Add codec options
-                if self.codec_settings['video_codec'] != 'copy':
-                    cmd.extend(['-c:v', self.codec_settings['video_codec']])
-                    if self.codec_settings['crf']:
-                        cmd.extend(['-crf', str(self.codec_settings['crf'])])
-                    if self.codec_settings['preset']:
-                        cmd.extend(['-preset', self.codec_settings['preset']])
-                else:
-                    cmd.extend(['-c:v', 'copy'])
-
-                if self.codec_settings['audio_codec'] != 'copy':
-                    cmd.extend(['-c:a', self.codec_settings['audio_codec']])
-                else:
-                    cmd.extend(['-c:a', 'copy'])
-
-                # Add output file and overwrite option
-                cmd.extend(['-y', output_file])
-
-                # Log the command being executed
-                self.ffmpeg_output.emit(f"Command: {' '.join(cmd)}")
-
-                # Run FFmpeg with real-time output capture
-                self.current_process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,  # Redirect stderr to stdout
-                    universal_newlines=True,
-                    bufsize=1
-                )
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # the loop has already closed
+
+
+class Verifier(QObject):
+    """Verifies finished outputs in a small thread pool so conversions keep running"""
+    verified = pyqtSignal(int, object)  # job_id, VerificationResult
+
+    def __init__(self, max_workers=2, parent=None):
+        super().__init__(parent)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="verify")
+        self.pending = 0  # only touched from the GUI thread
+
+    def submit(self, job, ffmpeg_path, tier):
+        self.pending += 1
+        source = job.extra.get('media')
+        future = self.executor.submit(verify_output, source, job.output_file, ffmpeg_path,
+                                      find_ffprobe(ffmpeg_path), tier)
+        # The signal is queued back to the GUI thread
+        future.add_done_callback(lambda f: self.verified.emit(job.id, self._result(f, tier)))
+
+    @staticmethod
+    def _result(future, tier):
+        try:
+            return future.result()
+        except Exception as e:
+            result = VerificationResult(tier)
+            result.fail(f"verification error: {e}")
+            return result
+
+    def is_idle(self):
+        return self.pending == 0
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
-                # Stream output in real-time
-                while True:
-                    if self.should_stop:
-                        if self.current_process:
-                            self.current_process.terminate()
-                        break
-
-                    output = self.current_process.stdout.readline()
-                    if output == '' and self.current_process.poll() is not None:
-                        break
-                    if output:
-                        # Clean up the output line and emit it
-                        clean_output = output.strip()
-                        if clean_output:
-                            self.ffmpeg_output.emit(clean_output)
-
-                # Wait for process to complete
-                return_code = self.current_process.wait()
-
-                if return_code == 0 and not self.should_stop:
-                    self.conversion_complete.emit(i, True, f"✓ Converted: {Path(input_file).name}")
-                else:
-                    self.conversion_complete.emit(i, False,
-                                                  f"✗ Failed: {Path(input_file).name} (Exit code: {return_code})")
-
-            except Exception as e:
-                self.conversion_complete.emit(i, False, f"✗ Error: {Path(input_file).name} - {str(e)}")
 
+class ConversionWorker(QThread):
+    """Runs the asyncio ConversionEngine in its own thread and relays its events as signals"""
+    progress_updated = pyqtSignal(int, str)  # job_id, status_message
+    conversion_complete = pyqtSignal(int, bool, str)  # job_id, success, message
+    ffmpeg_output = pyqtSignal(int, str)  # job_id, FFmpeg output line
+    job_progress = pyqtSignal(int, object)  # job_id, JobProgress
+    all_complete = pyqtSignal()
+
+    def __init__(self, job_queue, ffmpeg_path, partial_policy=PARTIAL_DELETE,
+                 max_parallel=1, max_io_jobs_per_device=1):
+        super().__init__()
+        self.job_queue = job_queue
+        self.engine = ConversionEngine(ffmpeg_path, max_parallel, max_io_jobs_per_device, partial_policy)
+
+    def run(self):
+        asyncio.run(self.relay_events())
         self.all_complete.emit()
 
+    async def relay_events(self):
+        async for event in self.engine.run(self.job_queue):
+            with profiler.stage("worker.relay_event"):
+                self.relay_event(event)
+
+    def relay_event(self, event):
+        job_id = event.job.id
+        if isinstance(event, JobOutput):
+            self.ffmpeg_output.emit(job_id, event.line)
+        elif isinstance(event, JobProgress):
+            self.job_progress.emit(job_id, event)
+        elif isinstance(event, JobStarted):
+            self.progress_updated.emit(job_id, f"Converting: {Path(event.job.input_file).name}")
+        elif isinstance(event, JobFinished):
+            self.conversion_complete.emit(job_id, event.success, event.message)
+
+    @property
+    def max_parallel(self):
+        return self.engine.max_parallel
+
+    @property
+    def running_jobs(self):
+        return self.engine.running_jobs
+
+    @property
+    def held(self):
+        return self.engine.held
+
+    # Control is thread-safe in the engine, so the GUI thread calls straight through
+    def set_paused(self, paused):
+        self.engine.set_paused(paused)
+
+    def set_held(self, held):
+        self.engine.set_held(held)
+
+    def set_limits(self, max_parallel, max_io_jobs_per_device):
+        self.engine.set_limits(max_parallel, max_io_jobs_per_device)
+
+    def running_pids(self):
+        return self.engine.running_pids()
+
+    def suspended_job_ids(self):
+        return self.engine.suspended_job_ids()
+
+    def cancel_job(self, job_id):
+        return self.engine.cancel_job(job_id)
+
     def stop(self):
-        self.should_stop = True
-        if self.current_process:
-            try:
-                self.current_process.terminate()
-                self.current_process.wait(timeout=5)  # Wait up to 5 seconds
-            except subprocess.TimeoutExpired:
-                self.current_process.kill()  # Force kill if it doesn't terminate gracefully
-            except Exception:
-                pass
+        self.engine.stop()
 
 
 class MKVConverterGUI(QMainWindow):
-    def __init__(self):
+    def __init__(self, settings=None):
         super().__init__()
-        self.mkv_files = []
         self.conversion_worker = None
+        self.probe_worker = None
         self.ffmpeg_path = None
         self.output_folder = None
-        self.total_duration_seconds = None  # Store total duration for ETA calculation
-
-        # Initialize QSettings for persistent configuration
-        self.settings = QSettings("MKVConverter", "MKVtoMP4")
+        self.plan_worker = None
+        self.preflight_worker = None
+        self.conversion_active = False
+        self.close_when_stopped = False
+        self.media_info = {}  # path -> MediaInfo, filled by the planner
+        self.encode_rules_text = ""
+        self.encode_rules = []  # parsed rules.Rule list applied on top of the global settings
+        self.speed_history = SpeedHistory()
+        self.ffmpeg_registry = FFmpegRegistry()
+        self.admission_controller = AdmissionController()
+        self.job_start_times = {}  # job_id -> time.monotonic() when the job started
+        self.metrics = MetricsRecorder()  # fps/speed/bitrate/size history for the performance panel
+        self.budget_tracker = None  # budget.BudgetTracker of the running batch in storage-budget mode
+        self.job_queue = JobQueue()
+        self.verifier = Verifier(parent=self)
+        self.verifier.verified.connect(self.verification_complete)
+        self.batch_started_at = None
+        self.batch_first_job_id = 0
+        self.report_pending = False  # write the batch report once verification drains
+
+        # Initialize QSettings for persistent configuration (benchmarks and tests pass their own)
+        self.settings = settings if settings is not None else QSettings("MKVConverter", "MKVtoMP4")
 
         # Initialize UI first
         self.initUI()
@@ -135,6 +333,11 @@ class MKVConverterGUI(QMainWindow):
         # Then check for FFmpeg and offer to download if needed
         self.check_and_setup_ffmpeg()
 
+        # Files restored from the last session could not be probed before FFmpeg was found
+        if self.ffmpeg_path and self.file_model.rowCount():
+            self.start_probe_worker([entry.path for entry in self.file_model.entries])
+        self.update_file_count()
+
     def find_ffmpeg(self):
         """Find FFmpeg executable, prioritizing local installation"""
         # First check if ffmpeg.exe is in the same directory as the script
@@ -172,7 +375,69 @@ class MKVConverterGUI(QMainWindow):
 
         return None
 
+    @profiled("startup.ffmpeg_check")
     def check_and_setup_ffmpeg(self):
+        """Use the cached FFmpeg if its binary is unchanged, otherwise locate and register one"""
+        if os.environ.get(FFMPEG_ENV) and self.use_ffmpeg_override(os.environ[FFMPEG_ENV]):
+            return True
+
+        cached = self.ffmpeg_registry.current()
+        if cached:
+            # Same binary as last time: no PATH lookups or capability queries needed
+            self.ffmpeg_path = cached.path
+            self.apply_ffmpeg_capabilities(cached)
+            self.log(f"FFmpeg found: {self.ffmpeg_path} ({cached.version or 'unknown version'})")
+            self.log("MKV to MP4 Converter ready. Select a folder to begin.")
+            return True
+
+        found = self.locate_ffmpeg()
+        if found:
+            self.register_ffmpeg()
+        return found
+
+    def use_ffmpeg_override(self, command):
+        """Use the ffmpeg named by --ffmpeg / MKV2MP4UI_FFMPEG, without replacing the cached one"""
+        path = shutil.which(command)
+        if not path:
+            self.log(f"{FFMPEG_ENV}: {command} not found, searching for FFmpeg instead")
+            return False
+        self.ffmpeg_path = path
+        try:
+            self.apply_ffmpeg_capabilities(query_capabilities(path))
+        except (OSError, subprocess.SubprocessError) as e:
+            self.log(f"Could not query FFmpeg capabilities: {e}")
+        self.log(f"FFmpeg override: {self.ffmpeg_path}")
+        self.log("MKV to MP4 Converter ready. Select a folder to begin.")
+        return True
+
+    def register_ffmpeg(self):
+        """Query the resolved binary's capabilities once and persist them"""
+        try:
+            capabilities = self.ffmpeg_registry.register(self.ffmpeg_path)
+        except (OSError, subprocess.SubprocessError) as e:
+            self.log(f"Could not query FFmpeg capabilities: {e}")
+            return
+        self.settings.setValue("ffmpeg_registry", self.ffmpeg_registry.to_json())
+        self.apply_ffmpeg_capabilities(capabilities)
+        self.log(f"FFmpeg version: {capabilities.version or 'unknown'}")
+        if capabilities.hwaccels:
+            self.log(f"Hardware acceleration methods: {', '.join(capabilities.hwaccels)}")
+
+    def apply_ffmpeg_capabilities(self, capabilities):
+        """Offer only the codecs the installed FFmpeg build actually provides"""
+        if not capabilities.encoders:
+            return  # query output not understood; keep the default choices
+        for combo, choices in ((self.video_codec_combo, capabilities.video_codecs()),
+                               (self.audio_codec_combo, capabilities.audio_codecs())):
+            current = combo.currentText()
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItems(choices)
+            if current in choices:
+                combo.setCurrentText(current)
+            combo.blockSignals(False)
+
+    def locate_ffmpeg(self):
         """Check for FFmpeg and handle download if needed"""
         # Use the check_ffmpeg function from ffmpeg_downloader module
         if check_ffmpeg():
@@ -206,6 +471,7 @@ class MKVConverterGUI(QMainWindow):
             self.log("Please install FFmpeg manually or restart the application to try the download again.")
             return False
 
+    @profiled("settings.load")
     def load_settings(self):
         """Load saved settings from QSettings"""
         # Load conversion settings
@@ -213,6 +479,8 @@ class MKVConverterGUI(QMainWindow):
         audio_codec = self.settings.value("audio_codec", "aac")
         crf_value = self.settings.value("crf", 23, type=int)
         preset = self.settings.value("preset", "medium")
+        self.speed_history = SpeedHistory.from_json(self.settings.value("speed_history", ""))
+        self.ffmpeg_registry = FFmpegRegistry.from_json(self.settings.value("ffmpeg_registry", ""))
 
         # Apply saved settings to UI components
         video_index = self.video_codec_combo.findText(video_codec)
@@ -229,6 +497,33 @@ class MKVConverterGUI(QMainWindow):
         if preset_index >= 0:
             self.preset_combo.setCurrentIndex(preset_index)
 
+        self.quarantine_cb.setChecked(self.settings.value("quarantine_partial", False, type=bool))
+        self.verify_combo.setCurrentIndex(self.settings.value("verify_tier", TIER_QUICK, type=int))
+        self.preflight_cb.setChecked(self.settings.value("preflight", False, type=bool))
+        self.set_encode_rules(self.settings.value("encode_rules", ""))
+        subtitles_index = self.subtitles_combo.findData(self.settings.value("subtitles", SUBS_EMBED))
+        if subtitles_index >= 0:
+            self.subtitles_combo.setCurrentIndex(subtitles_index)
+        self.image_subtitles_cb.setChecked(self.settings.value("image_subtitles", True, type=bool))
+        self.chapters_cb.setChecked(self.settings.value("chapters", True, type=bool))
+        thumbnails_index = self.thumbnails_combo.findData(self.settings.value("thumbnails", THUMB_NONE))
+        if thumbnails_index >= 0:
+            self.thumbnails_combo.setCurrentIndex(thumbnails_index)
+        self.parallel_spinbox.setValue(self.settings.value("max_parallel", 1, type=int))
+        self.io_per_device_spinbox.setValue(self.settings.value("max_io_per_device", 1, type=int))
+
+        self.throttle_cb.setChecked(self.settings.value("throttle_enabled", False, type=bool))
+        self.max_cpu_spinbox.setValue(self.settings.value("throttle_max_cpu", 50, type=int))
+        self.max_load_spinbox.setValue(self.settings.value("throttle_max_load", 1.0, type=float))
+        self.min_memory_spinbox.setValue(self.settings.value("throttle_min_memory", 1024, type=int))
+        self.full_speed_edit.setText(self.settings.value("throttle_full_speed_hours", ""))
+
+        self.budget_cb.setChecked(self.settings.value("budget_enabled", False, type=bool))
+        self.budget_spinbox.setValue(self.settings.value("budget_size", 50.0, type=float))
+        budget_index = self.budget_mode_combo.findData(self.settings.value("budget_mode", BUDGET_TOTAL))
+        if budget_index >= 0:
+            self.budget_mode_combo.setCurrentIndex(budget_index)
+
         # Load window geometry and state
         geometry = self.settings.value("geometry")
         if geometry:
@@ -254,6 +549,7 @@ class MKVConverterGUI(QMainWindow):
 
         self.log("Settings loaded from previous session")
 
+    @profiled("settings.save")
     def save_settings(self):
         """Save current settings to QSettings"""
         # Save conversion settings
@@ -261,6 +557,23 @@ class MKVConverterGUI(QMainWindow):
         self.settings.setValue("audio_codec", self.audio_codec_combo.currentText())
         self.settings.setValue("crf", self.crf_spinbox.value())
         self.settings.setValue("preset", self.preset_combo.currentText())
+        self.settings.setValue("quarantine_partial", self.quarantine_cb.isChecked())
+        self.settings.setValue("verify_tier", self.verify_combo.currentIndex())
+        self.settings.setValue("preflight", self.preflight_cb.isChecked())
+        self.settings.setValue("subtitles", self.subtitles_combo.currentData())
+        self.settings.setValue("image_subtitles", self.image_subtitles_cb.isChecked())
+        self.settings.setValue("chapters", self.chapters_cb.isChecked())
+        self.settings.setValue("thumbnails", self.thumbnails_combo.currentData())
+        self.settings.setValue("max_parallel", self.parallel_spinbox.value())
+        self.settings.setValue("max_io_per_device", self.io_per_device_spinbox.value())
+        self.settings.setValue("throttle_enabled", self.throttle_cb.isChecked())
+        self.settings.setValue("throttle_max_cpu", self.max_cpu_spinbox.value())
+        self.settings.setValue("throttle_max_load", self.max_load_spinbox.value())
+        self.settings.setValue("throttle_min_memory", self.min_memory_spinbox.value())
+        self.settings.setValue("throttle_full_speed_hours", self.full_speed_edit.text())
+        self.settings.setValue("budget_enabled", self.budget_cb.isChecked())
+        self.settings.setValue("budget_size", self.budget_spinbox.value())
+        self.settings.setValue("budget_mode", self.budget_mode_combo.currentData())
 
         # Save window geometry and state
         self.settings.setValue("geometry", self.saveGeometry())
@@ -279,7 +592,10 @@ class MKVConverterGUI(QMainWindow):
     def closeEvent(self, event):
         """Override closeEvent to save settings before closing"""
         # Stop any running conversion
-        if self.conversion_worker and self.conversion_worker.isRunning():
+        if self.conversion_active:
+            if self.close_when_stopped:
+                event.ignore()
+                return
             reply = QMessageBox.question(
                 self, "Conversion in Progress",
                 "A conversion is currently running. Do you want to stop it and exit?",
@@ -287,13 +603,23 @@ class MKVConverterGUI(QMainWindow):
                 QMessageBox.StandardButton.No
             )
             if reply == QMessageBox.StandardButton.Yes:
+                # Stopping happens in the background; close once the worker reports back
+                self.close_when_stopped = True
                 self.stop_conversion()
-                # Wait a moment for the worker to stop
-                if self.conversion_worker:
-                    self.conversion_worker.wait(3000)  # Wait up to 3 seconds
-            else:
-                event.ignore()
-                return
+                self.log("The window will close as soon as FFmpeg has exited")
+            event.ignore()
+            return
+
+        if self.probe_worker:
+            self.probe_worker.stop()
+            self.probe_worker.wait()
+        if self.plan_worker:
+            self.plan_worker.stop()
+            self.plan_worker.wait()
+        if self.preflight_worker:
+            self.preflight_worker.cancel()
+            self.preflight_worker.wait()
+        self.verifier.shutdown()
 
         # Save settings before closing
         self.save_settings()
@@ -302,6 +628,7 @@ class MKVConverterGUI(QMainWindow):
         # Accept the close event
         event.accept()
 
+    @profiled("startup.init_ui")
     def initUI(self):
         self.setWindowTitle("MKV to MP4 Batch Converter")
         self.setGeometry(100, 100, 900, 700)
@@ -384,9 +711,156 @@ class MKVConverterGUI(QMainWindow):
         self.preset_combo.currentTextChanged.connect(self.on_settings_changed)
         settings_layout.addWidget(self.preset_combo)
 
+        # Partial outputs of cancelled or failed jobs
+        self.quarantine_cb = QCheckBox("Quarantine partial outputs")
+        self.quarantine_cb.setToolTip("Move unfinished MP4s into a .partial folder instead of deleting them")
+        self.quarantine_cb.toggled.connect(self.on_settings_changed)
+        settings_layout.addWidget(self.quarantine_cb)
+
+        # Post-conversion verification; full decodes are only run on demand from the queue
+        settings_layout.addWidget(QLabel("Verify:"))
+        self.verify_combo = QComboBox()
+        self.verify_combo.addItems([TIER_NAMES[t] for t in (TIER_OFF, TIER_QUICK, TIER_SAMPLED)])
+        self.verify_combo.setToolTip("Quick: compare duration and streams with the source\n"
+                                     "Sampled: also decode a few seconds at several points")
+        self.verify_combo.currentIndexChanged.connect(self.on_settings_changed)
+        settings_layout.addWidget(self.verify_combo)
+
+        # Short trial encodes that catch doomed jobs before hours are spent on them
+        self.preflight_cb = QCheckBox("Preflight")
+        self.preflight_cb.setToolTip("Trial-convert the first seconds of each file before starting.\n"
+                                     "Fixable problems (e.g. a stream MP4 cannot hold) switch that job\n"
+                                     "to transcoding; files that cannot be converted are skipped.")
+        self.preflight_cb.toggled.connect(self.on_settings_changed)
+        settings_layout.addWidget(self.preflight_cb)
+
+        # Per-file overrides of the settings above, shown in the Plan column
+        self.rules_btn = QPushButton("Rules...")
+        self.rules_btn.setToolTip("Choose settings per file by resolution, codec, bitrate, size or path")
+        self.rules_btn.clicked.connect(self.edit_encode_rules)
+        settings_layout.addWidget(self.rules_btn)
+
         settings_layout.addStretch()
         top_layout.addWidget(settings_group)
 
+        # Sidecar outputs written during the same FFmpeg run
+        extras_group = QGroupBox("Subtitles, Chapters and Thumbnails")
+        extras_layout = QHBoxLayout(extras_group)
+
+        extras_layout.addWidget(QLabel("Text subtitles:"))
+        self.subtitles_combo = QComboBox()
+        for label, mode in (("Embed (mov_text)", SUBS_EMBED), ("Sidecar SRT", SUBS_SRT),
+                            ("Embed + SRT", SUBS_BOTH), ("Drop", SUBS_NONE)):
+            self.subtitles_combo.addItem(label, mode)
+        self.subtitles_combo.currentIndexChanged.connect(self.on_settings_changed)
+        extras_layout.addWidget(self.subtitles_combo)
+
+        self.image_subtitles_cb = QCheckBox("Extract image subtitles")
+        self.image_subtitles_cb.setChecked(True)
+        self.image_subtitles_cb.setToolTip("MP4 cannot hold PGS/VobSub subtitles; save them as .sup/.mks files")
+        self.image_subtitles_cb.toggled.connect(self.on_settings_changed)
+        extras_layout.addWidget(self.image_subtitles_cb)
+
+        self.chapters_cb = QCheckBox("Keep chapters")
+        self.chapters_cb.setChecked(True)
+        self.chapters_cb.toggled.connect(self.on_settings_changed)
+        extras_layout.addWidget(self.chapters_cb)
+
+        extras_layout.addWidget(QLabel("Thumbnails:"))
+        self.thumbnails_combo = QComboBox()
+        for label, mode in (("None", THUMB_NONE), ("Poster", THUMB_POSTER),
+                            ("Contact sheet", THUMB_SHEET), ("Poster + sheet", THUMB_BOTH)):
+            self.thumbnails_combo.addItem(label, mode)
+        self.thumbnails_combo.setToolTip("Saved as <name>-thumb.jpg / <name>-sheet.jpg next to the MP4")
+        self.thumbnails_combo.currentIndexChanged.connect(self.on_settings_changed)
+        extras_layout.addWidget(self.thumbnails_combo)
+
+        extras_layout.addStretch()
+        top_layout.addWidget(extras_group)
+
+        # Load-aware throttling
+        throttle_group = QGroupBox("Load Throttling")
+        throttle_layout = QHBoxLayout(throttle_group)
+
+        self.throttle_cb = QCheckBox("Back off under load")
+        self.throttle_cb.setToolTip("Pause running encodes while other programs need the machine")
+        throttle_layout.addWidget(self.throttle_cb)
+
+        throttle_layout.addWidget(QLabel("Max other CPU %:"))
+        self.max_cpu_spinbox = QSpinBox()
+        self.max_cpu_spinbox.setRange(5, 100)
+        self.max_cpu_spinbox.setValue(50)
+        throttle_layout.addWidget(self.max_cpu_spinbox)
+
+        throttle_layout.addWidget(QLabel("Max load/core:"))
+        self.max_load_spinbox = QDoubleSpinBox()
+        self.max_load_spinbox.setRange(0.1, 16.0)
+        self.max_load_spinbox.setSingleStep(0.1)
+        self.max_load_spinbox.setValue(1.0)
+        throttle_layout.addWidget(self.max_load_spinbox)
+
+        throttle_layout.addWidget(QLabel("Min free RAM (MB):"))
+        self.min_memory_spinbox = QSpinBox()
+        self.min_memory_spinbox.setRange(0, 1024 * 1024)
+        self.min_memory_spinbox.setSingleStep(256)
+        self.min_memory_spinbox.setValue(1024)
+        throttle_layout.addWidget(self.min_memory_spinbox)
+
+        throttle_layout.addWidget(QLabel("Full speed hours:"))
+        self.full_speed_edit = QLineEdit()
+        self.full_speed_edit.setPlaceholderText("e.g. 22:00-07:00")
+        self.full_speed_edit.setToolTip("Comma-separated HH:MM-HH:MM windows where limits are ignored")
+        throttle_layout.addWidget(self.full_speed_edit)
+
+        # Without psutil (or /proc/meminfo) some limits cannot be measured; don't pretend they apply
+        self.unavailable_throttle_checks = unavailable_checks()
+        for check, widget in (('cpu', self.max_cpu_spinbox), ('load', self.max_load_spinbox),
+                              ('memory', self.min_memory_spinbox)):
+            if check in self.unavailable_throttle_checks:
+                widget.setEnabled(False)
+                widget.setToolTip("Not measurable on this system (install psutil)")
+
+        self.throttle_cb.toggled.connect(self.on_throttle_settings_changed)
+        for widget in (self.max_cpu_spinbox, self.max_load_spinbox, self.min_memory_spinbox):
+            widget.valueChanged.connect(self.on_throttle_settings_changed)
+        self.full_speed_edit.textChanged.connect(self.on_throttle_settings_changed)
+
+        throttle_layout.addStretch()
+        top_layout.addWidget(throttle_group)
+
+        # Storage budget: encode at planned bitrates instead of CRF
+        budget_group = QGroupBox("Storage Budget")
+        budget_layout = QHBoxLayout(budget_group)
+
+        self.budget_cb = QCheckBox("Fit batch into")
+        self.budget_cb.setToolTip("Share a disk allowance across the batch by duration and resolution.\n"
+                                  "Encodes use single-pass average bitrate instead of CRF; the remaining\n"
+                                  "jobs are re-allocated as finished jobs come in over or under plan.")
+        budget_layout.addWidget(self.budget_cb)
+
+        self.budget_spinbox = QDoubleSpinBox()
+        self.budget_spinbox.setRange(0.1, 100000.0)
+        self.budget_spinbox.setDecimals(1)
+        self.budget_spinbox.setValue(50.0)
+        budget_layout.addWidget(self.budget_spinbox)
+
+        self.budget_mode_combo = QComboBox()
+        self.budget_mode_combo.addItem("GiB total", BUDGET_TOTAL)
+        self.budget_mode_combo.addItem("GiB per hour of video", BUDGET_PER_HOUR)
+        budget_layout.addWidget(self.budget_mode_combo)
+
+        self.budget_cb.toggled.connect(self.on_settings_changed)
+        self.budget_spinbox.valueChanged.connect(self.on_settings_changed)
+        self.budget_mode_combo.currentIndexChanged.connect(self.on_settings_changed)
+
+        budget_layout.addStretch()
+        top_layout.addWidget(budget_group)
+
+        # Re-evaluate system load periodically while converting
+        self.throttle_timer = QTimer(self)
+        self.throttle_timer.setInterval(5000)
+        self.throttle_timer.timeout.connect(self.evaluate_throttle)
+
         # File list
         files_group = QGroupBox("MKV Files Found")
         files_layout = QVBoxLayout(files_group)
@@ -396,17 +870,34 @@ class MKVConverterGUI(QMainWindow):
         self.select_all_cb.clicked.connect(self.toggle_select_all)
         self.file_count_label = QLabel("0 files found")
 
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter, e.g. hevc >10GB  or  video:h264 duration>1h")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.textChanged.connect(self.apply_file_filter)
+
         file_controls_layout.addWidget(self.select_all_cb)
         file_controls_layout.addWidget(self.file_count_label)
-        file_controls_layout.addStretch()
+        file_controls_layout.addWidget(self.filter_edit, 1)
 
         files_layout.addLayout(file_controls_layout)
 
-        self.file_list = QListWidget()
-        self.file_list.setMinimumHeight(150)
-        # Connect itemChanged signal to update button state when checkboxes change
-        self.file_list.itemChanged.connect(self.update_file_count)
-        files_layout.addWidget(self.file_list)
+        # Model/view file table; the model keeps the checked count up to date itself
+        self.file_model = FileTableModel(self)
+        self.file_model.checked_count_changed.connect(self.update_file_count)
+        self.file_proxy = FileFilterProxyModel(self)
+        self.file_proxy.setSourceModel(self.file_model)
+
+        self.file_view = QTableView()
+        self.file_view.setModel(self.file_proxy)
+        self.file_view.setMinimumHeight(150)
+        self.file_view.setSortingEnabled(True)
+        self.file_view.sortByColumn(FileTableModel.NAME, Qt.SortOrder.AscendingOrder)
+        self.file_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.file_view.setWordWrap(False)
+        self.file_view.verticalHeader().setVisible(False)
+        self.file_view.verticalHeader().setDefaultSectionSize(22)
+        self.file_view.horizontalHeader().setSectionResizeMode(FileTableModel.NAME, QHeaderView.ResizeMode.Stretch)
+        files_layout.addWidget(self.file_view)
 
         top_layout.addWidget(files_group)
         splitter.addWidget(top_widget)
@@ -421,6 +912,16 @@ class MKVConverterGUI(QMainWindow):
         self.convert_btn.clicked.connect(self.start_conversion)
         self.convert_btn.setEnabled(False)
 
+        self.plan_btn = QPushButton("Plan Batch (Dry Run)")
+        self.plan_btn.setToolTip("Estimate time, output size and free space without converting")
+        self.plan_btn.clicked.connect(self.plan_conversion)
+        self.plan_btn.setEnabled(False)
+
+        self.pause_btn = QPushButton("Pause")
+        self.pause_btn.setCheckable(True)
+        self.pause_btn.toggled.connect(self.toggle_pause)
+        self.pause_btn.setEnabled(False)
+
         self.stop_btn = QPushButton("Stop Conversion")
         self.stop_btn.clicked.connect(self.stop_conversion)
         self.stop_btn.setEnabled(False)
@@ -429,13 +930,73 @@ class MKVConverterGUI(QMainWindow):
         self.progress_label = QLabel("Initializing...")
 
         controls_layout.addWidget(self.convert_btn)
+        controls_layout.addWidget(self.plan_btn)
+        controls_layout.addWidget(self.pause_btn)
         controls_layout.addWidget(self.stop_btn)
+
+        # Concurrency limits; stream-copy jobs are capped per physical disk
+        controls_layout.addWidget(QLabel("Parallel jobs:"))
+        self.parallel_spinbox = QSpinBox()
+        self.parallel_spinbox.setRange(1, 32)
+        self.parallel_spinbox.setToolTip("How many conversions may run at the same time")
+        self.parallel_spinbox.valueChanged.connect(self.on_limits_changed)
+        controls_layout.addWidget(self.parallel_spinbox)
+
+        controls_layout.addWidget(QLabel("Copy jobs per disk:"))
+        self.io_per_device_spinbox = QSpinBox()
+        self.io_per_device_spinbox.setRange(1, 16)
+        self.io_per_device_spinbox.setToolTip(
+            "How many stream-copy (I/O-bound) jobs may read or write the same disk or share at once")
+        self.io_per_device_spinbox.valueChanged.connect(self.on_limits_changed)
+        controls_layout.addWidget(self.io_per_device_spinbox)
         controls_layout.addStretch()
         controls_layout.addWidget(self.progress_label)
 
         bottom_layout.addLayout(controls_layout)
         bottom_layout.addWidget(self.progress_bar)
 
+        # Live job queue
+        queue_group = QGroupBox("Job Queue")
+        queue_layout = QHBoxLayout(queue_group)
+
+        self.queue_list = QListWidget()
+        self.queue_list.setMaximumHeight(150)
+        self.queue_list.currentRowChanged.connect(self.update_queue_buttons)
+        queue_layout.addWidget(self.queue_list, 1)
+
+        queue_buttons_layout = QVBoxLayout()
+        self.move_up_btn = QPushButton("Move Up")
+        self.move_up_btn.clicked.connect(lambda: self.move_selected_job(-1))
+        self.move_down_btn = QPushButton("Move Down")
+        self.move_down_btn.clicked.connect(lambda: self.move_selected_job(1))
+        self.raise_priority_btn = QPushButton("Raise Priority")
+        self.raise_priority_btn.clicked.connect(lambda: self.change_selected_priority(1))
+        self.lower_priority_btn = QPushButton("Lower Priority")
+        self.lower_priority_btn.clicked.connect(lambda: self.change_selected_priority(-1))
+        self.cancel_job_btn = QPushButton("Cancel Job")
+        self.cancel_job_btn.clicked.connect(self.cancel_selected_job)
+        self.full_verify_btn = QPushButton("Full Verify")
+        self.full_verify_btn.setToolTip("Decode the whole output to check it for errors")
+        self.full_verify_btn.clicked.connect(self.full_verify_selected_job)
+
+        for button in (self.move_up_btn, self.move_down_btn, self.raise_priority_btn,
+                       self.lower_priority_btn, self.cancel_job_btn, self.full_verify_btn):
+            button.setEnabled(False)
+            queue_buttons_layout.addWidget(button)
+        queue_buttons_layout.addStretch()
+        queue_layout.addLayout(queue_buttons_layout)
+
+        bottom_layout.addWidget(queue_group)
+
+        # Live sparklines per running job and for the whole batch
+        self.performance_panel = PerformancePanel(self.metrics)
+        bottom_layout.addWidget(self.performance_panel)
+
+        # Charts repaint on a timer, not per FFmpeg stats line
+        self.chart_timer = QTimer(self)
+        self.chart_timer.setInterval(1000)
+        self.chart_timer.timeout.connect(self.refresh_charts)
+
         # Log output
         log_group = QGroupBox("Conversion Log")
         log_layout = QVBoxLayout(log_group)
@@ -459,10 +1020,36 @@ class MKVConverterGUI(QMainWindow):
             self.settings_timer = QTimer()
             self.settings_timer.setSingleShot(True)
             self.settings_timer.timeout.connect(self.save_settings)
+            self.settings_timer.timeout.connect(self.refresh_file_plans)
 
         # Reset the timer - this debounces rapid changes
         self.settings_timer.start(500)  # Save after 500ms of no changes
 
+    def set_encode_rules(self, text):
+        """Parse and apply rule text; invalid saved rules are reported and ignored"""
+        try:
+            self.encode_rules = parse_rules(text or "")
+        except ValueError as e:
+            self.log(f"Ignoring invalid encode rules ({e})")
+            self.encode_rules = []
+        self.encode_rules_text = text or ""
+        self.rules_btn.setText(f"Rules ({len(self.encode_rules)})..." if self.encode_rules else "Rules...")
+        self.refresh_file_plans()
+
+    def edit_encode_rules(self):
+        dialog = EncodeRulesDialog(self.encode_rules_text, self)
+        if dialog.exec() == QDialog.DialogCode.Accepted:
+            self.set_encode_rules(dialog.text())
+            self.settings.setValue("encode_rules", self.encode_rules_text)
+            self.log(f"Encode rules updated: {len(self.encode_rules)} rules")
+
+    def refresh_file_plans(self):
+        """Recompute the Plan column from the current settings and rules"""
+        codec_settings = self.get_codec_settings()
+        rules = self.encode_rules
+        self.file_model.set_plan_function(
+            lambda entry: plan_file(rules, entry.path, entry.size, entry.media, codec_settings))
+
     def select_folder(self):
         # Start from the last used folder if available
         start_dir = self.settings.value("last_source_folder", "")
@@ -502,134 +1089,594 @@ class MKVConverterGUI(QMainWindow):
             self.output_folder_label.setText("Same as source folder")
             self.output_folder_label.setStyleSheet("color: #888; background-color: transparent; padding: 2px;")
 
+    @profiled("scan.scan_for_mkv_files")
     def scan_for_mkv_files(self, folder):
-        self.mkv_files = []
-        self.file_list.clear()
+        if self.probe_worker:
+            self.probe_worker.stop()
+            self.probe_worker.wait()
 
         # Find all MKV files
-        for file_path in Path(folder).rglob("*.mkv"):
-            self.mkv_files.append(str(file_path))
-
-        # Add to list widget with checkboxes
-        for mkv_file in self.mkv_files:
-            item = QListWidgetItem(Path(mkv_file).name)
-            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
-            item.setCheckState(Qt.CheckState.Checked)
-            item.setData(Qt.ItemDataRole.UserRole, mkv_file)  # Store full path
-            self.file_list.addItem(item)
-
+        files = []
+        with profiler.stage("scan.walk"):
+            for file_path in Path(folder).rglob("*.mkv"):
+                try:
+                    size = file_path.stat().st_size
+                except OSError:
+                    size = 0
+                files.append((str(file_path), size))
+
+        with profiler.stage("scan.populate_model"):
+            self.file_model.set_files(files)
+            self.file_model.update_media({path: self.media_info[path] for path, _ in files
+                                          if path in self.media_info})
+        self.log(f"Found {len(files)} MKV files in {folder}")
+
+        # Fill in duration and codec columns in the background
+        if self.ffmpeg_path and files:
+            self.start_probe_worker([path for path, _ in files])
+
+    def start_probe_worker(self, paths):
+        self.probe_worker = ProbeWorker(paths, find_ffprobe(self.ffmpeg_path), self.media_info)
+        self.probe_worker.probed.connect(self.file_model.update_media)
+        self.probe_worker.start()
+
+    def apply_file_filter(self, text):
+        self.file_proxy.set_filter_text(text)
         self.update_file_count()
-        self.log(f"Found {len(self.mkv_files)} MKV files in {folder}")
 
-    def update_file_count(self):
-        total = len(self.mkv_files)
-        selected = sum(1 for i in range(self.file_list.count())
-                       if self.file_list.item(i).checkState() == Qt.CheckState.Checked)
+    def update_file_count(self, *args):
+        total = self.file_model.rowCount()
+        selected = self.file_model.checked_count
+        shown = self.file_proxy.rowCount()
 
-        self.file_count_label.setText(f"{selected}/{total} files selected")
-        self.convert_btn.setEnabled(selected > 0 and self.ffmpeg_path is not None)
+        label = f"{selected}/{total} files selected"
+        if shown != total:
+            label += f" ({shown} shown)"
+        self.file_count_label.setText(label)
+        busy = self.plan_worker is not None or self.preflight_worker is not None
+        self.convert_btn.setText("Add to Queue" if self.conversion_active else "Start Conversion")
+        self.convert_btn.setEnabled(selected > 0 and self.ffmpeg_path is not None and not busy)
+        self.plan_btn.setEnabled(selected > 0 and self.ffmpeg_path is not None and not busy)
 
     def toggle_select_all(self):
-        check_state = Qt.CheckState.Checked if self.select_all_cb.isChecked() else Qt.CheckState.Unchecked
-
-        for i in range(self.file_list.count()):
-            self.file_list.item(i).setCheckState(check_state)
-
-        self.update_file_count()
+        # Applies to the rows that pass the current filter
+        self.file_model.set_rows_checked(self.file_proxy.visible_source_rows(),
+                                         self.select_all_cb.isChecked())
 
     def get_selected_files(self):
         selected = []
-        for i in range(self.file_list.count()):
-            item = self.file_list.item(i)
-            if item.checkState() == Qt.CheckState.Checked:
-                input_file = item.data(Qt.ItemDataRole.UserRole)
-
-                # Determine output file path
-                if self.output_folder:
-                    output_file = os.path.join(self.output_folder,
-                                               Path(input_file).stem + ".mp4")
-                else:
-                    output_file = str(Path(input_file).with_suffix(".mp4"))
-
-                selected.append((input_file, output_file))
+        for input_file in self.file_model.checked_paths():
+            # Skip files that are already waiting or running in the queue
+            if self.job_queue.is_queued(input_file):
+                continue
+
+            # Determine output file path
+            if self.output_folder:
+                output_file = os.path.join(self.output_folder,
+                                           Path(input_file).stem + ".mp4")
+            else:
+                output_file = str(Path(input_file).with_suffix(".mp4"))
+
+            selected.append((input_file, output_file))
         return selected
 
+    def get_codec_settings(self):
+        video_codec = self.video_codec_combo.currentText()
+        return {
+            'video_codec': video_codec,
+            'audio_codec': self.audio_codec_combo.currentText(),
+            'crf': self.crf_spinbox.value() if video_codec != 'copy' else None,
+            'preset': self.preset_combo.currentText() if video_codec != 'copy' else None,
+            'subtitles': self.subtitles_combo.currentData(),
+            'image_subtitles': self.image_subtitles_cb.isChecked(),
+            'chapters': self.chapters_cb.isChecked(),
+            'thumbnails': self.thumbnails_combo.currentData(),
+        }
+
+    def plan_conversion(self):
+        """Dry run: probe the selected files and report estimates only"""
+        self.run_planner(start_after=False)
+
     def start_conversion(self):
+        """Plan the batch, check free space, then launch the worker"""
+        self.run_planner(start_after=True)
+
+    def run_planner(self, start_after):
         selected_files = self.get_selected_files()
         if not selected_files:
-            QMessageBox.warning(self, "Warning", "No files selected for conversion!")
+            QMessageBox.warning(self, "Warning", "No files selected for conversion (or all are already queued)!")
             return
 
+        codec_settings = self.get_codec_settings()
 
+        self.convert_btn.setEnabled(False)
+        self.plan_btn.setEnabled(False)
+        self.progress_label.setText(f"Probing {len(selected_files)} files...")
+        self.log(f"Planning batch of {len(selected_files)} files...")
+
+        self.plan_worker = PlanWorker(selected_files, codec_settings, self.speed_history,
+                                      find_ffprobe(self.ffmpeg_path), self.media_info, self.encode_rules,
+                                      self.parallel_spinbox.value())
+        self.plan_worker.plan_ready.connect(
+            lambda plan: self.plan_ready(plan, selected_files, codec_settings, start_after))
+        self.plan_worker.finished.connect(self.plan_worker_finished)
+        self.plan_worker.start()
+
+    def plan_worker_finished(self):
+        # Keep the reference until the thread has really ended
+        self.plan_worker = None
+        self.update_file_count()
 
-        # Get codec settings
-        codec_settings = {
-            'video_codec': self.video_codec_combo.currentText(),
-            'audio_codec': self.audio_codec_combo.currentText(),
-            'crf': self.crf_spinbox.value() if self.video_codec_combo.currentText() != 'copy' else None,
-            'preset': self.preset_combo.currentText() if self.video_codec_combo.currentText() != 'copy' else None
-        }
+    def plan_ready(self, plan, selected_files, codec_settings, start_after):
+        self.file_model.update_media({e.input_file: e.media for e in plan.estimates if e.media})
+        budget_tracker = None
+        if self.budget_cb.isChecked():
+            budget_tracker = self.plan_budget(plan, start_after)
+        elif start_after and not self.conversion_active:
+            self.budget_tracker = None  # a new batch without a budget
+        self.file_model.update_estimates(plan.estimates)
+        for line in plan.summary_lines():
+            self.log(line)
+        if budget_tracker is not None:
+            self.log(f"  {budget_tracker.summary()}")
+        self.progress_label.setText(plan.summary_lines()[0])
+        # Settings per file after the encode rules
+        job_settings = {e.input_file: e.codec_settings for e in plan.estimates}
+        adjusted = sum(1 for settings in job_settings.values() if settings != codec_settings)
+        if adjusted:
+            self.log(f"  Encode rules adjusted the settings of {adjusted} files")
+
+        if plan.insufficient_volumes:
+            paths = "\n".join(v.path for v in plan.insufficient_volumes)
+            if not start_after:
+                QMessageBox.warning(self, "Insufficient Disk Space",
+                                    f"The estimated output will not fit on:\n{paths}")
+            else:
+                reply = QMessageBox.question(
+                    self, "Insufficient Disk Space",
+                    f"The estimated output will not fit on:\n{paths}\n\nStart the conversion anyway?",
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                    QMessageBox.StandardButton.No
+                )
+                if reply != QMessageBox.StandardButton.Yes:
+                    start_after = False
+
+        if start_after and self.preflight_cb.isChecked():
+            self.run_preflight(selected_files, codec_settings, job_settings)
+        elif start_after:
+            self.launch_conversion(selected_files, codec_settings, job_settings)
+        else:
+            self.update_file_count()
+
+    def plan_budget(self, plan, start_after):
+        """Allocate video bitrates for the planned files from the storage budget"""
+        size = int(self.budget_spinbox.value() * 1024 ** 3)  # GiB, matching format_bytes()
+        mode = self.budget_mode_combo.currentData()
+        tracker = self.budget_tracker if self.conversion_active and start_after else None
+        if tracker is None:
+            tracker = BudgetTracker(mode, size)
+        else:
+            # Files added to a running batch share what is left of its budget
+            self.rebalance_budget()
+        apply_budget(plan, tracker, self.speed_history)
+        if start_after:
+            self.budget_tracker = tracker
+        unallocated = tracker.unallocated()
+        if unallocated:
+            self.log(f"  {len(unallocated)} files have no known duration and keep CRF outside the budget")
+        if tracker.over_budget():
+            self.log("  WARNING: the budget is too small for this batch even at the minimum bitrate")
+        return tracker
+
+    def rebalance_budget(self):
+        """Re-allocate what is left of the budget to the jobs that haven't started"""
+        tracker = self.budget_tracker
+        if tracker is None:
+            return
+        pending = {}
+        for job in self.job_queue.jobs():
+            if job.status == JobStatus.PENDING:
+                pending[job.input_file] = job
+            elif job.status == JobStatus.RUNNING:
+                # Started, though its first progress update may not have arrived yet
+                tracker.start(job.input_file)
+        tracker.drop_pending(pending)
+        for input_file, bitrate in tracker.allocate().items():
+            self.job_queue.update_settings(pending[input_file].id, video_bitrate=bitrate)
+
+    def run_preflight(self, selected_files, codec_settings, job_settings=None):
+        # Stand-alone jobs: nothing enters the queue until its trial has passed
+        job_settings = job_settings or {}
+        jobs = [Job(index, input_file, output_file, dict(job_settings.get(input_file, codec_settings)),
+                    extra={'media': self.media_info.get(input_file)})
+                for index, (input_file, output_file) in enumerate(selected_files)]
+        self.convert_btn.setEnabled(False)
+        self.plan_btn.setEnabled(False)
+        self.progress_label.setText(f"Preflight: trial-converting {len(jobs)} files...")
+        self.log(f"Preflight: trial-converting the start of {len(jobs)} files...")
+
+        self.preflight_worker = PreflightWorker(jobs, self.ffmpeg_path, max(2, self.parallel_spinbox.value()))
+        self.preflight_worker.preflight_done.connect(lambda results: self.preflight_done(jobs, results))
+        self.preflight_worker.finished.connect(self.preflight_worker_finished)
+        self.preflight_worker.start()
+
+    def preflight_worker_finished(self):
+        # Keep the reference until the thread has really ended
+        self.preflight_worker = None
+        self.update_file_count()
 
-        # Setup progress
-        self.progress_bar.setMaximum(len(selected_files))
-        self.progress_bar.setValue(0)
+    def preflight_done(self, jobs, results):
+        for job in jobs:
+            if job.extra.get('media') is not None:
+                self.media_info.setdefault(job.input_file, job.extra['media'])
+        accepted = []
+        job_settings = {}
+        for job in jobs:
+            result = results[job.id]
+            name = Path(job.input_file).name
+            if result.action == ACTION_REJECT:
+                self.log(f"✗ Skipping {name}: {result.summary()}")
+                self.file_model.set_status(job.input_file, "Preflight failed")
+                continue
+            if result.action == ACTION_FIXED:
+                self.log(f"⚠ {name}: {result.summary()}")
+                if self.budget_tracker is not None and job.input_file in self.budget_tracker.items:
+                    # A copy job that now transcodes needs a bitrate from the budget
+                    self.budget_tracker.add(job.input_file, job.extra.get('media'), result.codec_settings)
+            accepted.append((job.input_file, job.output_file))
+            job_settings[job.input_file] = result.codec_settings
+
+        ok = sum(1 for r in results.values() if r.action == ACTION_OK)
+        fixed = sum(1 for r in results.values() if r.action == ACTION_FIXED)
+        self.log(f"Preflight: {ok} passed, {fixed} fixed, {len(jobs) - len(accepted)} rejected")
+        if accepted:
+            self.launch_conversion(accepted, None, job_settings)
+        else:
+            self.progress_label.setText("Preflight rejected every file")
+            self.update_file_count()
+
+    def launch_conversion(self, selected_files, codec_settings, job_settings=None):
+        """Queue the files; job_settings optionally overrides codec_settings per input file"""
+        new_batch = not self.conversion_active and not self.report_pending
+        if new_batch:
+            self.metrics.reset()
+            self.performance_panel.clear_jobs()
+        for index, (input_file, output_file) in enumerate(selected_files):
+            settings = (job_settings or {}).get(input_file, codec_settings)
+            job = self.job_queue.add(input_file, output_file, settings)
+            # Verification compares the output against the probed source
+            job.extra['media'] = self.media_info.get(input_file)
+            if new_batch and index == 0:
+                self.batch_started_at = datetime.now()
+                self.batch_first_job_id = job.id
+
+        # Preflight may have rejected files the budget was planned for
+        self.rebalance_budget()
+        self.update_queue_progress()
+        self.refresh_queue_view()
+
+        if self.conversion_active:
+            # The running worker picks the new jobs up from the shared queue
+            self.log(f"Added {len(selected_files)} files to the running queue")
+            self.update_file_count()
+            return
+
+        self.start_worker()
+        self.log(f"Starting conversion of {len(selected_files)} files...")
 
-        # Start conversion worker
-        self.conversion_worker = ConversionWorker(selected_files, self.output_folder, codec_settings, self.ffmpeg_path)
+    @profiled("worker.start")
+    def start_worker(self):
+        partial_policy = PARTIAL_QUARANTINE if self.quarantine_cb.isChecked() else PARTIAL_DELETE
+        self.conversion_worker = ConversionWorker(self.job_queue, self.ffmpeg_path, partial_policy,
+                                                  self.parallel_spinbox.value(),
+                                                  self.io_per_device_spinbox.value())
         self.conversion_worker.progress_updated.connect(self.update_progress)
         self.conversion_worker.conversion_complete.connect(self.file_conversion_complete)
         self.conversion_worker.ffmpeg_output.connect(self.log_ffmpeg_output)
+        self.conversion_worker.job_progress.connect(self.update_job_progress)
         self.conversion_worker.all_complete.connect(self.all_conversions_complete)
 
+        self.conversion_worker.set_paused(self.pause_btn.isChecked())
         self.conversion_worker.start()
+        self.conversion_active = True
+        self.throttle_timer.start()
+        self.chart_timer.start()
+        self.evaluate_throttle()
 
         # Update UI
-        self.convert_btn.setEnabled(False)
+        self.pause_btn.setEnabled(True)
         self.stop_btn.setEnabled(True)
-        self.log(f"Starting conversion of {len(selected_files)} files...")
+        self.update_file_count()
 
     def stop_conversion(self):
-        if self.conversion_worker:
+        if self.conversion_worker and self.conversion_active:
+            # Returns immediately; the running ffmpeg is stopped in the background
             self.conversion_worker.stop()
+            self.stop_btn.setEnabled(False)
+            self.pause_btn.setEnabled(False)
+            self.progress_label.setText("Stopping...")
             self.log("Stopping conversion...")
+            self.update_queue_progress()
+            self.refresh_queue_view()
+
+    def on_limits_changed(self, *args):
+        if self.conversion_worker and self.conversion_active:
+            self.conversion_worker.set_limits(self.parallel_spinbox.value(),
+                                              self.io_per_device_spinbox.value())
+        self.on_settings_changed()
+
+    def toggle_pause(self, paused):
+        self.pause_btn.setText("Resume" if paused else "Pause")
+        if self.conversion_worker and self.conversion_active:
+            self.conversion_worker.set_paused(paused)
+            self.progress_label.setText("Paused" if paused else "Resuming...")
+            self.log("Conversion paused" if paused else "Conversion resumed")
+
+    def on_throttle_settings_changed(self, *args):
+        if (self.throttle_cb.isChecked() and not self.admission_controller.settings.enabled
+                and self.unavailable_throttle_checks):
+            self.log("Warning: load throttling cannot measure "
+                     f"{', '.join(self.unavailable_throttle_checks)} here (psutil missing); "
+                     "those limits are ignored")
+        self.admission_controller.settings = ThrottleSettings(
+            enabled=self.throttle_cb.isChecked(),
+            max_cpu_percent=self.max_cpu_spinbox.value(),
+            max_load_per_cpu=self.max_load_spinbox.value(),
+            min_free_memory_mb=self.min_memory_spinbox.value(),
+            windows=parse_windows(self.full_speed_edit.text()),
+        )
+        self.on_settings_changed()
 
-    def update_progress(self, file_index, status_message):
-        self.progress_bar.setValue(file_index)
+    def evaluate_throttle(self):
+        """Hold back or release the running batch based on system load and schedule"""
+        if not (self.conversion_worker and self.conversion_active):
+            return
+        decision = self.admission_controller.evaluate(self.conversion_worker.running_pids())
+        held = not decision.allow
+        if held != self.conversion_worker.held:
+            self.conversion_worker.set_held(held)
+            if held:
+                self.log(f"Holding back conversions: {decision.reason}")
+                self.progress_label.setText(f"Waiting: {decision.reason}")
+            else:
+                self.log(f"Resuming conversions: {decision.reason}")
+
+    @profiled("slot.update_progress")
+    def update_progress(self, job_id, status_message):
+        if job_id not in self.job_start_times:
+            job = self.job_queue.get(job_id)
+            self.performance_panel.add_job(job_id, Path(job.input_file).name if job else f"Job {job_id}")
+            if self.budget_tracker is not None and job is not None:
+                self.budget_tracker.start(job.input_file)
+        self.job_start_times.setdefault(job_id, time.monotonic())
         self.progress_label.setText(status_message)
-
-    def file_conversion_complete(self, file_index, success, message):
-        self.progress_bar.setValue(file_index + 1)
+        self.refresh_queue_view()
+
+    def update_queue_progress(self):
+        finished, total = self.job_queue.counts()
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(finished)
+
+    @profiled("slot.file_conversion_complete")
+    def file_conversion_complete(self, job_id, success, message):
+        self.performance_panel.remove_job(job_id)
+        self.metrics.finish(job_id)
+        self.update_queue_progress()
+        self.refresh_queue_view()
         self.log(message)
+        if self.budget_tracker is not None:
+            self.update_budget(job_id, success)
+        if success:
+            self.record_speed_history(job_id)
+            tier = self.verify_combo.currentIndex()
+            job = self.job_queue.get(job_id)
+            if tier != TIER_OFF and job is not None:
+                self.verifier.submit(job, self.ffmpeg_path, tier)
+
+    def update_budget(self, job_id, success):
+        """Compare a finished job's size with its plan and re-allocate the rest"""
+        job = self.job_queue.get(job_id)
+        if job is None or job.input_file not in self.budget_tracker.items:
+            return
+        actual = 0
+        if success:
+            try:
+                actual = os.path.getsize(job.output_file)
+            except OSError:
+                pass
+        self.budget_tracker.finish(job.input_file, actual)
+        self.rebalance_budget()
+        self.log(self.budget_tracker.summary())
+        self.refresh_queue_view()
+
+    @profiled("slot.verification_complete")
+    def verification_complete(self, job_id, result):
+        self.verifier.pending -= 1
+        job = self.job_queue.get(job_id)
+        if job is not None:
+            job.extra['verification'] = result
+            name = Path(job.output_file).name
+            if result.ok:
+                self.log(f"{name}: {result.summary()} ({result.seconds:.1f}s)")
+            else:
+                # ffmpeg exited cleanly but the output is unusable (e.g. truncated after disk full)
+                self.job_queue.finish(job_id, False, result.summary())
+                self.log(f"{name}: {result.summary()}")
+            self.refresh_queue_view()
+
+        if self.report_pending and self.verifier.is_idle():
+            self.write_batch_report()
+
+    def full_verify_selected_job(self):
+        job = self.selected_job()
+        if job is None or not os.path.exists(job.output_file):
+            return
+        self.log(f"Full verification of {Path(job.output_file).name} started...")
+        self.verifier.submit(job, self.ffmpeg_path, TIER_FULL)
+
+    def record_speed_history(self, job_id):
+        """Feed a finished encode into the speed history used by the planner"""
+        started = self.job_start_times.get(job_id)
+        job = self.job_queue.get(job_id)
+        if started is None or job is None:
+            return
+        media = self.media_info.get(job.input_file)
+        if media is None or not media.duration:
+            return
+        try:
+            output_bytes = os.path.getsize(job.output_file)
+        except OSError:
+            return
+        settings = job.codec_settings
+        if settings.get('video_bitrate'):
+            # The size was dictated by the budget and says nothing about CRF bitrates
+            output_bytes = None
+        # Leave out time the process spent suspended by Pause or a load hold
+        wall_seconds = time.monotonic() - started - job.extra.get('suspended_seconds', 0.0)
+        if wall_seconds <= 0:
+            return
+        self.speed_history.record(settings['video_codec'], settings['preset'], media.height,
+                                  media.duration, wall_seconds, output_bytes)
+        self.settings.setValue("speed_history", self.speed_history.to_json())
+
+    @profiled("ui.refresh_queue_view")
+    def refresh_queue_view(self):
+        """Rebuild the queue list from the shared job queue, keeping the selection"""
+        current = self.queue_list.currentItem()
+        selected_id = current.data(Qt.ItemDataRole.UserRole) if current else None
+
+        jobs = self.job_queue.jobs()
+        # Finished jobs come last; apply them first so a requeued file shows its live status
+        for job in reversed(jobs):
+            self.file_model.set_status(job.input_file, job.status)
+
+        self.queue_list.blockSignals(True)
+        self.queue_list.clear()
+        for job in jobs:
+            text = f"[{job.status}] {Path(job.input_file).name}"
+            if job.priority:
+                text += f"  (priority {job.priority:+d})"
+            if job.codec_settings.get('video_bitrate'):
+                text += f"  ({job.codec_settings['video_bitrate'] / 1e6:.2f} Mb/s)"
+            item = QListWidgetItem(text)
+            item.setData(Qt.ItemDataRole.UserRole, job.id)
+            self.queue_list.addItem(item)
+            if job.id == selected_id:
+                self.queue_list.setCurrentItem(item)
+        self.queue_list.blockSignals(False)
+        self.update_queue_buttons()
+
+    def selected_job(self):
+        item = self.queue_list.currentItem()
+        if item is None:
+            return None
+        return self.job_queue.get(item.data(Qt.ItemDataRole.UserRole))
+
+    def update_queue_buttons(self, *args):
+        job = self.selected_job()
+        pending = job is not None and job.status == JobStatus.PENDING
+        active = job is not None and job.status in (JobStatus.PENDING, JobStatus.RUNNING)
+        self.move_up_btn.setEnabled(pending)
+        self.move_down_btn.setEnabled(pending)
+        self.raise_priority_btn.setEnabled(pending)
+        self.lower_priority_btn.setEnabled(pending)
+        self.cancel_job_btn.setEnabled(active)
+        self.full_verify_btn.setEnabled(job is not None and job.status in (JobStatus.DONE, JobStatus.FAILED))
+
+    def move_selected_job(self, offset):
+        job = self.selected_job()
+        if job and self.job_queue.move(job.id, offset):
+            self.refresh_queue_view()
+
+    def change_selected_priority(self, delta):
+        job = self.selected_job()
+        if job and self.job_queue.set_priority(job.id, job.priority + delta):
+            self.refresh_queue_view()
+
+    def cancel_selected_job(self):
+        job = self.selected_job()
+        if job is None:
+            return
+        if self.conversion_worker and self.conversion_active:
+            previous = self.conversion_worker.cancel_job(job.id)
+        else:
+            previous = self.job_queue.cancel(job.id)
+        if previous:
+            self.log(f"Cancelled {previous.lower()} job: {Path(job.input_file).name}")
+        self.update_queue_progress()
+        self.refresh_queue_view()
 
+    @profiled("completion.all_conversions_complete")
     def all_conversions_complete(self):
+        self.conversion_worker.wait()  # run() has already returned past this signal
+
+        # Jobs may have been queued between the worker draining the queue and this slot
+        if self.job_queue.has_pending() and not self.close_when_stopped:
+            self.start_worker()
+            return
+
         self.progress_label.setText("Conversion complete!")
-        self.convert_btn.setEnabled(True)
+        self.throttle_timer.stop()
+        self.pause_btn.setChecked(False)
+        self.pause_btn.setEnabled(False)
         self.stop_btn.setEnabled(False)
+        self.conversion_active = False
+        self.update_file_count()
+        self.update_queue_progress()
+        self.refresh_queue_view()
         self.log("All conversions completed!")
 
+        # The report includes verification results, so wait for outstanding checks
+        self.report_pending = True
+        if self.verifier.is_idle():
+            self.write_batch_report()
+        else:
+            self.log(f"Waiting for {self.verifier.pending} verifications to finish...")
+
+        if self.close_when_stopped:
+            self.close()
+            return
+
         # Show completion message
         QMessageBox.information(self, "Complete", "Batch conversion completed!")
 
-    def log_ffmpeg_output(self, output_line):
-        """Log FFmpeg output with timestamp and parse progress"""
+    @profiled("completion.write_batch_report")
+    def write_batch_report(self):
+        """Log the batch summary and save it as JSON next to the outputs"""
+        self.report_pending = False
+        jobs = [job for job in self.job_queue.jobs()
+                if job.id >= self.batch_first_job_id and job.status in JobStatus.FINISHED]
+        if not jobs:
+            return
+        report = BatchReport(sorted(jobs, key=lambda j: j.id), self.batch_started_at)
+        for line in report.summary_lines():
+            self.log(line)
+        directory = self.output_folder or os.path.dirname(jobs[0].output_file)
+        try:
+            self.log(f"Report saved to {report.write(directory)}")
+        except OSError as e:
+            self.log(f"Could not save batch report: {e}")
+
+    @profiled("slot.log_ffmpeg_output")
+    def log_ffmpeg_output(self, job_id, output_line):
+        """Log FFmpeg output with timestamp"""
         from datetime import datetime
-        import re
 
         timestamp = datetime.now().strftime("%H:%M:%S")
 
-        # Parse progress information and calculate ETA
+        # Tell interleaved output from parallel jobs apart
+        if self.conversion_worker and self.conversion_worker.max_parallel > 1:
+            job = self.job_queue.get(job_id)
+            if job is not None:
+                output_line = f"[{Path(job.input_file).name}] {output_line}"
+
         if "frame=" in output_line and "time=" in output_line:
-            self.parse_progress_and_update_eta(output_line)
             # Progress-related output in blue with enhanced formatting
             self.log_text.append(f'<span style="color: #42a5f5;">[{timestamp}] {output_line}</span>')
         elif "error" in output_line.lower() or "failed" in output_line.lower():
             self.log_text.append(f'<span style="color: #ff6b6b;">[{timestamp}] {output_line}</span>')
         elif "warning" in output_line.lower():
             self.log_text.append(f'<span style="color: #ffa726;">[{timestamp}] {output_line}</span>')
-        elif "Duration:" in output_line:
-            # Store duration for ETA calculation
-            self.parse_duration(output_line)
-            self.log_text.append(f"[{timestamp}] {output_line}")
         else:
             self.log_text.append(f"[{timestamp}] {output_line}")
 
@@ -638,49 +1685,44 @@ class MKVConverterGUI(QMainWindow):
             self.log_text.verticalScrollBar().maximum()
         )
 
-    def parse_duration(self, duration_line):
-        """Parse total duration from FFmpeg output"""
-        import re
-        # Look for Duration: HH:MM:SS.ss
-        match = re.search(r'Duration: (\d{2}):(\d{2}):(\d{2}\.\d{2})', duration_line)
-        if match:
-            hours, minutes, seconds = match.groups()
-            self.total_duration_seconds = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
-        else:
-            self.total_duration_seconds = None
-
-    def parse_progress_and_update_eta(self, progress_line):
-        """Parse FFmpeg progress line and update ETA"""
-        import re
+    @profiled("slot.update_job_progress")
+    def update_job_progress(self, job_id, progress):
+        """Show progress and ETA from the engine's parsed FFmpeg stats"""
         from datetime import datetime, timedelta
 
-        # Parse current time processed: time=00:01:06.69
-        time_match = re.search(r'time=(\d{2}):(\d{2}):(\d{2}\.\d{2})', progress_line)
-        speed_match = re.search(r'speed=(\d+\.?\d*)x', progress_line)
-
-        if time_match and hasattr(self, 'total_duration_seconds') and self.total_duration_seconds:
-            hours, minutes, seconds = time_match.groups()
-            current_seconds = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
-
-            # Calculate progress percentage
-            progress_percent = (current_seconds / self.total_duration_seconds) * 100
-
-            # Calculate ETA using speed if available
-            if speed_match:
-                speed = float(speed_match.group(1))
-                remaining_seconds = self.total_duration_seconds - current_seconds
-                eta_seconds = remaining_seconds / speed if speed > 0 else 0
-
-                eta_time = datetime.now() + timedelta(seconds=eta_seconds)
-                eta_str = eta_time.strftime("%H:%M:%S")
+        # Only recorded here; the chart timer repaints
+        self.metrics.record(job_id, time.monotonic(), progress.fps, progress.speed,
+                            progress.bitrate, progress.size)
+        if progress.percent is None:
+            return
+        if progress.speed is not None:
+            eta_time = datetime.now() + timedelta(seconds=progress.remaining_seconds or 0)
+            eta_str = eta_time.strftime("%H:%M:%S")
 
-                # Update progress label with detailed info
-                self.progress_label.setText(
-                    f"Progress: {progress_percent:.1f}% | Speed: {speed:.1f}x | ETA: {eta_str}"
-                )
-            else:
-                # Fallback without speed info
-                self.progress_label.setText(f"Progress: {progress_percent:.1f}%")
+            # Update progress label with detailed info
+            self.progress_label.setText(
+                f"{self.running_jobs_prefix()}Progress: {progress.percent:.1f}% | Speed: {progress.speed:.1f}x | ETA: {eta_str}"
+            )
+        else:
+            # Fallback without speed info
+            self.progress_label.setText(f"{self.running_jobs_prefix()}Progress: {progress.percent:.1f}%")
+
+    @profiled("ui.refresh_charts")
+    def refresh_charts(self):
+        now = time.monotonic()
+        # Suspended jobs print no stats, but they aren't stalled
+        if self.conversion_worker is not None:
+            self.metrics.set_paused(self.conversion_worker.suspended_job_ids(), now)
+        # Jobs that started and haven't finished, as seen from the GUI thread
+        self.metrics.sample_batch(now, list(self.performance_panel.rows))
+        self.performance_panel.refresh(now)
+        if not self.conversion_active:
+            self.chart_timer.stop()
+
+    def running_jobs_prefix(self):
+        """'3 running | ' when several jobs run in parallel, else ''"""
+        running = len(self.conversion_worker.running_jobs) if self.conversion_worker else 0
+        return f"{running} running | " if running > 1 else ""
 
     def log(self, message):
         from datetime import datetime
@@ -692,7 +1734,16 @@ class MKVConverterGUI(QMainWindow):
 
 
 def main():
-    app = QApplication(sys.argv)
+    # --profile[=cpu,memory] and --profile-output=FILE are ours, not Qt's
+    argv = parse_profile_args(sys.argv)
+    # --ffmpeg=PATH is shorthand for MKV2MP4UI_FFMPEG=PATH
+    for arg in list(argv):
+        if arg.startswith('--ffmpeg='):
+            os.environ[FFMPEG_ENV] = arg.split('=', 1)[1]
+            argv.remove(arg)
+    started = time.perf_counter()
+    with profiler.stage("startup.qapplication"):
+        app = QApplication(argv)
 
     # Set application properties for QSettings
     app.setOrganizationName("MKVConverter")
@@ -709,8 +1760,12 @@ def main():
 
     # Create and show the main window
     # FFmpeg checking is now handled within the main window initialization
-    window = MKVConverterGUI()
-    window.show()
+    with profiler.stage("startup.main_window"):
+        window = MKVConverterGUI()
+        window.show()
+    if profiler.enabled:
+        # Until the event loop processes its first events, i.e. the window is usable
+        QTimer.singleShot(0, lambda: profiler.record("startup.total", time.perf_counter() - started))
 
     sys.exit(app.exec())
 
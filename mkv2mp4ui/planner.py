@@ -0,0 +1,398 @@
+"""
+Batch planning helpers.
+
+Probes source files with ffprobe, estimates encode wall-time and output size
+from historical encode speed, and checks free space on the output volumes
+before a batch is started.
+"""
+import heapq
+import json
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import ffmpeg
+
+from mkv2mp4ui.rules import plan_file
+
+
+# Rough encode speed (media seconds per wall second) used when there is no history
+DEFAULT_SPEED = {
+    'copy': 60.0,
+    'libx264': 2.0,
+    'libx265': 0.6,
+}
+
+# Relative cost of each resolution bucket compared to 1080p
+RESOLUTION_FACTOR = {
+    'sd': 4.0,
+    'hd': 2.0,
+    'fhd': 1.0,
+    'uhd': 0.25,
+}
+
+# Typical video bitrate (bits/s) at CRF 23 for libx264, per resolution bucket
+DEFAULT_VIDEO_BITRATE = {
+    'sd': 1_000_000,
+    'hd': 2_500_000,
+    'fhd': 5_000_000,
+    'uhd': 15_000_000,
+}
+
+# Audio bitrate (bits/s) assumed for re-encoded audio
+DEFAULT_AUDIO_BITRATE = 128_000
+
+# Keep this much headroom on each output volume
+FREE_SPACE_MARGIN = 0.05
+
+
+@dataclass
+class MediaInfo:
+    """Subset of ffprobe output used for planning and scheduling"""
+    path: str
+    size: int = 0
+    duration: float | None = None
+    bit_rate: int | None = None
+    width: int | None = None
+    height: int | None = None
+    video_codec: str | None = None
+    audio_codec: str | None = None
+    audio_bit_rate: int | None = None
+    streams: list = field(default_factory=list)
+
+    @property
+    def resolution_bucket(self):
+        return resolution_bucket(self.height)
+
+
+def find_ffprobe(ffmpeg_path):
+    """Locate ffprobe next to the given ffmpeg binary, falling back to PATH"""
+    if ffmpeg_path:
+        ffmpeg_file = Path(ffmpeg_path)
+        candidate = ffmpeg_file.with_name(ffmpeg_file.name.replace('ffmpeg', 'ffprobe'))
+        if candidate != ffmpeg_file and candidate.exists():
+            return str(candidate)
+    return shutil.which('ffprobe') or 'ffprobe'
+
+
+def resolution_bucket(height):
+    """Classify a frame height into sd/hd/fhd/uhd"""
+    if not height:
+        return 'fhd'
+    if height <= 576:
+        return 'sd'
+    if height <= 720:
+        return 'hd'
+    if height <= 1080:
+        return 'fhd'
+    return 'uhd'
+
+
+def probe_file(path, ffprobe_path='ffprobe'):
+    """Run ffprobe on a file and return a MediaInfo, or None if probing fails"""
+    try:
+        data = ffmpeg.probe(path, cmd=ffprobe_path)
+    except (ffmpeg.Error, OSError):
+        return None
+
+    fmt = data.get('format', {})
+    info = MediaInfo(path=path, streams=data.get('streams', []))
+
+    try:
+        info.size = int(fmt.get('size') or os.path.getsize(path))
+    except (OSError, ValueError):
+        info.size = 0
+    try:
+        info.duration = float(fmt['duration'])
+    except (KeyError, ValueError):
+        info.duration = None
+    try:
+        info.bit_rate = int(fmt['bit_rate'])
+    except (KeyError, ValueError):
+        info.bit_rate = None
+
+    for stream in info.streams:
+        codec_type = stream.get('codec_type')
+        if codec_type == 'video' and info.video_codec is None:
+            if stream.get('disposition', {}).get('attached_pic'):
+                continue
+            info.video_codec = stream.get('codec_name')
+            info.width = stream.get('width')
+            info.height = stream.get('height')
+        elif codec_type == 'audio' and info.audio_codec is None:
+            info.audio_codec = stream.get('codec_name')
+            try:
+                info.audio_bit_rate = int(stream['bit_rate'])
+            except (KeyError, ValueError):
+                info.audio_bit_rate = None
+
+    return info
+
+
+class SpeedHistory:
+    """Running averages of encode speed and output bitrate per codec/preset/resolution"""
+
+    def __init__(self, entries=None):
+        # key -> {'count': n, 'speed': media_s per wall_s, 'bitrate': output bits/s,
+        #         'bitrate_count': samples in the bitrate average (older entries: count)}
+        self.entries = entries or {}
+
+    @staticmethod
+    def key(video_codec, preset, bucket):
+        if video_codec == 'copy':
+            preset = None
+        return f"{video_codec}|{preset or '-'}|{bucket}"
+
+    def record(self, video_codec, preset, height, media_seconds, wall_seconds, output_bytes=None):
+        """Add one finished encode to the history.
+
+        With output_bytes None only the speed is recorded, e.g. for budgeted
+        encodes whose size was set by the budget rather than by the CRF.
+        """
+        if not media_seconds or not wall_seconds or media_seconds <= 0 or wall_seconds <= 0:
+            return
+        key = self.key(video_codec, preset, resolution_bucket(height))
+        entry = self.entries.setdefault(key, {'count': 0, 'speed': 0.0, 'bitrate': 0.0, 'bitrate_count': 0})
+        entry.setdefault('bitrate_count', entry['count'])
+        count = min(entry['count'], 49) + 1  # cap the weight so the average keeps adapting
+        entry['speed'] += (media_seconds / wall_seconds - entry['speed']) / count
+        entry['count'] += 1
+        if output_bytes is not None:
+            count = min(entry['bitrate_count'], 49) + 1
+            entry['bitrate'] += (output_bytes * 8 / media_seconds - entry['bitrate']) / count
+            entry['bitrate_count'] += 1
+
+    def lookup(self, video_codec, preset, bucket):
+        """Return the history entry for this combination, or None"""
+        return self.entries.get(self.key(video_codec, preset, bucket))
+
+    def to_json(self):
+        return json.dumps(self.entries)
+
+    @classmethod
+    def from_json(cls, text):
+        try:
+            entries = json.loads(text) if text else {}
+        except (TypeError, ValueError):
+            entries = {}
+        return cls(entries if isinstance(entries, dict) else {})
+
+
+@dataclass
+class JobEstimate:
+    """Estimated wall-time and output size for one file"""
+    input_file: str
+    output_file: str
+    media: MediaInfo | None
+    seconds: float | None
+    output_bytes: int | None
+    from_history: bool = False
+    codec_settings: dict | None = None  # per-file settings after encode rules
+
+
+@dataclass
+class VolumeCheck:
+    """Required versus available space on one output volume"""
+    path: str
+    required: int
+    free: int
+
+    @property
+    def sufficient(self):
+        return self.required <= self.free * (1 - FREE_SPACE_MARGIN)
+
+
+@dataclass
+class BatchPlan:
+    """Result of a dry-run planning pass over a batch"""
+    estimates: list
+    volumes: list
+    max_parallel: int = 1
+
+    @property
+    def total_seconds(self):
+        """Encode time of all jobs added up, as if they ran one after another"""
+        return sum(e.seconds or 0 for e in self.estimates)
+
+    @property
+    def wall_seconds(self):
+        """Batch wall time with max_parallel jobs at once, each starting in the first free slot"""
+        slots = [0.0] * max(1, self.max_parallel)
+        for estimate in self.estimates:
+            heapq.heappush(slots, heapq.heappop(slots) + (estimate.seconds or 0))
+        return max(slots)
+
+    @property
+    def total_bytes(self):
+        return sum(e.output_bytes or 0 for e in self.estimates)
+
+    @property
+    def unprobed(self):
+        return [e for e in self.estimates if e.media is None]
+
+    @property
+    def insufficient_volumes(self):
+        return [v for v in self.volumes if not v.sufficient]
+
+    def summary_lines(self):
+        wall_time = f"~{format_duration(self.wall_seconds)} wall time"
+        if self.max_parallel > 1:
+            wall_time += (f" with {self.max_parallel} parallel jobs "
+                          f"({format_duration(self.total_seconds)} encode time)")
+        lines = [
+            f"Planned {len(self.estimates)} files: {wall_time}, "
+            f"~{format_bytes(self.total_bytes)} output"
+        ]
+        for volume in self.volumes:
+            status = "OK" if volume.sufficient else "INSUFFICIENT"
+            lines.append(
+                f"  {volume.path}: needs {format_bytes(volume.required)}, "
+                f"{format_bytes(volume.free)} free [{status}]"
+            )
+        if self.unprobed:
+            lines.append(f"  {len(self.unprobed)} files could not be probed and are not estimated")
+        return lines
+
+
+def estimate_job(media, codec_settings, history):
+    """Estimate (seconds, output_bytes, from_history) for one probed file"""
+    if media is None or not media.duration:
+        return None, None, False
+
+    video_codec = codec_settings['video_codec']
+    preset = codec_settings.get('preset')
+    bucket = media.resolution_bucket
+    entry = history.lookup(video_codec, preset, bucket) if history else None
+
+    if entry:
+        seconds = media.duration / entry['speed']
+        if video_codec == 'copy':
+            output_bytes = media.size
+        elif codec_settings.get('video_bitrate'):
+            output_bytes = budgeted_bytes(media, codec_settings)
+        elif entry.get('bitrate_count', entry['count']):
+            output_bytes = int(entry['bitrate'] * media.duration / 8)
+        else:
+            # Only budgeted encodes so far, which say nothing about CRF bitrates
+            output_bytes = default_output_bytes(media, codec_settings)
+        return seconds, output_bytes, True
+
+    speed = DEFAULT_SPEED.get(video_codec, DEFAULT_SPEED['libx264']) * RESOLUTION_FACTOR[bucket]
+    seconds = media.duration / speed
+    if codec_settings.get('video_bitrate'):
+        # Storage-budget jobs are rate controlled to a known bitrate
+        return seconds, budgeted_bytes(media, codec_settings), False
+    return seconds, default_output_bytes(media, codec_settings), False
+
+
+def default_output_bytes(media, codec_settings):
+    """Output size of a CRF or copy job from typical bitrates, without history"""
+    if codec_settings['video_codec'] == 'copy':
+        video_bytes = media.size
+        audio_bytes = 0
+    else:
+        # Downscaled output is sized like a source of the target height
+        max_height = codec_settings.get('max_height')
+        output_bucket = (resolution_bucket(min(media.height, max_height)) if media.height and max_height
+                         else media.resolution_bucket)
+        bitrate = DEFAULT_VIDEO_BITRATE[output_bucket]
+        if codec_settings['video_codec'] == 'libx265':
+            bitrate *= 0.6
+        crf = codec_settings.get('crf')
+        if crf is not None:
+            # Roughly halves/doubles every 6 CRF steps
+            bitrate *= 2 ** ((23 - crf) / 6)
+        video_bytes = int(bitrate * media.duration / 8)
+        if codec_settings['audio_codec'] == 'copy':
+            audio_bytes = int((media.audio_bit_rate or DEFAULT_AUDIO_BITRATE) * media.duration / 8)
+        else:
+            audio_bytes = int(DEFAULT_AUDIO_BITRATE * media.duration / 8)
+    return video_bytes + audio_bytes
+
+
+def budgeted_bytes(media, codec_settings):
+    """Output size of a job encoded at codec_settings['video_bitrate']"""
+    if codec_settings['audio_codec'] == 'copy':
+        audio_bitrate = media.audio_bit_rate or DEFAULT_AUDIO_BITRATE
+    else:
+        audio_bitrate = DEFAULT_AUDIO_BITRATE
+    return int((codec_settings['video_bitrate'] + audio_bitrate) * media.duration / 8)
+
+
+def existing_parent(path):
+    """Return the nearest existing directory containing the given path"""
+    current = Path(path).resolve().parent
+    while not current.exists() and current != current.parent:
+        current = current.parent
+    return current
+
+
+def check_free_space(estimates):
+    """Group estimated output bytes by volume and compare with free space"""
+    volumes = {}
+    for estimate in estimates:
+        directory = existing_parent(estimate.output_file)
+        try:
+            device = os.stat(directory).st_dev
+        except OSError:
+            continue
+        if device not in volumes:
+            try:
+                free = shutil.disk_usage(directory).free
+            except OSError:
+                continue
+            volumes[device] = VolumeCheck(str(directory), 0, free)
+        volumes[device].required += estimate.output_bytes or 0
+    return list(volumes.values())
+
+
+def plan_batch(files, codec_settings, history, ffprobe_path='ffprobe', probe_cache=None, rules=None,
+               should_stop=None, max_parallel=1):
+    """Probe each (input, output) pair and build a BatchPlan.
+
+    probe_cache is an optional dict of path -> MediaInfo that is read and updated.
+    rules (see mkv2mp4ui.rules) adjust codec_settings per file; the result is
+    stored in each estimate's codec_settings. should_stop is checked before
+    each probe; once it returns True, planning ends and None is returned.
+    max_parallel is the number of jobs that will run at once, for the wall time.
+    """
+    if probe_cache is None:
+        probe_cache = {}
+
+    estimates = []
+    for input_file, output_file in files:
+        if should_stop is not None and should_stop():
+            return None
+        media = probe_cache.get(input_file)
+        if media is None:
+            media = probe_file(input_file, ffprobe_path)
+            if media is not None:
+                probe_cache[input_file] = media
+        settings = codec_settings
+        if rules:
+            settings = plan_file(rules, input_file, media.size if media else None, media, codec_settings).codec_settings
+        seconds, output_bytes, from_history = estimate_job(media, settings, history)
+        estimates.append(JobEstimate(input_file, output_file, media, seconds, output_bytes, from_history,
+                                     settings))
+
+    return BatchPlan(estimates, check_free_space(estimates), max_parallel)
+
+
+def format_duration(seconds):
+    """Format seconds as e.g. '2d 03:04:05'"""
+    seconds = int(seconds or 0)
+    days, rest = divmod(seconds, 86400)
+    hours, rest = divmod(rest, 3600)
+    minutes, secs = divmod(rest, 60)
+    text = f"{hours:02d}:{minutes:02d}:{secs:02d}"
+    return f"{days}d {text}" if days else text
+
+
+def format_bytes(num_bytes):
+    """Format a byte count using binary units"""
+    value = float(num_bytes or 0)
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if abs(value) < 1024 or unit == 'TB':
+            return f"{value:.1f} {unit}"
+        value /= 1024
@@ -0,0 +1,202 @@
+"""
+Preflight trial encodes.
+
+Before a batch starts, the first few seconds of every file are converted
+with the job's real command line into a temporary folder, several files at
+a time. FFmpeg's output is classified so that doomed jobs either get a
+setting that works (transcoding instead of copying a stream the MP4 muxer
+rejects, forcing yuv420p, dropping subtitles) or are rejected, instead of
+failing hours into the batch.
+"""
+import asyncio
+import dataclasses
+import re
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+from mkv2mp4ui.engine import ConversionEngine, read_lines
+from mkv2mp4ui.planner import probe_file, find_ffprobe
+from mkv2mp4ui.sidecars import SUBS_NONE, THUMB_NONE
+
+
+TRIAL_SECONDS = 5
+TRIAL_TIMEOUT = 60  # seconds; a trial that takes longer counts as failed
+MAX_ATTEMPTS = 3  # the original settings plus up to two fixes
+
+ACTION_OK = "ok"
+ACTION_FIXED = "fixed"
+ACTION_REJECT = "reject"
+
+# (category, pattern) in the order they are checked
+ERROR_PATTERNS = [
+    ("container", re.compile(r"codec not currently supported in container|Could not find tag for codec"
+                             r"|incompatible with output codec id|not supported by the mp4 muxer", re.I)),
+    ("subtitles", re.compile(r"Subtitle encoding currently only possible from text to text or bitmap to bitmap"
+                             r"|subtitle codec \S+ is not supported|Error initializing output stream.*subtitle",
+                             re.I)),
+    ("pixel_format", re.compile(r"Incompatible pixel format|pixel format \S+ is invalid or not supported"
+                                r"|height not divisible by 2|width not divisible by 2"
+                                r"|not supported by the \S+ encoder|Unsupported pix_fmt", re.I)),
+    ("timestamps", re.compile(r"non monotonically increasing dts|Non-monotonous DTS"
+                              r"|Can't write packet with unknown timestamp", re.I)),
+    ("encoder", re.compile(r"Unknown encoder|Encoder not found|Error while opening encoder", re.I)),
+    ("input", re.compile(r"Invalid data found when processing input|moov atom not found"
+                         r"|EBML header parsing failed|No such file or directory", re.I)),
+    ("disk", re.compile(r"No space left on device|Permission denied|Read-only file system", re.I)),
+]
+
+CODEC_IN_MESSAGE = re.compile(r"codec (\w+)", re.I)
+
+
+@dataclass
+class PreflightResult:
+    action: str = ACTION_OK
+    category: str | None = None
+    message: str = ""
+    codec_settings: dict | None = None  # settings to convert with; changed when action is ACTION_FIXED
+    fixes: list = dataclasses.field(default_factory=list)
+
+    def summary(self):
+        if self.action == ACTION_OK:
+            return "preflight passed"
+        if self.action == ACTION_FIXED:
+            return "preflight: " + ", ".join(self.fixes)
+        return f"preflight rejected ({self.category or 'error'}): {self.message}"
+
+
+def classify(output, return_code):
+    """Return (category, message) for a failed trial, or (None, '') if it succeeded"""
+    lines = [line for line in output if line.strip()]
+    for category, pattern in ERROR_PATTERNS:
+        for line in lines:
+            if pattern.search(line):
+                # Timestamp warnings only matter if the trial actually failed
+                if category == "timestamps" and return_code == 0:
+                    break
+                return category, line.strip()
+    if return_code != 0:
+        errors = [line for line in lines if "error" in line.lower()]
+        return "unknown", (errors or lines or [f"exit code {return_code}"])[-1].strip()
+    return None, ""
+
+
+def fix_for(category, message, settings, media):
+    """Settings that avoid the classified problem, with a description, or (None, None)"""
+    fixed = dict(settings)
+    if category in ("container", "timestamps"):
+        # Re-encode the stream that cannot be copied. Unless the message names the
+        # video codec, try the audio first: transcoding it is cheap, video is not.
+        named = CODEC_IN_MESSAGE.search(message)
+        codec = named.group(1).lower() if named else None
+        video_copy = settings.get('video_codec') == 'copy'
+        audio_copy = settings.get('audio_codec') == 'copy'
+        video_named = media is not None and codec is not None and codec == (media.video_codec or "").lower()
+        if audio_copy and not video_named:
+            fixed['audio_codec'] = 'aac'
+            return fixed, "audio copy -> aac"
+        if video_copy:
+            fixed.update(video_codec='libx264', crf=23, preset='medium')
+            return fixed, "video copy -> libx264"
+        return None, None
+    if category == "pixel_format" and settings.get('video_codec') != 'copy' and not settings.get('pix_fmt'):
+        fixed['pix_fmt'] = 'yuv420p'
+        return fixed, "forcing yuv420p"
+    if category == "subtitles" and settings.get('subtitles') != SUBS_NONE:
+        fixed['subtitles'] = SUBS_NONE
+        fixed['image_subtitles'] = False
+        return fixed, "dropping subtitles"
+    return None, None
+
+
+async def run_trial(engine, job, settings, work_dir, seconds, timeout):
+    """Convert the first seconds of a job; returns (output lines, return code)"""
+    trial_output = Path(work_dir) / f"{job.id}-{Path(job.output_file).name}"
+    # Thumbnails are taken past the trial window, so leave them out
+    trial_job = dataclasses.replace(job, output_file=str(trial_output),
+                                    codec_settings=dict(settings, thumbnails=THUMB_NONE),
+                                    extra={'media': job.extra.get('media')})
+    cmd = engine.build_command(trial_job)
+    # Input options: bound how much of the source is read, and never wait on stdin
+    cmd[1:1] = ['-nostdin', '-t', str(seconds)]
+
+    process = await asyncio.create_subprocess_exec(
+        *cmd, stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT)
+    output = []
+
+    async def collect():
+        async for line in read_lines(process.stdout):
+            output.append(line)
+        return await process.wait()
+
+    try:
+        return_code = await asyncio.wait_for(collect(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        output.append(f"trial did not finish within {timeout}s")
+        return_code = -1
+    except asyncio.CancelledError:
+        # Preflight was abandoned (e.g. the window closed); don't leave the trial running
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    return output, return_code
+
+
+async def preflight_job(engine, job, work_dir, seconds=TRIAL_SECONDS, timeout=TRIAL_TIMEOUT):
+    """Trial-convert one job, applying fixes until it passes or cannot be fixed"""
+    result = PreflightResult(codec_settings=dict(job.codec_settings))
+    media = job.extra.get('media')
+    for _ in range(MAX_ATTEMPTS):
+        output, return_code = await run_trial(engine, job, result.codec_settings, work_dir, seconds, timeout)
+        category, message = classify(output, return_code)
+        if category is None:
+            result.action = ACTION_FIXED if result.fixes else ACTION_OK
+            return result
+        result.category, result.message = category, message
+        fixed, description = fix_for(category, message, result.codec_settings, media)
+        if fixed is None:
+            break
+        result.codec_settings = fixed
+        result.fixes.append(description)
+    result.action = ACTION_REJECT
+    return result
+
+
+async def preflight_batch(jobs, ffmpeg_path, max_parallel=4, seconds=TRIAL_SECONDS, timeout=TRIAL_TIMEOUT,
+                          probe_media=False):
+    """Trial-convert jobs in parallel; returns {job.id: PreflightResult}.
+
+    With probe_media, jobs without job.extra['media'] are probed first (and
+    keep the result), so trials map streams like the real conversion will.
+    """
+    engine = ConversionEngine(ffmpeg_path)
+    semaphore = asyncio.Semaphore(max(1, max_parallel))
+    work_dir = tempfile.mkdtemp(prefix="mkv2mp4ui-preflight-")
+    loop = asyncio.get_running_loop()
+
+    async def bounded(job):
+        async with semaphore:
+            try:
+                if probe_media and job.extra.get('media') is None:
+                    job.extra['media'] = await loop.run_in_executor(
+                        None, probe_file, job.input_file, find_ffprobe(ffmpeg_path))
+                return job.id, await preflight_job(engine, job, work_dir, seconds, timeout)
+            except Exception as e:
+                return job.id, PreflightResult(ACTION_REJECT, "error", str(e), dict(job.codec_settings))
+
+    tasks = [asyncio.ensure_future(bounded(job)) for job in jobs]
+    try:
+        return dict(await asyncio.gather(*tasks))
+    except asyncio.CancelledError:
+        # Let every trial kill and reap its FFmpeg before the loop goes away
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,199 @@
+"""
+Built-in profiling mode.
+
+Enabled with ``mkv2mp4ui --profile`` or the MKV2MP4UI_PROFILE environment
+variable. Code marks its stages with ``profiler.stage(name)`` or the
+``@profiled(name)`` decorator. They record call counts and wall time and
+cost next to nothing while profiling is off. Optionally, cProfile ("cpu")
+and tracemalloc ("memory") run as well. A report of all of it is written
+when the process exits:
+
+    mkv2mp4ui --profile                         # stage timings to stderr
+    mkv2mp4ui --profile=cpu,memory --profile-output=profile.txt
+    MKV2MP4UI_PROFILE=cpu MKV2MP4UI_PROFILE_OUTPUT=profile.txt mkv2mp4ui
+
+With an output file and "cpu", the raw cProfile data is also saved next to
+it as <output>.prof for snakeviz or pstats.
+"""
+import atexit
+import functools
+import io
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+
+
+PROFILE_ENV = "MKV2MP4UI_PROFILE"
+PROFILE_OUTPUT_ENV = "MKV2MP4UI_PROFILE_OUTPUT"
+CPROFILE_LINES = 40  # functions listed from the cProfile capture
+TRACEMALLOC_LINES = 20  # allocation sites listed from the tracemalloc capture
+TRACEMALLOC_FRAMES = 5
+
+_DISABLED = nullcontext()
+
+
+@dataclass
+class StageStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class _Stage:
+    """Times one pass through a stage"""
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    """Per-stage timings plus optional cProfile/tracemalloc captures"""
+
+    def __init__(self):
+        self.enabled = False
+        self.stats = {}  # stage name -> StageStats
+        self._lock = threading.Lock()  # stages are recorded from worker threads too
+        self._started = None
+        self._cprofile = None
+        self._tracemalloc = False
+        self.output = None
+
+    def enable(self, cpu=False, memory=False, output=None):
+        if self.enabled:
+            return
+        self.enabled = True
+        self.output = output
+        self._started = time.perf_counter()
+        if memory:
+            import tracemalloc
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._tracemalloc = True
+        if cpu:
+            # Only the thread that enables it (the GUI thread) is profiled;
+            # worker threads show up in the stage timings
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        atexit.register(self.dump)
+
+    def stage(self, name):
+        """Context manager timing one pass through a stage"""
+        return _Stage(self, name) if self.enabled else _DISABLED
+
+    def record(self, name, seconds):
+        with self._lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = StageStats()
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+
+    def report(self):
+        """The profiling report as text"""
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        lines = [f"mkv2mp4ui profile: {elapsed:.2f}s wall time", ""]
+        with self._lock:
+            stages = sorted(self.stats.items(), key=lambda item: item[1].total, reverse=True)
+        name_width = max([len(name) for name, _ in stages] + [5])
+        lines.append(f"{'Stage':<{name_width}}  {'Calls':>8}  {'Total s':>9}  {'Mean ms':>9}  {'Max ms':>9}")
+        for name, stats in stages:
+            lines.append(f"{name:<{name_width}}  {stats.count:>8}  {stats.total:>9.3f}  "
+                         f"{stats.mean * 1000:>9.3f}  {stats.max * 1000:>9.3f}")
+        if not stages:
+            lines.append("(no stages recorded)")
+
+        if self._tracemalloc:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            lines += ["", f"Memory: {current / 1024 / 1024:.1f} MiB traced now, {peak / 1024 / 1024:.1f} MiB peak",
+                      f"Top {TRACEMALLOC_LINES} allocation sites:"]
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ])
+            for statistic in snapshot.statistics('lineno')[:TRACEMALLOC_LINES]:
+                lines.append(f"  {statistic}")
+
+        if self._cprofile is not None:
+            import pstats
+            self._cprofile.disable()
+            stream = io.StringIO()
+            pstats.Stats(self._cprofile, stream=stream).sort_stats('cumulative').print_stats(CPROFILE_LINES)
+            lines += ["", "cProfile (GUI thread, by cumulative time):", stream.getvalue().rstrip()]
+            self._cprofile.enable()
+        return "\n".join(lines) + "\n"
+
+    def dump(self):
+        """Write the report to the output file, or stderr"""
+        if not self.enabled:
+            return
+        report = self.report()
+        if not self.output:
+            sys.stderr.write(report)
+            return
+        try:
+            with open(self.output, 'w', encoding='utf-8') as f:
+                f.write(report)
+            if self._cprofile is not None:
+                self._cprofile.dump_stats(self.output + ".prof")
+            sys.stderr.write(f"Profile written to {self.output}\n")
+        except OSError as e:
+            sys.stderr.write(f"Could not write profile to {self.output}: {e}\n{report}")
+
+
+profiler = Profiler()
+
+
+def profiled(name):
+    """Decorator recording every call of a function as a stage"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with _Stage(profiler, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def parse_profile_args(argv):
+    """Enable profiling from --profile[=cpu,memory] / --profile-output=FILE or the
+    environment; returns argv without those options"""
+    modes = os.environ.get(PROFILE_ENV)
+    output = os.environ.get(PROFILE_OUTPUT_ENV)
+    remaining = []
+    for arg in argv:
+        if arg == '--profile':
+            modes = modes or "1"
+        elif arg.startswith('--profile='):
+            modes = arg.split('=', 1)[1] or "1"
+        elif arg.startswith('--profile-output='):
+            output = arg.split('=', 1)[1]
+        else:
+            remaining.append(arg)
+
+    if modes and modes.lower() not in ("0", "false", "no", "off"):
+        captures = {mode.strip().lower() for mode in modes.split(',')}
+        profiler.enable(cpu=bool(captures & {'cpu', 'cprofile', 'all'}),
+                        memory=bool(captures & {'memory', 'tracemalloc', 'all'}),
+                        output=output)
+    return remaining
@@ -0,0 +1,131 @@
+"""
+Persisted registry of the resolved FFmpeg binary and its capabilities.
+
+The registry records the binary's path, version and the encoders, hwaccels
+and muxers it was built with. It is only re-queried when the binary's
+modification time or size changes, so a normal startup does not need to
+spawn any FFmpeg subprocesses.
+"""
+import json
+import os
+import subprocess
+from dataclasses import dataclass, field, asdict
+
+
+# Encoders the UI knows how to drive with -crf/-preset, in display order
+VIDEO_ENCODERS = ["libx264", "libx265"]
+
+# UI audio codec name -> encoder names that provide it
+AUDIO_ENCODERS = {
+    "aac": ["aac", "libfdk_aac"],
+    "mp3": ["libmp3lame", "mp3_mf"],
+}
+
+QUERY_TIMEOUT = 15  # seconds per ffmpeg query
+
+
+@dataclass
+class FFmpegCapabilities:
+    """What one FFmpeg binary can do, keyed to its file identity"""
+    path: str
+    mtime_ns: int
+    size: int
+    version: str = ""
+    encoders: list = field(default_factory=list)
+    hwaccels: list = field(default_factory=list)
+    muxers: list = field(default_factory=list)
+
+    def is_current(self):
+        """True if the binary on disk is still the one that was queried"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return stat.st_mtime_ns == self.mtime_ns and stat.st_size == self.size
+
+    def has_encoder(self, name):
+        return name in self.encoders
+
+    def video_codecs(self):
+        """Video codec choices for the UI: available known encoders plus copy"""
+        return [name for name in VIDEO_ENCODERS if self.has_encoder(name)] + ["copy"]
+
+    def audio_codecs(self):
+        """Audio codec choices for the UI: available known encoders plus copy"""
+        available = [name for name, encoders in AUDIO_ENCODERS.items()
+                     if any(self.has_encoder(e) for e in encoders)]
+        return available + ["copy"]
+
+
+def run_ffmpeg_query(path, *args):
+    result = subprocess.run([path, '-hide_banner', *args], capture_output=True, text=True,
+                            timeout=QUERY_TIMEOUT)
+    return result.stdout
+
+
+def parse_table(output):
+    """Yield (flags, name) rows following the dashed separator in -encoders/-muxers output"""
+    in_table = False
+    for line in output.splitlines():
+        stripped = line.strip()
+        if not in_table:
+            in_table = bool(stripped) and set(stripped) == {'-'}
+            continue
+        parts = stripped.split(None, 2)
+        if len(parts) >= 2:
+            yield parts[0], parts[1]
+
+
+def query_capabilities(path):
+    """Run ffmpeg to discover version, encoders, hwaccels and muxers"""
+    stat = os.stat(path)
+    caps = FFmpegCapabilities(path=str(path), mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+
+    version_output = run_ffmpeg_query(path, '-version')
+    first_line = version_output.splitlines()[0] if version_output else ""
+    if first_line.startswith('ffmpeg version '):
+        caps.version = first_line.split(' Copyright')[0][len('ffmpeg version '):].strip()
+
+    caps.encoders = [name for _, name in parse_table(run_ffmpeg_query(path, '-encoders'))]
+
+    hwaccel_output = run_ffmpeg_query(path, '-hwaccels').splitlines()
+    caps.hwaccels = [line.strip() for line in hwaccel_output[1:] if line.strip()]
+
+    muxers = []
+    for flags, names in parse_table(run_ffmpeg_query(path, '-muxers')):
+        if 'E' in flags:
+            muxers.extend(names.split(','))
+    caps.muxers = muxers
+    return caps
+
+
+class FFmpegRegistry:
+    """Load/store FFmpegCapabilities as JSON (kept in QSettings by the GUI)"""
+
+    def __init__(self, capabilities=None):
+        self.capabilities = capabilities
+
+    def current(self):
+        """Cached capabilities if the binary is unchanged, otherwise None"""
+        if self.capabilities and self.capabilities.is_current():
+            return self.capabilities
+        return None
+
+    def register(self, path):
+        """Query a binary (only if it changed) and remember it"""
+        if (self.capabilities and os.path.normcase(self.capabilities.path) == os.path.normcase(str(path))
+                and self.capabilities.is_current()):
+            return self.capabilities
+        self.capabilities = query_capabilities(path)
+        return self.capabilities
+
+    def to_json(self):
+        return json.dumps(asdict(self.capabilities)) if self.capabilities else ""
+
+    @classmethod
+    def from_json(cls, text):
+        try:
+            data = json.loads(text) if text else None
+            return cls(FFmpegCapabilities(**data) if data else None)
+        except (TypeError, ValueError):
+            return cls()
@@ -0,0 +1,75 @@
+"""
+End-of-batch report: per-job outcome and verification results, written as JSON.
+"""
+import json
+from datetime import datetime
+from pathlib import Path
+
+from mkv2mp4ui.jobqueue import JobStatus
+
+
+REPORT_PREFIX = "mkv2mp4ui-report"
+
+
+class BatchReport:
+    """Collects finished jobs into a summary and a JSON file"""
+
+    def __init__(self, jobs, started_at=None):
+        self.jobs = list(jobs)
+        self.started_at = started_at
+        self.finished_at = datetime.now()
+
+    def job_entry(self, job):
+        entry = {
+            'input': job.input_file,
+            'output': job.output_file,
+            'status': job.status,
+            'message': job.message,
+            'codec_settings': job.codec_settings,
+            'sidecars': job.extra.get('sidecars', []),
+        }
+        verification = job.extra.get('verification')
+        if verification is not None:
+            entry['verification'] = {
+                'tier': verification.tier,
+                'ok': verification.ok,
+                'problems': verification.problems,
+                'seconds': round(verification.seconds, 2),
+            }
+        return entry
+
+    def counts(self):
+        counts = {}
+        for job in self.jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def failed_verifications(self):
+        return [job for job in self.jobs
+                if job.extra.get('verification') is not None and not job.extra['verification'].ok]
+
+    def summary_lines(self):
+        counts = self.counts()
+        parts = [f"{counts.get(status, 0)} {status.lower()}"
+                 for status in (JobStatus.DONE, JobStatus.FAILED, JobStatus.CANCELLED)]
+        lines = [f"Batch report: {len(self.jobs)} jobs, " + ", ".join(parts)]
+        verified = [job for job in self.jobs if job.extra.get('verification') is not None]
+        if verified:
+            lines.append(f"  Verified {len(verified)} outputs, {len(self.failed_verifications())} failed verification")
+        for job in self.failed_verifications():
+            lines.append(f"  {Path(job.output_file).name}: {job.extra['verification'].summary()}")
+        return lines
+
+    def to_dict(self):
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds') if self.started_at else None,
+            'finished_at': self.finished_at.isoformat(timespec='seconds'),
+            'counts': self.counts(),
+            'jobs': [self.job_entry(job) for job in self.jobs],
+        }
+
+    def write(self, directory):
+        """Write the report into directory and return its path"""
+        path = Path(directory) / f"{REPORT_PREFIX}-{self.finished_at:%Y%m%d-%H%M%S}.json"
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+        return str(path)
@@ -0,0 +1,201 @@
+"""
+Rules that pick encode settings per file from its probed properties.
+
+One rule per line, "<conditions> => <settings>"; '#' starts a comment:
+
+    height<=576                 => preset=veryfast crf=22
+    height>=2160 size>20GB      => video=libx265 crf=24 preset=slow
+    height>1080                 => max_height=1080
+    path:*/Anime/*              => crf=20
+    video:hevc bitrate<8mbps    => video=copy
+
+Conditions are whitespace-separated and must all match: comparisons on
+height, width, size, duration and bitrate (with units such as GB, h, mbps),
+"video:"/"audio:" codec matches, and "path:"/"name:" globs. "*" matches
+every file. Every matching rule is applied in order on top of the global
+settings, so later rules override earlier ones.
+"""
+import re
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from pathlib import Path
+
+
+# Shared by the file list filter and FFmpeg's stats parsing; sizes are binary either way
+SIZE_UNITS = {'b': 1, 'kb': 1024, 'mb': 1024 ** 2, 'gb': 1024 ** 3, 'tb': 1024 ** 4,
+              'kib': 1024, 'mib': 1024 ** 2, 'gib': 1024 ** 3, 'tib': 1024 ** 4}
+TIME_UNITS = {'s': 1, 'm': 60, 'min': 60, 'h': 3600}
+BITRATE_UNITS = {'bps': 1, 'kbps': 1000, 'mbps': 1000 ** 2}
+PIXEL_UNITS = {'p': 1}
+
+COMPARISON_RE = re.compile(
+    r'^(?:(height|width|size|duration|dur|bitrate)\s*)?(<=|>=|<|>|=)\s*(\d+(?:\.\d+)?)\s*([a-z]*)$'
+)
+FIELD_UNITS = {
+    'height': PIXEL_UNITS,
+    'width': PIXEL_UNITS,
+    'size': SIZE_UNITS,
+    'duration': TIME_UNITS,
+    'dur': TIME_UNITS,
+    'bitrate': BITRATE_UNITS,
+}
+
+# Setting names accepted after "=>", with their codec_settings key and type
+SETTINGS = {
+    'video': ('video_codec', str),
+    'video_codec': ('video_codec', str),
+    'audio': ('audio_codec', str),
+    'audio_codec': ('audio_codec', str),
+    'crf': ('crf', int),
+    'preset': ('preset', str),
+    'max_height': ('max_height', int),
+    'pix_fmt': ('pix_fmt', str),
+}
+
+
+@dataclass
+class Rule:
+    text: str
+    conditions: list = field(default_factory=list)  # (field, op, value)
+    settings: dict = field(default_factory=dict)  # codec_settings overrides
+
+    def matches(self, path, size, media):
+        for name, op, value in self.conditions:
+            if name == 'path':
+                ok = fnmatch(path.replace('\\', '/').lower(), value)
+            elif name == 'name':
+                ok = fnmatch(Path(path).name.lower(), value)
+            elif name == 'video':
+                ok = media is not None and value in (media.video_codec or '').lower()
+            elif name == 'audio':
+                ok = media is not None and value in (media.audio_codec or '').lower()
+            elif name == 'size':
+                ok = compare(size or (media.size if media else None), op, value)
+            else:
+                # Probed properties; an unprobed file never matches them
+                actual = getattr(media, 'bit_rate' if name == 'bitrate' else name, None) if media else None
+                ok = compare(actual, op, value)
+            if not ok:
+                return False
+        return True
+
+
+@dataclass
+class FilePlan:
+    """Settings chosen for one file and the rules that produced them"""
+    codec_settings: dict
+    rules: list = field(default_factory=list)
+
+    def summary(self):
+        """Short description for the file list, e.g. 'libx265 crf 24 slow, ≤1080p'"""
+        settings = self.codec_settings
+        parts = [settings.get('video_codec') or '?']
+        if settings.get('video_codec') != 'copy':
+            if settings.get('crf') is not None:
+                parts.append(f"crf {settings['crf']}")
+            if settings.get('preset'):
+                parts.append(settings['preset'])
+        text = " ".join(parts)
+        if settings.get('max_height') and settings.get('video_codec') != 'copy':
+            text += f", ≤{settings['max_height']}p"
+        if settings.get('audio_codec') == 'copy':
+            text += ", audio copy"
+        return text
+
+
+def compare(actual, op, expected):
+    if actual is None:
+        return False
+    if op == '<':
+        return actual < expected
+    if op == '<=':
+        return actual <= expected
+    if op == '>':
+        return actual > expected
+    if op == '>=':
+        return actual >= expected
+    return actual == expected
+
+
+def parse_comparison(token, infer_field=False):
+    """Parse e.g. 'size>20gb' into ('size', '>', bytes), or return None if token isn't a comparison.
+
+    Values are converted to bytes, seconds, bits/s or pixels. With infer_field,
+    the field may be left out and follows from the unit ('>10gb', '<30m').
+    An unknown unit raises ValueError.
+    """
+    match = COMPARISON_RE.match(token)
+    if not match:
+        return None
+    name, op, number, unit = match.groups()
+    if name is None:
+        if not infer_field:
+            return None
+        name = 'duration' if unit in TIME_UNITS else 'size'
+    name = 'duration' if name == 'dur' else name
+    units = FIELD_UNITS[name]
+    if unit and unit not in units:
+        raise ValueError(f"unknown unit '{unit}' for {name}")
+    return (name, op, float(number) * (units[unit] if unit else 1))
+
+
+def parse_condition(token):
+    comparison = parse_comparison(token)
+    if comparison is not None:
+        return comparison
+    name, colon, value = token.partition(':')
+    if colon and name in ('video', 'audio', 'path', 'name') and value:
+        return (name, ':', value)
+    raise ValueError(f"cannot understand condition '{token}'")
+
+
+def parse_settings(text):
+    settings = {}
+    for token in text.split():
+        name, equals, value = token.partition('=')
+        if not equals or name.lower() not in SETTINGS:
+            raise ValueError(f"unknown setting '{token}' (use {', '.join(sorted(SETTINGS))})")
+        key, kind = SETTINGS[name.lower()]
+        try:
+            settings[key] = kind(value)
+        except ValueError:
+            raise ValueError(f"'{value}' is not a valid {name}") from None
+    if not settings:
+        raise ValueError("no settings after '=>'")
+    return settings
+
+
+def parse_rules(text):
+    """Parse rule text into Rules; raises ValueError naming the bad line"""
+    rules = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        conditions, arrow, settings = line.partition('=>')
+        try:
+            if not arrow:
+                raise ValueError("expected '<conditions> => <settings>'")
+            tokens = [t for t in conditions.lower().split() if t != '*']
+            rules.append(Rule(line, [parse_condition(t) for t in tokens], parse_settings(settings)))
+        except ValueError as e:
+            raise ValueError(f"line {number}: {e}") from None
+    return rules
+
+
+def plan_file(rules, path, size, media, codec_settings):
+    """Apply every matching rule, in order, on top of codec_settings"""
+    settings = dict(codec_settings)
+    matched = []
+    for rule in rules:
+        if rule.matches(path, size, media):
+            settings.update(rule.settings)
+            matched.append(rule.text)
+    if settings.get('video_codec') == 'copy':
+        settings['crf'] = settings['preset'] = None
+    else:
+        # A rule may have switched a copy job to transcoding; fill in the usual defaults
+        if settings.get('crf') is None:
+            settings['crf'] = 23
+        settings['preset'] = settings.get('preset') or 'medium'
+    return FilePlan(settings, matched)
@@ -0,0 +1,103 @@
+"""
+I/O-aware job admission.
+
+Each job's input and output are mapped to the physical device (or network
+share) they live on. Stream-copy remuxes are pure I/O, so only a limited
+number of them may touch the same device at once. Transcodes are CPU-bound
+and can fill the remaining slots from any device.
+"""
+import os
+import sys
+import threading
+from pathlib import Path
+
+
+_device_cache = {}
+_device_lock = threading.Lock()
+
+
+def _existing_path(path):
+    current = Path(path)
+    while not current.exists() and current != current.parent:
+        current = current.parent
+    return current
+
+
+def _linux_block_device(major, minor):
+    """Whole-disk name for a block device, so partitions of one disk group together"""
+    sys_path = f"/sys/dev/block/{major}:{minor}"
+    if not os.path.exists(sys_path):
+        return None
+    real = os.path.realpath(sys_path)
+    if os.path.exists(os.path.join(real, "partition")):
+        real = os.path.dirname(real)
+    return os.path.basename(real)
+
+
+def _linux_mount_source(major, minor):
+    """Mount source (e.g. 'nas:/media' or '//server/share') for non-block filesystems"""
+    try:
+        with open("/proc/self/mountinfo") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) > 2 and fields[2] == f"{major}:{minor}" and " - " in line:
+                    after = line.split(" - ", 1)[1].split()
+                    if len(after) >= 2:
+                        return after[1]
+    except OSError:
+        pass
+    return None
+
+
+def device_id(path):
+    """Identify the physical device holding path (or its nearest existing parent)"""
+    try:
+        dev = os.stat(_existing_path(path)).st_dev
+    except OSError:
+        return None
+
+    with _device_lock:
+        if dev in _device_cache:
+            return _device_cache[dev]
+
+    name = None
+    if sys.platform.startswith("linux"):
+        major, minor = os.major(dev), os.minor(dev)
+        name = _linux_block_device(major, minor) or _linux_mount_source(major, minor)
+    # Elsewhere st_dev (the volume serial number on Windows) is the best key available
+    name = name or f"dev:{dev}"
+
+    with _device_lock:
+        _device_cache[dev] = name
+    return name
+
+
+def is_io_heavy(job):
+    """Stream-copy jobs do almost no CPU work; their speed is bound by the disks"""
+    return job.codec_settings.get('video_codec') == 'copy'
+
+
+def job_devices(job):
+    """Devices a job reads from and writes to, cached on the job"""
+    devices = job.extra.get('devices')
+    if devices is None:
+        devices = {d for d in (device_id(job.input_file), device_id(job.output_file)) if d}
+        job.extra['devices'] = devices
+    return devices
+
+
+class IOScheduler:
+    """Admit jobs while respecting a per-device cap on concurrent I/O-heavy jobs"""
+
+    def __init__(self, max_io_jobs_per_device=1):
+        self.max_io_jobs_per_device = max_io_jobs_per_device
+
+    def admits(self, job, running_jobs):
+        if not is_io_heavy(job):
+            return True
+        busy = {}
+        for other in running_jobs:
+            if is_io_heavy(other):
+                for device in job_devices(other):
+                    busy[device] = busy.get(device, 0) + 1
+        return all(busy.get(device, 0) < self.max_io_jobs_per_device for device in job_devices(job))
@@ -0,0 +1,167 @@
+"""
+Extra outputs produced by the same FFmpeg run as the MP4.
+
+MP4 can carry text subtitles (as mov_text) and chapters, but not image
+subtitles. Rather than dropping those, or reading a multi-GB source a second
+time, the conversion command gets additional outputs: sidecar SRT files,
+image subtitles copied to .sup (PGS) or .mks (VobSub, which FFmpeg cannot
+write as .sub/.idx), and a poster and/or contact sheet cut from a split of
+the decoded video.
+
+Sidecar files that already exist (the user's own subtitles, or thumbnails
+from an earlier run) are kept rather than overwritten.
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+SUBS_EMBED = "mov_text"  # text subtitles into the MP4
+SUBS_SRT = "srt"  # text subtitles as sidecar .srt files
+SUBS_BOTH = "both"
+SUBS_NONE = "none"
+
+THUMB_NONE = "none"
+THUMB_POSTER = "poster"
+THUMB_SHEET = "sheet"
+THUMB_BOTH = "both"
+
+TEXT_SUBTITLE_CODECS = {'subrip', 'ass', 'ssa', 'webvtt', 'mov_text', 'text'}
+IMAGE_SUBTITLE_SUFFIXES = {
+    'hdmv_pgs_subtitle': '.sup',
+    'dvd_subtitle': '.mks',
+}
+
+POSTER_POSITION = 0.1  # fraction of the duration, past most intros and black frames
+POSTER_WIDTH = 640
+SHEET_COLUMNS = 4
+SHEET_ROWS = 4
+SHEET_TILE_WIDTH = 320
+
+
+@dataclass
+class SidecarPlan:
+    """Command-line pieces for the MP4 output plus any extra outputs"""
+    filter_complex: str | None = None
+    main_args: list = field(default_factory=list)  # -map and subtitle/chapter options for the MP4
+    extra_outputs: list = field(default_factory=list)  # full argument lists, each ending in its file
+    files: list = field(default_factory=list)  # every sidecar file the command writes
+    kept: list = field(default_factory=list)  # sidecars skipped because the file already exists
+
+
+def sidecar_path(output_file, stream, suffix, used):
+    """'Movie.eng.srt', 'Movie.eng.forced.sup', 'Movie.eng.2.srt' for a second English track"""
+    output = Path(output_file)
+    parts = [output.stem]
+    language = stream.get('tags', {}).get('language')
+    if language and language != 'und':
+        parts.append(language)
+    if stream.get('disposition', {}).get('forced'):
+        parts.append('forced')
+    name = ".".join(parts)
+    count = used.get((name, suffix), 0) + 1
+    used[(name, suffix)] = count
+    if count > 1:
+        name += f".{count}"
+    return str(output.with_name(name + suffix))
+
+
+def scale_filter(media, settings):
+    """Downscale filter for settings['max_height'], or None if the source already fits"""
+    max_height = settings.get('max_height')
+    if not max_height or settings.get('video_codec') == 'copy':
+        return None
+    if media is not None and media.height and media.height <= max_height:
+        return None
+    # Keep the width even for the encoder; the comma is escaped inside the filter graph
+    return f"scale=-2:min(ih\\,{max_height})"
+
+
+def plan_sidecars(media, output_file, settings):
+    """Work out the extra outputs for a job; media is the probed source or None"""
+    plan = SidecarPlan()
+    scale = scale_filter(media, settings)
+    if media is None or not media.streams:
+        # Without stream information, leave stream selection to FFmpeg as before
+        if scale:
+            plan.main_args.extend(['-vf', scale])
+        return plan
+
+    subtitle_mode = settings.get('subtitles', SUBS_EMBED)
+    thumbnails = settings.get('thumbnails', THUMB_NONE)
+    transcoding = settings.get('video_codec') != 'copy'
+
+    video = [s for s in media.streams
+             if s.get('codec_type') == 'video' and not s.get('disposition', {}).get('attached_pic')]
+    audio = [s for s in media.streams if s.get('codec_type') == 'audio']
+    subtitles = [s for s in media.streams if s.get('codec_type') == 'subtitle']
+    text_subtitles = [s for s in subtitles if s.get('codec_name') in TEXT_SUBTITLE_CODECS]
+    image_subtitles = [s for s in subtitles if s.get('codec_name') in IMAGE_SUBTITLE_SUFFIXES]
+
+    # Thumbnails branch off the decoded video; when transcoding, split the one
+    # decode between the encoder and the thumbnail filters
+    video_label = f"0:{video[0]['index']}" if video else None
+    stem = Path(output_file).with_suffix('')
+    thumbnail_paths = {'poster': f"{stem}-thumb.jpg", 'sheet': f"{stem}-sheet.jpg"}
+    branches = []
+    if video and thumbnails in (THUMB_POSTER, THUMB_BOTH):
+        branches.append('poster')
+    if video and thumbnails in (THUMB_SHEET, THUMB_BOTH) and media.duration:
+        branches.append('sheet')
+    for branch in list(branches):
+        if Path(thumbnail_paths[branch]).exists():
+            branches.remove(branch)
+            plan.kept.append(thumbnail_paths[branch])
+    if branches:
+        graph = []
+        sources = [f"[{video_label}]"] * len(branches)
+        if transcoding:
+            # Scale before the split so the encoder and thumbnails share one scaler
+            outputs = "".join(f"[{b}src]" for b in branches)
+            graph.append(f"[{video_label}]{scale + ',' if scale else ''}split={len(branches) + 1}[vout]{outputs}")
+            sources = [f"[{b}src]" for b in branches]
+            video_label = "[vout]"
+        for branch, source in zip(branches, sources):
+            if branch == 'poster':
+                start = (media.duration or 0) * POSTER_POSITION
+                graph.append(f"{source}trim=start={start:.2f},scale={POSTER_WIDTH}:-2[poster]")
+            else:
+                interval = media.duration / (SHEET_COLUMNS * SHEET_ROWS)
+                graph.append(f"{source}fps=1/{interval:.3f},scale={SHEET_TILE_WIDTH}:-2,"
+                             f"tile={SHEET_COLUMNS}x{SHEET_ROWS}[sheet]")
+        plan.filter_complex = ";".join(graph)
+
+    if video_label:
+        plan.main_args.extend(['-map', video_label])
+        if scale and not plan.filter_complex:
+            plan.main_args.extend(['-vf', scale])
+    if audio:
+        plan.main_args.extend(['-map', f"0:{audio[0]['index']}"])
+    if text_subtitles and subtitle_mode in (SUBS_EMBED, SUBS_BOTH):
+        for stream in text_subtitles:
+            plan.main_args.extend(['-map', f"0:{stream['index']}"])
+        plan.main_args.extend(['-c:s', 'mov_text'])
+    plan.main_args.extend(['-map_chapters', '0' if settings.get('chapters', True) else '-1'])
+
+    used = {}
+    if subtitle_mode in (SUBS_SRT, SUBS_BOTH):
+        for stream in text_subtitles:
+            path = sidecar_path(output_file, stream, '.srt', used)
+            if Path(path).exists():
+                plan.kept.append(path)
+                continue
+            plan.extra_outputs.append(['-map', f"0:{stream['index']}", '-c:s', 'srt', path])
+            plan.files.append(path)
+    if settings.get('image_subtitles', True):
+        for stream in image_subtitles:
+            path = sidecar_path(output_file, stream, IMAGE_SUBTITLE_SUFFIXES[stream['codec_name']], used)
+            if Path(path).exists():
+                plan.kept.append(path)
+                continue
+            plan.extra_outputs.append(['-map', f"0:{stream['index']}", '-c:s', 'copy', path])
+            plan.files.append(path)
+
+    for branch in branches:
+        path = thumbnail_paths[branch]
+        plan.extra_outputs.append(['-map', f"[{branch}]", '-frames:v', '1', '-update', '1', path])
+        plan.files.append(path)
+    return plan
@@ -0,0 +1,218 @@
+"""
+Pause/resume of ffmpeg processes and a load-aware admission controller.
+
+Processes are suspended rather than killed, so an encode continues exactly
+where it stopped. The AdmissionController samples system load, CPU and free
+memory (excluding the CPU used by our own ffmpeg processes) and decides
+whether jobs may run, with hysteresis and time-of-day schedule windows.
+
+psutil is a declared dependency. If it is missing anyway (e.g. running from
+a bare checkout), pause/resume still works (signals on POSIX,
+NtSuspendProcess on Windows), but only the memory (Linux) and schedule
+checks are available; unavailable_checks() tells the GUI which ones to disable.
+"""
+import os
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, time as dtime
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def suspend_process(pid):
+    """Suspend a process without losing its state"""
+    if psutil is not None:
+        psutil.Process(pid).suspend()
+    elif sys.platform == "win32":
+        _nt_process_call(pid, "NtSuspendProcess")
+    else:
+        import signal
+        os.kill(pid, signal.SIGSTOP)
+
+
+def resume_process(pid):
+    """Resume a process suspended with suspend_process()"""
+    if psutil is not None:
+        psutil.Process(pid).resume()
+    elif sys.platform == "win32":
+        _nt_process_call(pid, "NtResumeProcess")
+    else:
+        import signal
+        os.kill(pid, signal.SIGCONT)
+
+
+def _nt_process_call(pid, function_name):
+    import ctypes
+    PROCESS_SUSPEND_RESUME = 0x0800
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(PROCESS_SUSPEND_RESUME, False, pid)
+    if not handle:
+        raise OSError(f"Cannot open process {pid}")
+    try:
+        getattr(ctypes.windll.ntdll, function_name)(handle)
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+MODE_THROTTLED = "throttled"  # thresholds apply
+MODE_UNRESTRICTED = "unrestricted"  # run flat out, ignore thresholds
+MODE_PAUSED = "paused"  # hold everything
+
+
+@dataclass
+class ScheduleWindow:
+    """A daily time window (may wrap past midnight) with its own mode"""
+    start: dtime
+    end: dtime
+    mode: str = MODE_UNRESTRICTED
+
+    def contains(self, moment):
+        if self.start <= self.end:
+            return self.start <= moment < self.end
+        return moment >= self.start or moment < self.end
+
+    @classmethod
+    def parse(cls, text, mode=MODE_UNRESTRICTED):
+        """Parse 'HH:MM-HH:MM'"""
+        start_text, _, end_text = text.strip().partition('-')
+        start = datetime.strptime(start_text.strip(), "%H:%M").time()
+        end = datetime.strptime(end_text.strip(), "%H:%M").time()
+        return cls(start, end, mode)
+
+
+def parse_windows(text, mode=MODE_UNRESTRICTED):
+    """Parse comma-separated 'HH:MM-HH:MM' windows, skipping malformed entries"""
+    windows = []
+    for part in text.split(','):
+        if part.strip():
+            try:
+                windows.append(ScheduleWindow.parse(part, mode))
+            except ValueError:
+                pass
+    return windows
+
+
+@dataclass
+class ThrottleSettings:
+    enabled: bool = False
+    max_cpu_percent: float = 50.0  # CPU used by other processes
+    max_load_per_cpu: float = 1.0  # 1-minute load average from other processes, per core
+    min_free_memory_mb: int = 1024
+    resume_factor: float = 0.8  # resume only once below threshold * factor
+    windows: list = field(default_factory=list)
+
+
+@dataclass
+class SystemSample:
+    cpu_percent: float | None = None  # external CPU use, 0-100 of the whole machine
+    load_per_cpu: float | None = None  # external 1-minute load per core
+    free_memory_mb: float | None = None
+
+
+@dataclass
+class Decision:
+    allow: bool
+    reason: str = ""
+
+
+def read_free_memory_mb():
+    """Available memory in MB, or None if it cannot be determined"""
+    if psutil is not None:
+        return psutil.virtual_memory().available / (1024 * 1024)
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def unavailable_checks():
+    """Names of the load checks ('cpu', 'load', 'memory') this system cannot measure"""
+    missing = []
+    if psutil is None:
+        missing += ['cpu', 'load']
+    elif not hasattr(psutil, 'getloadavg'):
+        missing.append('load')
+    if read_free_memory_mb() is None:
+        missing.append('memory')
+    return missing
+
+
+class AdmissionController:
+    """Decide whether conversion jobs may run right now"""
+
+    def __init__(self, settings=None):
+        self.settings = settings or ThrottleSettings()
+        self.holding = False
+        self.cpu_count = os.cpu_count() or 1
+        self._own_processes = {}
+        if psutil is not None:
+            psutil.cpu_percent(interval=None)  # prime the system-wide counter
+
+    def mode(self, now=None):
+        moment = (now or datetime.now()).time()
+        for window in self.settings.windows:
+            if window.contains(moment):
+                return window.mode
+        return MODE_THROTTLED
+
+    def sample(self, own_pids=()):
+        """Measure system load, discounting the CPU used by our own ffmpeg processes"""
+        sample = SystemSample(free_memory_mb=read_free_memory_mb())
+        if psutil is None:
+            return sample
+
+        own_cores = 0.0
+        for pid in list(self._own_processes):
+            if pid not in own_pids:
+                del self._own_processes[pid]
+        for pid in own_pids:
+            try:
+                process = self._own_processes.get(pid)
+                if process is None:
+                    process = self._own_processes[pid] = psutil.Process(pid)
+                own_cores += process.cpu_percent(interval=None) / 100
+            except psutil.Error:
+                self._own_processes.pop(pid, None)
+
+        system_percent = psutil.cpu_percent(interval=None)
+        sample.cpu_percent = max(0.0, system_percent - own_cores * 100 / self.cpu_count)
+        try:
+            load1 = psutil.getloadavg()[0]
+            sample.load_per_cpu = max(0.0, load1 - own_cores) / self.cpu_count
+        except (AttributeError, OSError):
+            pass
+        return sample
+
+    def evaluate(self, own_pids=(), now=None, sample=None):
+        """Return a Decision, applying hysteresis between holding and running"""
+        settings = self.settings
+        mode = self.mode(now)
+        if mode == MODE_PAUSED:
+            return self._decide(False, "scheduled pause window")
+        if not settings.enabled or mode == MODE_UNRESTRICTED:
+            return self._decide(True, "unrestricted" if settings.enabled else "")
+
+        sample = sample or self.sample(own_pids)
+        # While holding, require readings comfortably below the limits before resuming
+        factor = settings.resume_factor if self.holding else 1.0
+
+        if sample.cpu_percent is not None and sample.cpu_percent > settings.max_cpu_percent * factor:
+            return self._decide(False, f"CPU busy ({sample.cpu_percent:.0f}% used by other programs)")
+        if sample.load_per_cpu is not None and sample.load_per_cpu > settings.max_load_per_cpu * factor:
+            return self._decide(False, f"system load high ({sample.load_per_cpu:.2f} per core)")
+        if sample.free_memory_mb is not None:
+            needed = settings.min_free_memory_mb / factor
+            if sample.free_memory_mb < needed:
+                return self._decide(False, f"low memory ({sample.free_memory_mb:.0f} MB free)")
+        return self._decide(True, "load normal")
+
+    def _decide(self, allow, reason):
+        self.holding = not allow
+        return Decision(allow, reason)
@@ -0,0 +1,146 @@
+"""
+Compact time series for live performance charts.
+
+Each series keeps its samples in two fixed-size array('d') buffers (time and
+value) rather than lists of objects. When a series fills up, neighbouring
+samples are averaged in pairs and the sampling interval doubles. A series
+therefore always spans the whole job in constant memory, with old history
+simply becoming coarser.
+
+MetricsRecorder keeps one set of series per running job (fps, speed,
+bitrate, output size). It also samples batch-wide totals: fps, speed, the
+output write rate and the number of running jobs. Stalls, thermal
+throttling and I/O bottlenecks then show up as dips in the charts.
+"""
+from array import array
+
+
+DEFAULT_CAPACITY = 240  # samples per series (~4 KB)
+JOB_METRICS = ('fps', 'speed', 'bitrate', 'size')
+BATCH_METRICS = ('fps', 'speed', 'write_rate', 'running')
+STALE_AFTER = 5.0  # seconds without FFmpeg stats before a job counts as stalled
+
+
+class TimeSeries:
+    """Fixed-capacity (time, value) series that halves its resolution when full"""
+    __slots__ = ('capacity', 'times', 'values', 'base_interval', 'min_interval', 'latest')
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, min_interval=0.0):
+        self.capacity = max(2, capacity - capacity % 2)
+        self.times = array('d')
+        self.values = array('d')
+        self.base_interval = min_interval
+        self.min_interval = min_interval  # seconds between stored samples; grows with compaction
+        self.latest = None  # most recent value, even if it wasn't stored
+
+    def __len__(self):
+        return len(self.values)
+
+    def append(self, t, value):
+        self.latest = value
+        if self.times and t - self.times[-1] < self.min_interval:
+            return
+        if len(self.values) >= self.capacity:
+            self.compact()
+        self.times.append(t)
+        self.values.append(value)
+
+    def compact(self):
+        """Average neighbouring samples, halving the count and the resolution"""
+        times, values = self.times, self.values
+        span = times[-1] - times[0]
+        self.times = array('d', times[1::2])
+        self.values = array('d', ((a + b) / 2 for a, b in zip(values[0::2], values[1::2])))
+        self.min_interval = max(self.min_interval * 2, 2 * span / max(1, len(times) - 1))
+
+    def maximum(self):
+        return max(self.values) if self.values else 0.0
+
+    def clear(self):
+        self.times = array('d')
+        self.values = array('d')
+        self.min_interval = self.base_interval
+        self.latest = None
+
+
+class MetricsRecorder:
+    """Per-job and batch-wide series fed from FFmpeg progress"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.jobs = {}  # job_id -> {metric: TimeSeries}
+        self.last_update = {}  # job_id -> time of the last progress sample
+        self.sizes = {}  # job_id -> latest output size in bytes
+        self.paused = set()  # job_ids whose process is suspended (pause or load hold)
+        self.batch = {metric: TimeSeries(capacity) for metric in BATCH_METRICS}
+        self._written = 0.0  # output bytes at the previous batch sample
+        self._last_sample = None
+
+    def series(self, job_id):
+        if job_id not in self.jobs:
+            self.jobs[job_id] = {metric: TimeSeries(self.capacity) for metric in JOB_METRICS}
+        return self.jobs[job_id]
+
+    def record(self, job_id, t, fps=None, speed=None, bitrate=None, size=None):
+        """Add one FFmpeg stats sample; metrics FFmpeg printed as N/A are skipped"""
+        series = self.series(job_id)
+        for metric, value in (('fps', fps), ('speed', speed), ('bitrate', bitrate), ('size', size)):
+            if value is not None:
+                series[metric].append(t, value)
+        if size is not None:
+            self.sizes[job_id] = size
+        self.last_update[job_id] = t
+
+    def set_paused(self, job_ids, t):
+        """Mark the suspended jobs; a resumed job's stall timer restarts at t"""
+        job_ids = set(job_ids)
+        for job_id in self.paused - job_ids:
+            if job_id in self.last_update:
+                self.last_update[job_id] = t
+        self.paused = job_ids
+
+    def stalled_seconds(self, job_id, t):
+        """Seconds since the job's last stats line if past STALE_AFTER, else 0 (also while paused)"""
+        if job_id in self.paused:
+            return 0.0
+        last = self.last_update.get(job_id)
+        if last is None or t - last < STALE_AFTER:
+            return 0.0
+        return t - last
+
+    def sample_batch(self, t, running_ids):
+        """Append batch totals; paused jobs and jobs without recent stats contribute nothing"""
+        fps = speed = 0.0
+        for job_id in running_ids:
+            series = self.jobs.get(job_id)
+            if series is None or job_id in self.paused or self.stalled_seconds(job_id, t):
+                continue
+            fps += series['fps'].latest or 0.0
+            speed += series['speed'].latest or 0.0
+        written = float(sum(self.sizes.values()))
+        write_rate = 0.0
+        if self._last_sample is not None and t > self._last_sample:
+            write_rate = max(0.0, written - self._written) / (t - self._last_sample)
+        self._written, self._last_sample = written, t
+
+        self.batch['fps'].append(t, fps)
+        self.batch['speed'].append(t, speed)
+        self.batch['write_rate'].append(t, write_rate)
+        self.batch['running'].append(t, float(len(running_ids)))
+
+    def finish(self, job_id):
+        """Forget a finished job's series; its output stays counted in the batch write total"""
+        self.jobs.pop(job_id, None)
+        self.last_update.pop(job_id, None)
+        self.paused.discard(job_id)
+
+    def reset(self):
+        """Start a new batch"""
+        self.jobs.clear()
+        self.last_update.clear()
+        self.sizes.clear()
+        self.paused.clear()
+        for series in self.batch.values():
+            series.clear()
+        self._written = 0.0
+        self._last_sample = None
@@ -0,0 +1,120 @@
+"""
+Tiered post-conversion verification.
+
+TIER_QUICK compares the output's container, duration and streams with the
+probed source. TIER_SAMPLED also decodes a few short windows spread across
+the file. TIER_FULL decodes everything and is meant to be run on demand.
+"""
+import subprocess
+import time
+from dataclasses import dataclass, field
+
+from mkv2mp4ui.planner import probe_file
+
+
+TIER_OFF = 0
+TIER_QUICK = 1
+TIER_SAMPLED = 2
+TIER_FULL = 3
+
+TIER_NAMES = {
+    TIER_OFF: "Off",
+    TIER_QUICK: "Quick",
+    TIER_SAMPLED: "Sampled",
+    TIER_FULL: "Full",
+}
+
+DURATION_TOLERANCE = 0.01  # fraction of the source duration
+MIN_DURATION_TOLERANCE = 1.0  # seconds
+SAMPLE_POSITIONS = (0.1, 0.5, 0.9)  # fractions of the duration
+SAMPLE_SECONDS = 2
+
+
+@dataclass
+class VerificationResult:
+    tier: int
+    ok: bool = True
+    problems: list = field(default_factory=list)
+    seconds: float = 0.0
+
+    def fail(self, problem):
+        self.ok = False
+        self.problems.append(problem)
+
+    def summary(self):
+        label = TIER_NAMES.get(self.tier, str(self.tier))
+        if self.ok:
+            return f"{label} verification passed"
+        return f"{label} verification failed: " + "; ".join(self.problems)
+
+
+def stream_types(media):
+    return {s.get('codec_type') for s in media.streams
+            if not s.get('disposition', {}).get('attached_pic')}
+
+
+def check_container(source, output, result):
+    """Tier 1: compare output duration and stream types with the source"""
+    if output is None:
+        result.fail("output could not be probed (truncated or missing moov atom?)")
+        return
+    if not output.size:
+        result.fail("output is empty")
+
+    if source is not None:
+        missing = ({'video', 'audio'} & stream_types(source)) - stream_types(output)
+        for codec_type in sorted(missing):
+            result.fail(f"no {codec_type} stream in output")
+
+        if source.duration and output.duration is not None:
+            tolerance = max(MIN_DURATION_TOLERANCE, source.duration * DURATION_TOLERANCE)
+            if abs(source.duration - output.duration) > tolerance:
+                result.fail(f"duration {output.duration:.1f}s differs from source {source.duration:.1f}s")
+        elif source.duration:
+            result.fail("output has no duration")
+
+
+def decode_errors(ffmpeg_path, output_file, start=None, seconds=None, timeout=None):
+    """Decode (part of) a file to the null muxer and return any error text"""
+    cmd = [ffmpeg_path, '-v', 'error', '-nostdin']
+    if start is not None:
+        cmd.extend(['-ss', f"{start:.3f}"])
+    cmd.extend(['-i', output_file])
+    if seconds is not None:
+        cmd.extend(['-t', str(seconds)])
+    cmd.extend(['-f', 'null', '-'])
+    try:
+        completed = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return "decode timed out"
+    except OSError as e:
+        return str(e)
+    errors = completed.stderr.strip()
+    if completed.returncode != 0 and not errors:
+        errors = f"decoder exited with code {completed.returncode}"
+    return errors
+
+
+def verify_output(source, output_file, ffmpeg_path, ffprobe_path, tier=TIER_QUICK):
+    """Verify a finished output up to the given tier; source is the probed MediaInfo or None"""
+    started = time.monotonic()
+    result = VerificationResult(tier)
+
+    output = probe_file(output_file, ffprobe_path)
+    check_container(source, output, result)
+
+    if result.ok and tier == TIER_SAMPLED and output.duration:
+        for position in SAMPLE_POSITIONS:
+            start = max(0.0, output.duration * position - SAMPLE_SECONDS / 2)
+            errors = decode_errors(ffmpeg_path, output_file, start, SAMPLE_SECONDS, timeout=120)
+            if errors:
+                result.fail(f"decode error near {start:.0f}s: {errors.splitlines()[0]}")
+                break
+
+    if result.ok and tier >= TIER_FULL:
+        errors = decode_errors(ffmpeg_path, output_file)
+        if errors:
+            result.fail(f"decode error: {errors.splitlines()[0]}")
+
+    result.seconds = time.monotonic() - started
+    return result
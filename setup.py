@@ -48,6 +48,8 @@ setup(
     entry_points={
         "console_scripts": [
             "mkv2mp4ui=mkv2mp4ui.main:main",
+            "mkv2mp4ui-fake-ffmpeg=mkv2mp4ui.fake_ffmpeg:ffmpeg_main",
+            "mkv2mp4ui-fake-ffprobe=mkv2mp4ui.fake_ffmpeg:ffprobe_main",
         ],
         "gui_scripts": [
             "mkv2mp4ui-gui=mkv2mp4ui.main:main",
@@ -0,0 +1,177 @@
+"""
+convert_batch() and ConversionEngine against the simulated FFmpeg.
+
+The tests write small shell wrappers named mkv2mp4ui-fake-ffmpeg and
+mkv2mp4ui-fake-ffprobe (so find_ffprobe() pairs them up) that run
+mkv2mp4ui.fake_ffmpeg with this interpreter. The fake is configured through
+its FAKE_FFMPEG_* environment variables. Run with: python -m unittest discover tests
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from mkv2mp4ui.cancellation import PARTIAL_QUARANTINE, QUARANTINE_DIR, QUIT_GRACE_PERIOD
+from mkv2mp4ui.engine import ConversionEngine, JobFinished, JobProgress, JobStarted, convert_batch
+from mkv2mp4ui.fake_ffmpeg import PLACEHOLDER_MAGIC
+from mkv2mp4ui.jobqueue import JobQueue, JobStatus
+
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+WRAPPER = '#!/bin/sh\nexec "{python}" -c "import sys; from mkv2mp4ui.fake_ffmpeg import {main}; ' \
+          'sys.exit({main}())" "$@"\n'
+
+
+def collect(events):
+    """Run an async event iterator to completion and return its events"""
+    async def drain():
+        return [event async for event in events]
+    return asyncio.run(drain())
+
+
+@unittest.skipIf(sys.platform == "win32", "the fake FFmpeg wrappers are shell scripts")
+class EngineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work = tempfile.TemporaryDirectory()
+        self.addCleanup(self.work.cleanup)
+        self.root = Path(self.work.name)
+        self.ffmpeg = self.wrapper("mkv2mp4ui-fake-ffmpeg", "ffmpeg_main")
+        self.wrapper("mkv2mp4ui-fake-ffprobe", "ffprobe_main")
+        self.fake_env(FAKE_FFMPEG_SPEED="60", FAKE_FFMPEG_STATS_PERIOD="0.05", FAKE_FFMPEG_DURATION="30",
+                      PYTHONPATH=os.pathsep.join(filter(None, [str(PACKAGE_ROOT),
+                                                               os.environ.get("PYTHONPATH")])))
+
+    def wrapper(self, name, main):
+        path = self.root / name
+        path.write_text(WRAPPER.format(python=sys.executable, main=main))
+        path.chmod(0o755)
+        return str(path)
+
+    def fake_env(self, **values):
+        patcher = mock.patch.dict(os.environ, values)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def pairs(self, count):
+        pairs = []
+        for index in range(count):
+            source = self.root / f"episode{index}.mkv"
+            source.write_bytes(b"\0" * 1024)
+            pairs.append((str(source), str(self.root / f"episode{index}.mp4")))
+        return pairs
+
+    def test_converts_within_the_parallel_limit(self):
+        running, peak = 0, 0
+        finished = []
+        for event in collect(convert_batch(self.pairs(5), self.ffmpeg, max_parallel=2, probe_media=False)):
+            if isinstance(event, JobStarted):
+                running += 1
+                peak = max(peak, running)
+            elif isinstance(event, JobFinished):
+                running -= 1
+                finished.append(event)
+        self.assertEqual(peak, 2)
+        self.assertEqual(len(finished), 5)
+        self.assertTrue(all(event.success for event in finished))
+        for event in finished:
+            with open(event.job.output_file, "rb") as f:
+                self.assertTrue(f.read().startswith(PLACEHOLDER_MAGIC))
+
+    def test_cancel_one_job_leaves_the_others_running(self):
+        queue = JobQueue()
+        jobs = [queue.add(source, output, {'video_codec': 'libx264', 'audio_codec': 'aac'})
+                for source, output in self.pairs(3)]
+        self.fake_env(FAKE_FFMPEG_SPEED="10")
+        engine = ConversionEngine(self.ffmpeg, max_parallel=3, probe_media=False)
+
+        async def run():
+            finished = {}
+            async for event in engine.run(queue):
+                if isinstance(event, JobProgress) and event.job is jobs[1]:
+                    engine.cancel_job(jobs[1].id)
+                elif isinstance(event, JobFinished):
+                    finished[event.job.id] = event
+            return finished
+
+        finished = asyncio.run(run())
+        self.assertFalse(finished[jobs[1].id].success)
+        self.assertEqual(queue.get(jobs[1].id).status, JobStatus.CANCELLED)
+        self.assertFalse(os.path.exists(jobs[1].output_file))
+        for job in (jobs[0], jobs[2]):
+            self.assertTrue(finished[job.id].success)
+            self.assertEqual(job.status, JobStatus.DONE)
+
+    def test_stop_escalates_past_a_hung_ffmpeg(self):
+        self.fake_env(FAKE_FFMPEG_FAIL="hang", FAKE_FFMPEG_FAIL_AT="0.1")
+        queue = JobQueue()
+        job = queue.add(*self.pairs(1)[0], {'video_codec': 'libx264', 'audio_codec': 'aac'})
+        engine = ConversionEngine(self.ffmpeg, probe_media=False)
+
+        async def run():
+            stopped_at = None
+            async for event in engine.run(queue):
+                if isinstance(event, JobProgress) and stopped_at is None:
+                    await asyncio.sleep(0.5)  # well past FAIL_AT, so the fake is hanging
+                    stopped_at = time.monotonic()
+                    engine.cancel_job(job.id)
+                elif isinstance(event, JobFinished):
+                    return event, time.monotonic() - stopped_at
+
+        finished, elapsed = asyncio.run(run())
+        # 'q' is ignored, so only terminate() ends it, after the quit grace period
+        self.assertFalse(finished.success)
+        self.assertNotEqual(finished.return_code, 0)
+        self.assertGreaterEqual(elapsed, QUIT_GRACE_PERIOD)
+        self.assertLess(elapsed, 10)
+        self.assertFalse(os.path.exists(job.output_file))
+
+    def test_failed_job_cleans_up_its_partial_output(self):
+        self.fake_env(FAKE_FFMPEG_FAIL="exit", FAKE_FFMPEG_FAIL_MATCH="episode0")
+        finished = [event for event in collect(convert_batch(self.pairs(2), self.ffmpeg, probe_media=False))
+                    if isinstance(event, JobFinished)]
+        failed, converted = finished
+        self.assertFalse(failed.success)
+        self.assertEqual(failed.return_code, 1)
+        self.assertFalse(os.path.exists(failed.job.output_file))
+        self.assertTrue(converted.success)
+        self.assertTrue(os.path.exists(converted.job.output_file))
+
+    def test_failed_job_partial_output_can_be_quarantined(self):
+        self.fake_env(FAKE_FFMPEG_FAIL="exit")
+        finished = [event for event in collect(convert_batch(self.pairs(1), self.ffmpeg, probe_media=False,
+                                                             partial_policy=PARTIAL_QUARANTINE))
+                    if isinstance(event, JobFinished)]
+        output = Path(finished[0].job.output_file)
+        self.assertFalse(output.exists())
+        self.assertTrue((output.parent / QUARANTINE_DIR / output.name).exists())
+
+    def test_preflight_rejects_jobs_that_cannot_work(self):
+        self.fake_env(FAKE_FFMPEG_FAIL="exit", FAKE_FFMPEG_FAIL_AT="0", FAKE_FFMPEG_FAIL_MATCH="episode1")
+        events = collect(convert_batch(self.pairs(2), self.ffmpeg, preflight=True))
+        finished = {event.job.input_file: event for event in events if isinstance(event, JobFinished)}
+        started = [event.job.input_file for event in events if isinstance(event, JobStarted)]
+        rejected = finished[str(self.root / "episode1.mkv")]
+        self.assertFalse(rejected.success)
+        self.assertIsNone(rejected.return_code)
+        self.assertNotIn(rejected.job.input_file, started)
+        self.assertTrue(finished[str(self.root / "episode0.mkv")].success)
+
+    def test_preflight_fixes_a_stream_the_mp4_muxer_rejects(self):
+        self.fake_env(FAKE_FFMPEG_FAIL="exit", FAKE_FFMPEG_FAIL_AT="0", FAKE_FFMPEG_FAIL_MATCH="-c:v copy",
+                      FAKE_FFMPEG_ERROR_TEXT="[mp4 @ 0x5581] Could not find tag for codec h264 in stream #0, "
+                                             "codec not currently supported in container")
+        settings = {'video_codec': 'copy', 'audio_codec': 'aac', 'crf': 23, 'preset': 'medium'}
+        events = collect(convert_batch(self.pairs(1), self.ffmpeg, settings, preflight=True))
+        finished = [event for event in events if isinstance(event, JobFinished)]
+        self.assertEqual(len(finished), 1)
+        self.assertTrue(finished[0].success)
+        self.assertEqual(finished[0].job.codec_settings['video_codec'], 'libx264')
+
+
+if __name__ == "__main__":
+    unittest.main()
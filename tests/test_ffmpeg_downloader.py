@@ -0,0 +1,175 @@
+"""
+RangeDownloader against a local HTTP stand-in (http.server on 127.0.0.1).
+
+The stand-in serves one archive with ETag and byte-range support plus a
+checksums file, and records every request so the tests can check what was
+fetched. Run with: python -m unittest discover tests
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from mkv2mp4ui.ffmpeg_downloader import DownloadCancelled, DownloadError, RangeDownloader
+
+
+ARCHIVE_NAME = "ffmpeg-test.zip"
+PAYLOAD = os.urandom(3 * 1024 * 1024 + 12345)  # large enough for 4 ranged segments
+PAYLOAD_SHA256 = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves /<ARCHIVE_NAME> (with Range support) and /checksums.sha256"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.respond(head=True)
+
+    def do_GET(self):
+        self.respond(head=False)
+
+    def respond(self, head):
+        server = self.server
+        server.requests.append((self.command, self.path, self.headers.get("Range")))
+        if self.path == "/checksums.sha256" and server.checksums is not None:
+            body = server.checksums.encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if not head:
+                self.wfile.write(body)
+            return
+        if self.path != "/" + ARCHIVE_NAME:
+            self.send_error(404)
+            return
+
+        start, end = 0, len(PAYLOAD) - 1
+        range_header = self.headers.get("Range")
+        if range_header and not head:
+            first, _, last = range_header.split("=", 1)[1].partition("-")
+            start, end = int(first), int(last) if last else len(PAYLOAD) - 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(PAYLOAD)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", '"test-archive"')
+        self.end_headers()
+        if head:
+            return
+        try:
+            for offset in range(start, end + 1, 64 * 1024):
+                self.wfile.write(PAYLOAD[offset:min(offset + 64 * 1024, end + 1)])
+                with server.lock:
+                    server.bytes_sent += min(64 * 1024, end + 1 - offset)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client cancelled
+
+
+class DownloaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        self.server.requests = []
+        self.server.bytes_sent = 0
+        self.server.lock = threading.Lock()
+        self.server.checksums = f"{PAYLOAD_SHA256}  {ARCHIVE_NAME}\n"
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.cache = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.cache.cleanup()
+
+    def downloader(self, **kwargs):
+        kwargs.setdefault("checksum_url", f"{self.base_url}/checksums.sha256")
+        return RangeDownloader(f"{self.base_url}/{ARCHIVE_NAME}", cache_dir=self.cache.name,
+                               segments=4, timeout=5, **kwargs)
+
+    def archive_gets(self):
+        return [r for r in self.server.requests if r[0] == "GET" and r[1] == "/" + ARCHIVE_NAME]
+
+    def test_download_verifies_and_reuses_cache(self):
+        path = self.downloader().download()
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), PAYLOAD)
+        self.assertEqual(len(self.archive_gets()), 4)
+
+        self.server.requests.clear()
+        self.assertEqual(self.downloader().download(), path)
+        self.assertEqual(self.archive_gets(), [])
+
+    def test_cancelled_download_resumes_from_ranges(self):
+        first = self.downloader()
+        first.progress_callback = lambda done, total: done > len(PAYLOAD) // 3 and first.cancel()
+        with self.assertRaises(DownloadCancelled):
+            first.download()
+        sent_before = self.server.bytes_sent
+
+        self.server.requests.clear()
+        path = self.downloader().download()
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), PAYLOAD)
+
+        # Segments that had data continue from where they stopped
+        segment_starts = [i * (len(PAYLOAD) // 4) for i in range(4)]
+        resumed = [r for r in self.archive_gets()
+                   if int(r[2].split("=")[1].split("-")[0]) not in segment_starts]
+        self.assertTrue(resumed)
+        self.assertLess(self.server.bytes_sent - sent_before, len(PAYLOAD))
+
+    def test_checksum_mismatch_fails_and_caches_nothing(self):
+        with self.assertRaises(DownloadError) as caught:
+            self.downloader(checksum_url=None, expected_sha256="0" * 64).download()
+        self.assertIn("Checksum mismatch", str(caught.exception))
+        self.assertEqual(os.listdir(self.cache.name), [])
+
+    def test_checksum_mismatch_from_checksums_file(self):
+        self.server.checksums = f"{'1' * 64}  {ARCHIVE_NAME}\n"
+        with self.assertRaises(DownloadError):
+            self.downloader().download()
+        self.assertFalse(os.path.exists(os.path.join(self.cache.name, ARCHIVE_NAME)))
+
+    def test_unreadable_checksums_file_fails_the_download(self):
+        self.server.checksums = None  # 404
+        with self.assertRaises(DownloadError) as caught:
+            self.downloader().download()
+        self.assertIn("checksums", str(caught.exception))
+        self.assertEqual(self.archive_gets(), [])
+
+    def test_cached_archive_is_used_when_the_checksums_are_unreachable(self):
+        path = self.downloader().download()
+        self.server.requests.clear()
+        # Nothing listens on port 1: the machine is offline
+        offline = self.downloader(checksum_url="http://127.0.0.1:1/checksums.sha256")
+        self.assertEqual(offline.download(), path)
+        self.assertEqual(self.server.requests, [])
+
+    def test_corrupt_cached_archive_is_not_trusted_without_the_checksums(self):
+        path = self.downloader().download()
+        with open(path, "r+b") as f:
+            f.write(b"corrupt")
+        self.server.requests.clear()
+        # Fetched again and verified against the checksum recorded for the cache
+        self.assertEqual(self.downloader(checksum_url="http://127.0.0.1:1/checksums.sha256").download(), path)
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), PAYLOAD)
+        self.assertEqual(len(self.archive_gets()), 4)
+
+    def test_checksums_file_without_the_archive_fails(self):
+        self.server.checksums = f"{PAYLOAD_SHA256}  some-other.zip\n"
+        with self.assertRaises(DownloadError):
+            self.downloader().download()
+        self.assertEqual(self.archive_gets(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()